@@ -0,0 +1,33 @@
+"""notification fanout added
+
+Revision ID: 8e1f5b7c3d42
+Revises: 4c7d2e9a1b30
+Create Date: 2026-10-19 01:10:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f5b7c3d42'
+down_revision: Union[str, None] = '4c7d2e9a1b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('notification_outbox', sa.Column('fanout_id', sa.String(length=64), nullable=True))
+    op.add_column('notification_outbox', sa.Column('priority', sa.SmallInteger(), server_default='0',
+                                                   nullable=False))
+    op.create_index('ix_notification_outbox_fanout_id', 'notification_outbox', ['fanout_id'], unique=False)
+    op.create_index('ix_company_member_company_id_id', 'company_member', ['company_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_company_member_company_id_id', table_name='company_member')
+    op.drop_index('ix_notification_outbox_fanout_id', table_name='notification_outbox')
+    op.drop_column('notification_outbox', 'priority')
+    op.drop_column('notification_outbox', 'fanout_id')
@@ -0,0 +1,34 @@
+"""company member unique added
+
+Revision ID: b52a9c0e7f13
+Revises: 8e1f5b7c3d42
+Create Date: 2026-10-19 02:45:08.551730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b52a9c0e7f13'
+down_revision: Union[str, None] = '8e1f5b7c3d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the oldest row of any membership that was duplicated before the constraint existed
+    op.execute("""
+        DELETE FROM company_member duplicate
+        USING company_member original
+        WHERE duplicate.company_id = original.company_id
+          AND duplicate.user_id = original.user_id
+          AND duplicate.id > original.id
+    """)
+    op.create_unique_constraint('uq_company_member_company_id_user_id', 'company_member',
+                                ['company_id', 'user_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_company_member_company_id_user_id', 'company_member', type_='unique')
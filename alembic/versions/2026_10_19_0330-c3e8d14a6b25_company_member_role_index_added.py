@@ -0,0 +1,26 @@
+"""company member role index added
+
+Revision ID: c3e8d14a6b25
+Revises: b52a9c0e7f13
+Create Date: 2026-10-19 03:30:44.127690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8d14a6b25'
+down_revision: Union[str, None] = 'b52a9c0e7f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_company_member_company_id_role_id', 'company_member', ['company_id', 'role', 'id'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_company_member_company_id_role_id', table_name='company_member')
@@ -0,0 +1,33 @@
+"""trigram search indexes added
+
+Revision ID: d7a4f2b90c18
+Revises: c3e8d14a6b25
+Create Date: 2026-10-19 04:15:26.830412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a4f2b90c18'
+down_revision: Union[str, None] = 'c3e8d14a6b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_company_name_trgm', 'company', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_user_username_trgm', 'user', ['username'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+    op.create_index('ix_user_email_trgm', 'user', ['email'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_email_trgm', table_name='user')
+    op.drop_index('ix_user_username_trgm', table_name='user')
+    op.drop_index('ix_company_name_trgm', table_name='company')
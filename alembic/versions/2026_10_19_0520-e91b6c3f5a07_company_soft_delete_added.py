@@ -0,0 +1,28 @@
+"""company soft delete added
+
+Revision ID: e91b6c3f5a07
+Revises: d7a4f2b90c18
+Create Date: 2026-10-19 05:20:51.604338
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91b6c3f5a07'
+down_revision: Union[str, None] = 'd7a4f2b90c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('company', sa.Column('is_deleted', sa.Boolean(), server_default='false', nullable=False))
+    op.create_index('ix_quiz_result_company_id_id', 'quiz_result', ['company_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_result_company_id_id', table_name='quiz_result')
+    op.drop_column('company', 'is_deleted')
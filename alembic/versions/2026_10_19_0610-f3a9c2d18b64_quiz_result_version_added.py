@@ -0,0 +1,26 @@
+"""quiz result version added
+
+Revision ID: f3a9c2d18b64
+Revises: e91b6c3f5a07
+Create Date: 2026-10-19 06:10:12.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c2d18b64'
+down_revision: Union[str, None] = 'e91b6c3f5a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('quiz_result', sa.Column('quiz_version', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('quiz_result', 'quiz_version')
@@ -0,0 +1,38 @@
+"""quiz result detail added
+
+Revision ID: a8d2c61f4e37
+Revises: f3a9c2d18b64
+Create Date: 2026-10-19 07:05:41.207113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2c61f4e37'
+down_revision: Union[str, None] = 'f3a9c2d18b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('quiz_result_detail',
+    sa.Column('result_id', sa.Integer(), nullable=False),
+    sa.Column('answers', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('scores', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('questions', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['result_id'], ['quiz_result.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('result_id')
+    )
+    op.create_index('ix_quiz_result_detail_answers', 'quiz_result_detail', ['answers'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'answers': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_result_detail_answers', table_name='quiz_result_detail',
+                  postgresql_using='gin', postgresql_ops={'answers': 'jsonb_path_ops'})
+    op.drop_table('quiz_result_detail')
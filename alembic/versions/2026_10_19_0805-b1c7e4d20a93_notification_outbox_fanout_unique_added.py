@@ -0,0 +1,37 @@
+"""notification outbox fanout unique added
+
+Revision ID: b1c7e4d20a93
+Revises: a8d2c61f4e37
+Create Date: 2026-10-19 08:05:12.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c7e4d20a93'
+down_revision: Union[str, None] = 'a8d2c61f4e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the oldest row of any fan-out notification a retried chunk inserted twice
+    op.execute("""
+        DELETE FROM notification_outbox duplicate
+        USING notification_outbox original
+        WHERE duplicate.fanout_id = original.fanout_id
+          AND duplicate.recipient_user_id = original.recipient_user_id
+          AND duplicate.id > original.id
+    """)
+    # the unique index leads with fanout_id, so it also serves the progress lookups
+    op.drop_index('ix_notification_outbox_fanout_id', table_name='notification_outbox')
+    op.create_unique_constraint('uq_notification_outbox_fanout_id_recipient_user_id', 'notification_outbox',
+                                ['fanout_id', 'recipient_user_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_notification_outbox_fanout_id_recipient_user_id', 'notification_outbox', type_='unique')
+    op.create_index('ix_notification_outbox_fanout_id', 'notification_outbox', ['fanout_id'], unique=False)
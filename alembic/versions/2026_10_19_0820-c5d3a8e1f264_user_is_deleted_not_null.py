@@ -0,0 +1,29 @@
+"""user is_deleted not null
+
+Revision ID: c5d3a8e1f264
+Revises: b1c7e4d20a93
+Create Date: 2026-10-19 08:20:47.318052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d3a8e1f264'
+down_revision: Union[str, None] = 'b1c7e4d20a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # rows written outside the ORM never got the client side default
+    op.execute('UPDATE "user" SET is_deleted = false WHERE is_deleted IS NULL')
+    op.alter_column('user', 'is_deleted', existing_type=sa.Boolean(), server_default=sa.false(),
+                    nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('user', 'is_deleted', existing_type=sa.Boolean(), server_default=None, nullable=True)
@@ -0,0 +1,40 @@
+"""quiz result detail question ids
+
+Revision ID: d8f1b6c47e39
+Revises: c5d3a8e1f264
+Create Date: 2026-10-19 08:35:26.940217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f1b6c47e39'
+down_revision: Union[str, None] = 'c5d3a8e1f264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # assembled quizzes keep the bank question id per number instead of a copy of every question
+    op.alter_column('quiz_result_detail', 'questions', new_column_name='question_ids')
+    op.execute("""
+        UPDATE quiz_result_detail
+        SET question_ids = (SELECT jsonb_object_agg(question->>'number', question->'bank_question_id')
+                            FROM jsonb_array_elements(question_ids) question)
+        WHERE jsonb_typeof(question_ids) = 'array'
+    """)
+
+
+def downgrade() -> None:
+    # the question bodies are not copied back, so older code exports only the number and bank id
+    op.execute("""
+        UPDATE quiz_result_detail
+        SET question_ids = (SELECT jsonb_agg(jsonb_build_object('number', (entry.key)::int,
+                                                                'bank_question_id', entry.value))
+                            FROM jsonb_each(question_ids) entry)
+        WHERE question_ids IS NOT NULL
+    """)
+    op.alter_column('quiz_result_detail', 'question_ids', new_column_name='questions')
@@ -0,0 +1,39 @@
+"""
+Compare two benchmark reports scenario by scenario.
+
+    $ python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(args):
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    for name, scenario in after["scenarios"].items():
+        baseline = before["scenarios"].get(name)
+        if baseline is None:
+            print(f"{name}: new scenario")
+            continue
+        cells = [f"{metric} {baseline.get(metric) or 0:.2f} -> {scenario.get(metric) or 0:.2f} "
+                 f"({change(baseline.get(metric), scenario.get(metric))})"
+                 for metric in METRICS]
+        print(f"{name}: " + ", ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    main(parser.parse_args())
@@ -0,0 +1,234 @@
+"""
+Synthetic data generator for scale testing.
+
+Loads users, companies and memberships into Postgres with COPY, quizzes of varied sizes into
+Mongo with insert_many, and quiz_result rows plus their per-question detail. Every row is derived
+from --seed and its shard number only, so the output is identical whatever --processes is.
+
+Company sizes follow a Zipf distribution (company 1 is the biggest tenant); user ``c`` owns
+company ``c`` and every user is a member of one company picked by that distribution.
+The schema must already exist (``alembic upgrade head``) and be empty.
+
+    $ python -m benchmarks.datagen --users 2000000 --companies 5000 --results 20000000 --processes 8
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+import asyncpg  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from benchmarks.harness import PASSWORD, ROLES, build_quiz, username  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from src.utils.utils_auth import bcrypt_context  # noqa: E402
+
+EPOCH = datetime(2024, 1, 1)
+ADMIN_SHARE = 0.02
+
+
+@dataclass
+class Plan:
+    seed: int
+    users: int
+    companies: int
+    results: int
+    chunk_size: int
+    dsn: str
+    details: bool
+    cumulative_weights: list
+    quizzes: list  # (quiz_id, company_id, questions)
+    quizzes_by_company: dict
+    hashed_password: str
+
+
+def mix(*values):
+    """Cheap deterministic hash in [0, 1) so any process can recompute per-user choices."""
+    h = 0x9E3779B97F4A7C15
+    for value in values:
+        h = ((h ^ value) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 31
+    return h / 2 ** 64
+
+
+def company_of(plan, user_id):
+    position = mix(plan.seed, user_id) * plan.cumulative_weights[-1]
+    return bisect.bisect_right(plan.cumulative_weights, position) + 1
+
+
+def quiz_object_id(index):
+    return ObjectId(f"{index + 1:024x}")
+
+
+def shards(total, chunk_size):
+    return [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+
+def build_plan(args):
+    rng = random.Random(f"{args.seed}-plan")
+    weights = [1 / rank ** args.zipf for rank in range(1, args.companies + 1)]
+    quizzes, quizzes_by_company = [], {}
+    for company_id in range(1, args.companies + 1):
+        for _ in range(max(1, round(rng.expovariate(1 / args.quizzes_per_company)))):
+            questions = min(args.max_questions, max(2, int(rng.lognormvariate(2.5, 0.8))))
+            quiz_id = str(quiz_object_id(len(quizzes)))
+            quizzes.append((quiz_id, company_id, questions))
+            quizzes_by_company.setdefault(company_id, []).append(len(quizzes) - 1)
+    return Plan(seed=args.seed, users=args.users, companies=args.companies, results=args.results,
+                chunk_size=args.chunk_size, dsn=args.dsn or SQLALCHEMY_DATABASE_URL.replace("+asyncpg", ""),
+                details=not args.skip_details, cumulative_weights=list(itertools.accumulate(weights)),
+                quizzes=quizzes, quizzes_by_company=quizzes_by_company,
+                hashed_password=bcrypt_context.hash(PASSWORD))
+
+
+async def load_users(plan, start, end):
+    rng = random.Random(f"{plan.seed}-users-{start}")
+    users, members = [], []
+    for user_id in range(start + 1, end + 1):
+        registered = EPOCH + timedelta(seconds=rng.randint(0, 365 * 86400))
+        users.append((user_id, username(user_id), f"{username(user_id)}@example.com", plan.hashed_password,
+                      True, True, False, False, False, registered))
+        company_id = company_of(plan, user_id)
+        if user_id <= plan.companies:
+            members.append((user_id, user_id, ROLES["owner"], registered))
+        if company_id != user_id or user_id > plan.companies:
+            role = ROLES["admin"] if mix(plan.seed, user_id, 1) < ADMIN_SHARE else ROLES["member"]
+            members.append((user_id, company_id, role, registered))
+    connection = await asyncpg.connect(plan.dsn)
+    try:
+        await connection.copy_records_to_table(
+            "user", records=users,
+            columns=["id", "username", "email", "hashed_password", "is_verified", "is_active",
+                     "is_superuser", "is_deleted", "is_staff", "registration_date"])
+        await connection.copy_records_to_table(
+            "company_member", records=members,
+            columns=["user_id", "company_id", "role", "registration_date"])
+    finally:
+        await connection.close()
+    return len(users)
+
+
+def result_detail(answers, result_id):
+    scores = {str(number): float(answer == [0]) for number, answer in enumerate(answers, start=1)}
+    return result_id, json.dumps(dict(zip(scores, answers))), json.dumps(scores)
+
+
+async def load_results(plan, start, end):
+    rng = random.Random(f"{plan.seed}-results-{start}")
+    rows, details = [], []
+    for result_id in range(start + 1, end + 1):
+        user_id = rng.randint(1, plan.users)
+        company_id = company_of(plan, user_id)
+        quiz = plan.quizzes[rng.choice(plan.quizzes_by_company[company_id])]
+        answers = [[rng.randint(0, 3)] for _ in range(quiz[2])]
+        score = sum(answer == [0] for answer in answers)
+        rows.append((result_id, quiz[0], user_id, company_id, float(score), quiz[2],
+                     EPOCH + timedelta(seconds=rng.randint(0, 365 * 86400))))
+        if plan.details:
+            details.append(result_detail(answers, result_id))
+
+    connection = await asyncpg.connect(plan.dsn)
+    try:
+        await connection.copy_records_to_table(
+            "quiz_result", records=rows,
+            columns=["id", "quiz_id", "user_id", "company_id", "result", "questions_overall", "quiz_date"])
+        if details:
+            await connection.copy_records_to_table(
+                "quiz_result_detail", records=details, columns=["result_id", "answers", "scores"])
+    finally:
+        await connection.close()
+    return len(rows)
+
+
+def run_shard(job):
+    loader, plan, start, end = job
+    return asyncio.run(loader(plan, start, end))
+
+
+async def load_companies(plan):
+    rng = random.Random(f"{plan.seed}-companies")
+    connection = await asyncpg.connect(plan.dsn)
+    try:
+        await connection.executemany(
+            "INSERT INTO company_role (id, name) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+            [(role_id, name) for name, role_id in ROLES.items()])
+        await connection.copy_records_to_table(
+            "company", records=[(company_id, f"Company {company_id}", f"Synthetic company {company_id}",
+                                 rng.random() < 0.1, EPOCH) for company_id in range(1, plan.companies + 1)],
+            columns=["id", "name", "description", "is_private", "registration_date"])
+    finally:
+        await connection.close()
+
+
+async def load_quizzes(plan, mongo_url, batch_size):
+    collection = AsyncIOMotorClient(mongo_url)[settings.MONGO_DB][settings.MONGO_COLLECTION]
+    batch = []
+    for index, (quiz_id, company_id, questions) in enumerate(plan.quizzes):
+        document = build_quiz(company_id, company_id, index, questions)
+        document["_id"] = ObjectId(quiz_id)
+        batch.append(document)
+        if len(batch) == batch_size:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def reset_sequences(plan):
+    connection = await asyncpg.connect(plan.dsn)
+    try:
+        for table in ("user", "company", "company_member", "quiz_result"):
+            await connection.execute(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))")
+    finally:
+        await connection.close()
+
+
+def run_parallel(executor, loader, plan, total):
+    started = time.perf_counter()
+    jobs = [(loader, plan, start, end) for start, end in shards(total, plan.chunk_size)]
+    loaded = sum(executor.map(run_shard, jobs))
+    elapsed = time.perf_counter() - started
+    print(f"{loader.__name__}: {loaded} rows in {elapsed:.1f}s ({loaded / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+def main(args):
+    plan = build_plan(args)
+    asyncio.run(load_companies(plan))
+    asyncio.run(load_quizzes(plan, args.mongo_url or settings.MONGO_URL, args.mongo_batch_size))
+    print(f"companies: {plan.companies}, quizzes: {len(plan.quizzes)}")
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        run_parallel(executor, load_users, plan, plan.users)
+        run_parallel(executor, load_results, plan, plan.results)
+    asyncio.run(reset_sequences(plan))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", help="Postgres DSN, built from the DB_* settings by default")
+    parser.add_argument("--mongo-url")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exponent of the company size distribution")
+    parser.add_argument("--quizzes-per-company", type=float, default=5)
+    parser.add_argument("--max-questions", type=int, default=200)
+    parser.add_argument("--results", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--mongo-batch-size", type=int, default=1000)
+    parser.add_argument("--skip-details", action="store_true", help="Do not write the per-question result detail")
+    parser.add_argument("--processes", type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+"""
+End-to-end benchmark of the hot endpoints.
+
+The app runs in-process behind httpx's ASGI transport. Postgres is reached through
+--database-url (any async SQLAlchemy URL, the DB_* settings by default); Redis and Mongo use
+local servers when --redis-url / --mongo-url are given and in-process fakes (fakeredis,
+mongomock-motor) otherwise. The database is dropped and reseeded on every run.
+
+    $ python -m benchmarks.e2e --users 1000 --results 10000 --requests 500 --output bench.json
+    $ python -m benchmarks.compare before.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.harness import (PASSWORD, Volumes, create_stand_ins, reset_schema, run_scenario, seed, username,
+                                wire_app)
+from benchmarks.stats import current_commit, summarize
+from src.main import app  # noqa: E402
+from src.utils.utils_auth import create_access_token  # noqa: E402
+
+EXPORT_SCENARIOS = {"company_results_json", "company_results_csv"}
+
+
+def build_scenarios(client, dataset, volumes):
+    company_id = 1
+    user_id = 1  # owner of company 1
+    quiz_id = dataset.company_quiz(company_id)
+    headers = {"Authorization": f"Bearer {create_access_token(user_id=user_id, username=username(user_id))}"}
+    solution = {"answers": {str(number): [0] for number in range(1, volumes.questions + 1)}}
+
+    return {
+        "login": lambda _: client.post("/auth/jwt/login",
+                                       data={"username": username(user_id), "password": PASSWORD}),
+        "get_quiz": lambda _: client.get(f"/quizzes/{company_id}/{quiz_id}", headers=headers),
+        "submit_solution": lambda _: client.post(f"/quizzes/{company_id}/{quiz_id}/solution",
+                                                 json=solution, headers=headers),
+        "average_mark": lambda _: client.get("/quizzes/average_mark/", headers=headers),
+        "company_results_json": lambda _: client.get(f"/quizzes/admin/{company_id}/results_json", headers=headers),
+        "company_results_csv": lambda _: client.get(f"/quizzes/admin/{company_id}/results_csv", headers=headers),
+        "company_invites": lambda _: client.get(f"/companies/company_inbox/invites/{company_id}", headers=headers),
+        "company_admins": lambda _: client.get(f"/companies/{company_id}/admin_user/", headers=headers),
+        "company_members": lambda _: client.get(f"/companies/details/{company_id}/members", headers=headers),
+    }
+
+
+async def main(args):
+    volumes = Volumes(users=args.users, companies=args.companies, quizzes=args.quizzes,
+                      questions=args.questions, results=args.results, invitations=args.invitations, seed=args.seed)
+    stand_ins = await create_stand_ins(args.database_url, args.redis_url, args.mongo_url)
+    with wire_app(app, stand_ins):
+        await reset_schema(stand_ins)
+        dataset = await seed(stand_ins, volumes)
+
+        report = {
+            "commit": current_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "backends": stand_ins.description,
+            "volumes": vars(volumes),
+            "concurrency": args.concurrency,
+            "scenarios": {},
+        }
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            scenarios = build_scenarios(client, dataset, volumes)
+            for name in args.scenarios or scenarios:
+                requests = args.export_requests if name in EXPORT_SCENARIOS else args.requests
+                latencies, wall_time, errors = await run_scenario(scenarios[name], requests, args.concurrency)
+                report["scenarios"][name] = summarize(latencies, wall_time, errors)
+                print(f"{name}: {json.dumps(report['scenarios'][name])}", file=sys.stderr)
+
+    await stand_ins.engine.dispose()
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--redis-url")
+    parser.add_argument("--mongo-url")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--quizzes", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--results", type=int, default=10000)
+    parser.add_argument("--invitations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--export-requests", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenarios to run, all by default")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    asyncio.run(main(parser.parse_args()))
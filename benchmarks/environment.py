@@ -0,0 +1,26 @@
+import os
+
+# Settings() refuses to start without these; benchmarks talk to local stand-ins only.
+BENCHMARK_ENV = {
+    "DB_NAME": "quizzes_bench",
+    "DB_USER": "postgres",
+    "DB_PASS": "postgres",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "SECRET_KEY": "benchmark-secret",
+    "ALGORITHM": "HS256",
+    "PGADMIN_DEFAULT_EMAIL": "bench@example.com",
+    "PGADMIN_DEFAULT_PASSWORD": "bench",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_USER": "bench",
+    "EMAIL_PASSWORD": "bench",
+    "REDIS_URL": "redis://localhost:6379/15",
+    "MONGO_URL": "mongodb://localhost:27017",
+    "MONGO_DB": "quizzes_bench",
+    "MONGO_COLLECTION": "quizzes",
+}
+
+
+def configure_environment():
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,95 @@
+"""
+Peak memory benchmark for the quiz result exports.
+
+Runs ``get_quiz_json`` and ``get_quiz_csv`` over synthetic results and their per-question
+detail held in memory, draining the streamed chunks, and fails when the tracemalloc peak of either
+export exceeds its budget.
+
+    $ python -m benchmarks.export_memory --results 100000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from src.core.config import settings  # noqa: E402
+from src.quizzes.manager import QUIZ_VERSION_CACHE  # noqa: E402
+from src.utils.utils_quizzes import get_quiz_csv, get_quiz_json  # noqa: E402
+
+QUESTIONS = 5
+VERSION = "v" * 64
+# The exports are streamed, so their peak must not grow with --results. Buffering the whole export,
+# e.g. in one StringIO, already takes about 50 MiB at 20k results.
+JSON_BUDGET = 16 * 1024 * 1024
+CSV_BUDGET = 16 * 1024 * 1024
+
+
+class InMemorySession:
+    """Streams the rows in QUIZ_EXPORT_BATCH_SIZE partitions, like AsyncSession.stream with yield_per."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def stream(self, query):
+        rows, size = self.rows, settings.QUIZ_EXPORT_BATCH_SIZE
+
+        async def partitions():
+            for start in range(0, len(rows), size):
+                yield rows[start:start + size]
+
+        return SimpleNamespace(partitions=partitions)
+
+
+class InMemoryRedis:
+    """Every result has its detail row, so the legacy blob fallback never finds anything."""
+
+    async def mget(self, keys):
+        return [None] * len(keys)
+
+
+def build_results(count):
+    """Results of one quiz version, which is put in the in-process version cache instead of Mongo."""
+    QUIZ_VERSION_CACHE[VERSION] = {"questions": [{"text": f"Question text {number}", "answers": ["a", "b"],
+                                                  "number": number} for number in range(1, QUESTIONS + 1)]}
+    rows = []
+    for result_id in range(1, count + 1):
+        row = SimpleNamespace(id=result_id, company_id=1, user_id=result_id % 1000, quiz_id="q" * 24,
+                              quiz_version=VERSION, questions_overall=QUESTIONS)
+        answers = {str(number): [1] for number in range(1, QUESTIONS + 1)}
+        scores = {str(number): 1.0 for number in range(1, QUESTIONS + 1)}
+        rows.append((row, answers, scores, None))
+    return rows
+
+
+async def measure(export, rows):
+    tracemalloc.start()
+    async for _ in export(query=None, db=InMemorySession(rows), mongo=None, redis=InMemoryRedis()):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def main(results):
+    rows = build_results(results)
+    failed = False
+    for name, export, budget in (("json", get_quiz_json, JSON_BUDGET), ("csv", get_quiz_csv, CSV_BUDGET)):
+        peak = await measure(export, rows)
+        status = "ok" if peak <= budget else "OVER BUDGET"
+        print(json.dumps({"export": name, "results": results, "peak_bytes": peak,
+                          "budget_bytes": budget, "status": status}))
+        failed |= peak > budget
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=100_000)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.results)) else 0)
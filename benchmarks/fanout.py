@@ -0,0 +1,79 @@
+"""
+Company-wide notification fan-out throughput.
+
+Seeds one company with --members members, fans a quiz_published notification out to all of
+them and then drains the outbox through NotificationDispatcher with an in-memory SMTP pool
+throttled to --rate-limit messages per second. Prints the fan-out progress report.
+
+    $ python -m benchmarks.fanout --database-url sqlite+aiosqlite:///bench.db --members 20000 --chunk-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.harness import Volumes, create_stand_ins, reset_schema, seed
+from benchmarks.stats import current_commit
+from src.core.config import settings
+from src.notifications.dispatcher import NotificationDispatcher
+from src.notifications.fanout import fan_out_company_notification, fanout_progress
+
+
+class NullPool:
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, message):
+        self.sent += 1
+
+    async def close(self):
+        pass
+
+
+async def main(args):
+    settings.FANOUT_CHUNK_SIZE = args.chunk_size
+    settings.NOTIFICATIONS_BATCH_SIZE = args.batch_size
+    settings.NOTIFICATIONS_RATE_LIMIT = args.rate_limit
+    stand_ins = await create_stand_ins(args.database_url)
+    await reset_schema(stand_ins)
+    await seed(stand_ins, Volumes(users=args.members, companies=1, quizzes=1, questions=2, results=0, invitations=0))
+
+    started = time.perf_counter()
+    enqueued = await fan_out_company_notification(
+        "benchmark", 1, "quiz_published", {"company_id": 1, "quiz_id": "benchmark", "quiz_name": "Benchmark"},
+        exclude_user_id=1, session_maker=stand_ins.session_maker, redis=stand_ins.redis)
+    enqueue_seconds = time.perf_counter() - started
+
+    pool = NullPool()
+    dispatcher = NotificationDispatcher(session_maker=stand_ins.session_maker, pool=pool)
+    started = time.perf_counter()
+    while pool.sent < args.deliver and await dispatcher.dispatch_batch():
+        pass
+    deliver_seconds = time.perf_counter() - started
+
+    async with stand_ins.session_maker() as db:
+        progress = await fanout_progress("benchmark", db, stand_ins.redis)
+    await stand_ins.engine.dispose()
+    print(json.dumps({
+        "commit": current_commit(),
+        "members": args.members,
+        "chunk_size": args.chunk_size,
+        "enqueued": enqueued,
+        "enqueue_seconds": enqueue_seconds,
+        "enqueued_per_second": enqueued / enqueue_seconds,
+        "delivered": pool.sent,
+        "rate_limit": args.rate_limit,
+        "delivered_per_second": pool.sent / deliver_seconds if deliver_seconds else None,
+        "progress": progress,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--members", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rate-limit", type=float, default=2000)
+    parser.add_argument("--deliver", type=int, default=5000, help="Stop draining after this many messages")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Grading throughput per question type.
+
+Builds --questions answer keys of every registered type, compiles them once the way a quiz
+version is compiled, and then times --answers calls of the matchers with a mix of right, wrong
+and (for multi_select) partially right answers. ``legacy_set_equality`` is the set comparison
+grading used before the registry, for reference.
+
+    $ python -m benchmarks.grading_throughput --answers 200000
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.environment import configure_environment
+from benchmarks.stats import current_commit
+
+configure_environment()
+
+from src.quizzes.graders import GRADERS, compile_answer_key  # noqa: E402
+
+
+def make_key(question_type, rng):
+    options = rng.sample(range(6), rng.randint(1, 3))
+    if question_type == "choice":
+        return {"type": "choice", "options": options}, [options, [options[0] + 6]]
+    if question_type == "multi_select":
+        return {"type": "multi_select", "options": options}, [options, options[:1], options + [9]]
+    if question_type == "sequence":
+        order = rng.sample(range(6), 4)
+        return {"type": "sequence", "order": order}, [order, order[::-1]]
+    if question_type == "range":
+        low = rng.uniform(0, 100)
+        return {"type": "range", "min": low, "max": low + 5}, [low + 1, low - 1, str(low + 2)]
+    if question_type == "text":
+        return ({"type": "text", "accepted": ["Mount  Everest", "everest"], "patterns": [r"mt\.? everest"]},
+                ["mount everest", " EVEREST ", "Mt. Everest", "K2"])
+    raise ValueError(question_type)
+
+
+def measure(question_type, args, rng):
+    keys, samples = {}, {}
+    for number in range(1, args.questions + 1):
+        keys[str(number)], samples[str(number)] = make_key(question_type, rng)
+    started = time.perf_counter()
+    for _ in range(args.compile_rounds):
+        matchers = compile_answer_key(keys)
+    compile_seconds = (time.perf_counter() - started) / args.compile_rounds
+
+    calls = [(matchers[number], rng.choice(samples[number]))
+             for number in rng.choices(list(keys), k=args.answers)]
+    started = time.perf_counter()
+    score = sum(match(answer) for match, answer in calls)
+    elapsed = time.perf_counter() - started
+    return {"compile_ms_per_quiz": compile_seconds * 1000,
+            "answers_per_second": args.answers / elapsed,
+            "ns_per_answer": elapsed / args.answers * 1e9,
+            "mean_score": score / args.answers}
+
+
+def measure_legacy(args, rng):
+    keys = {str(number): rng.sample(range(6), rng.randint(1, 3)) for number in range(1, args.questions + 1)}
+    calls = [(keys[number], rng.choice([keys[number], [6]])) for number in rng.choices(list(keys), k=args.answers)]
+    started = time.perf_counter()
+    score = sum(1 for key, answer in calls if set(key) == set(answer))
+    elapsed = time.perf_counter() - started
+    return {"answers_per_second": args.answers / elapsed,
+            "ns_per_answer": elapsed / args.answers * 1e9,
+            "mean_score": score / args.answers}
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    report = {"commit": current_commit(), "questions": args.questions, "answers": args.answers,
+              "types": {question_type: measure(question_type, args, rng) for question_type in GRADERS},
+              "legacy_set_equality": measure_legacy(args, rng)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=50, help="Questions per compiled quiz")
+    parser.add_argument("--answers", type=int, default=100000, help="Graded answers per question type")
+    parser.add_argument("--compile-rounds", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,260 @@
+"""
+Shared plumbing for the benchmarks: local stand-ins for Postgres, Redis and Mongo,
+wiring them into the FastAPI app and seeding synthetic data.
+"""
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from fastapi_cache import FastAPICache  # noqa: E402
+from fastapi_cache.backends.inmemory import InMemoryBackend  # noqa: E402
+from fastapi_cache.backends.redis import RedisBackend  # noqa: E402
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from src.auth.models import User  # noqa: E402
+from src.base import Base  # noqa: E402
+from src.companies.models import (Company, CompanyMember, CompanyRole, Invitation,  # noqa: E402
+                                  InvitationStatusEnum)
+from src.core import redis_config  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.core.mongo_config import get_mongo_database  # noqa: E402
+from src.core.redis_config import get_redis  # noqa: E402
+from src.database import SQLALCHEMY_DATABASE_URL, get_db_session  # noqa: E402
+from src.quizzes.models import QuizResults, QuizResultDetail  # noqa: E402
+from src.utils import utils_auth, utils_quizzes  # noqa: E402
+from src.utils.utils_auth import bcrypt_context  # noqa: E402
+from src.utils.utils_companies import COMPANY_ROLE_CACHE  # noqa: E402
+
+PASSWORD = "Benchmark1!"
+ROLES = {"owner": 1, "admin": 2, "member": 3}
+BATCH_SIZE = 5000
+
+
+@dataclass
+class StandIns:
+    engine: object
+    session_maker: sessionmaker
+    redis: object
+    mongo: object
+    description: dict = field(default_factory=dict)
+
+
+@dataclass
+class Volumes:
+    users: int = 1000
+    companies: int = 10
+    quizzes: int = 20
+    questions: int = 10
+    results: int = 10000
+    invitations: int = 100
+    seed: int = 1
+
+
+@dataclass
+class Dataset:
+    quiz_ids: dict = field(default_factory=dict)
+
+    def company_quiz(self, company_id):
+        return self.quiz_ids[company_id][0]
+
+
+async def create_stand_ins(database_url=None, redis_url=None, mongo_url=None) -> StandIns:
+    """Connect to local services where a URL is given and fall back to in-process fakes otherwise."""
+    engine = create_async_engine(database_url or SQLALCHEMY_DATABASE_URL)
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    if redis_url:
+        import redis.asyncio as aioredis
+        redis = aioredis.from_url(redis_url, decode_responses=True)
+    else:
+        from fakeredis import aioredis as fake_aioredis
+        redis = fake_aioredis.FakeRedis(decode_responses=True)
+
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo_client = AsyncIOMotorClient(mongo_url)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        mongo_client = AsyncMongoMockClient()
+    mongo = mongo_client[settings.MONGO_DB][settings.MONGO_COLLECTION]
+
+    return StandIns(engine=engine, session_maker=session_maker, redis=redis, mongo=mongo,
+                    description={"database": engine.url.render_as_string(hide_password=True),
+                                 "redis": redis_url or "fakeredis",
+                                 "mongo": mongo_url or "mongomock-motor"})
+
+
+@contextmanager
+def wire_app(app, stand_ins: StandIns):
+    """
+    Point the app's dependencies and module level clients at the stand-ins for the duration of
+    the block; the overrides, module globals and FastAPICache setup it replaced are put back on exit.
+    """
+
+    async def db_session_override():
+        async with stand_ins.session_maker() as session:
+            yield session
+
+    async def mongo_override():
+        return stand_ins.mongo
+
+    async def redis_override():
+        return stand_ins.redis
+
+    module_clients = {
+        (redis_config, "redis"): stand_ins.redis,
+        # token checks read User.is_deleted outside the request session
+        (utils_auth, "async_session"): stand_ins.session_maker,
+        # streamed result exports open their own session
+        (utils_quizzes, "async_session"): stand_ins.session_maker,
+    }
+    overrides = dict(app.dependency_overrides)
+    replaced = {target: getattr(*target) for target in module_clients}
+    cache_setup = {name: getattr(FastAPICache, name) for name in FastAPICache.__annotations__}
+
+    app.dependency_overrides[get_db_session] = db_session_override
+    app.dependency_overrides[get_mongo_database] = mongo_override
+    app.dependency_overrides[get_redis] = redis_override
+    for (module, name), value in module_clients.items():
+        setattr(module, name, value)
+    # init is a no-op once initialised, so a cache wired for an earlier stand-in would be kept
+    FastAPICache.reset()
+    if stand_ins.description["redis"] == "fakeredis":
+        FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
+    else:
+        import redis.asyncio as aioredis
+        FastAPICache.init(RedisBackend(aioredis.from_url(stand_ins.description["redis"])), prefix="fastapi-cache")
+    try:
+        yield app
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+        for (module, name), value in replaced.items():
+            setattr(module, name, value)
+        for name, value in cache_setup.items():
+            setattr(FastAPICache, name, value)
+
+
+async def reset_schema(stand_ins: StandIns):
+    """Drop and recreate every table; only ever point this at a throwaway database."""
+    async with stand_ins.engine.begin() as conn:
+        if stand_ins.engine.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await stand_ins.mongo.delete_many({})
+    await stand_ins.redis.flushdb()
+    COMPANY_ROLE_CACHE.clear()
+
+
+def username(user_id):
+    return f"user{user_id:06d}"
+
+
+async def _insert_batches(conn, model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def build_quiz(company_id, owner_id, index, questions):
+    return {
+        "name": f"Quiz {index}",
+        "description": f"Synthetic quiz {index} of company {company_id}",
+        "questions": [{"text": f"Question {number}", "answers": ["a", "b", "c", "d"], "number": number}
+                      for number in range(1, questions + 1)],
+        "created_at": "2024-09-01",
+        "correct_answers": {str(number): [0] for number in range(1, questions + 1)},
+        "company_id": company_id,
+        "created_by_user_id": owner_id,
+    }
+
+
+async def seed(stand_ins: StandIns, volumes: Volumes) -> Dataset:
+    """
+    Seed users, companies and memberships in Postgres, quizzes in Mongo and quiz results with
+    their per-question detail in Postgres. User ``c`` owns company ``c``; every other user is
+    a member of company ``(user_id - 1) % companies + 1``.
+    """
+    rng = random.Random(volumes.seed)
+    dataset = Dataset()
+    hashed_password = bcrypt_context.hash(PASSWORD)
+    companies = min(volumes.companies, volumes.users)
+
+    users = [{"id": user_id, "username": username(user_id), "email": f"{username(user_id)}@example.com",
+              "hashed_password": hashed_password, "is_verified": True, "is_active": True,
+              "is_superuser": False, "is_deleted": False, "is_staff": False}
+             for user_id in range(1, volumes.users + 1)]
+    members = [{"user_id": user_id, "company_id": (user_id - 1) % companies + 1,
+                "role": ROLES["owner"] if user_id <= companies else ROLES["member"]}
+               for user_id in range(1, volumes.users + 1)]
+    invitations = [{"sender_user_id": company_id, "receiver_user_id": rng.randint(1, volumes.users),
+                    "company_id": company_id, "status": InvitationStatusEnum.INPROCESS.value, "is_active": True}
+                   for company_id in (rng.randint(1, companies) for _ in range(volumes.invitations))]
+
+    async with stand_ins.engine.begin() as conn:
+        await conn.execute(insert(CompanyRole), [{"id": role_id, "name": name} for name, role_id in ROLES.items()])
+        await _insert_batches(conn, User, users)
+        await _insert_batches(conn, Company, [{"id": company_id, "name": f"Company {company_id}",
+                                               "description": "Synthetic company", "is_private": False}
+                                              for company_id in range(1, companies + 1)])
+        await _insert_batches(conn, CompanyMember, members)
+        await _insert_batches(conn, Invitation, invitations)
+
+    quizzes = [build_quiz(index % companies + 1, index % companies + 1, index, volumes.questions)
+               for index in range(max(volumes.quizzes, companies))]
+    inserted = await stand_ins.mongo.insert_many(quizzes)
+    for quiz, quiz_id in zip(quizzes, inserted.inserted_ids):
+        dataset.quiz_ids.setdefault(quiz["company_id"], []).append(str(quiz_id))
+
+    results, details = [], []
+    for result_id in range(1, volumes.results + 1):
+        user_id = rng.randint(1, volumes.users)
+        company_id = (user_id - 1) % companies + 1
+        quiz_id = rng.choice(dataset.quiz_ids[company_id])
+        answers = {str(number): [rng.randint(0, 3)] for number in range(1, volumes.questions + 1)}
+        scores = {number: float(answer == [0]) for number, answer in answers.items()}
+        results.append({"id": result_id, "quiz_id": quiz_id, "user_id": user_id, "company_id": company_id,
+                        "result": sum(scores.values()), "questions_overall": volumes.questions})
+        details.append({"result_id": result_id, "answers": answers, "scores": scores})
+
+    async with stand_ins.engine.begin() as conn:
+        await _insert_batches(conn, QuizResults, results)
+        await _insert_batches(conn, QuizResultDetail, details)
+    if stand_ins.engine.dialect.name == "postgresql":
+        async with stand_ins.engine.begin() as conn:
+            for table in ("user", "company", "company_member", "invitation", "quiz_result"):
+                await conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))")
+    return dataset
+
+
+async def run_scenario(send_request, requests, concurrency):
+    """
+    Issue ``requests`` calls of ``send_request(index)`` from ``concurrency`` workers.
+
+    :return: latencies in seconds, wall time in seconds and the number of non-2xx responses.
+    """
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            response = await send_request(index)
+            latencies.append(time.perf_counter() - started)
+            if not 200 <= response.status_code < 300:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started, errors
@@ -0,0 +1,92 @@
+"""
+Notification dispatcher throughput against a local aiosmtpd server.
+
+Fills the outbox with --messages rows and measures how fast NotificationDispatcher drains it
+through its pooled SMTP connections. --fail-every makes the server reject every Nth message
+with a transient error to exercise the retry path.
+
+    $ python -m benchmarks.notifications_smtp --database-url sqlite+aiosqlite:///bench.db --messages 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from aiosmtpd.controller import Controller
+from sqlalchemy import func, insert, select
+
+from benchmarks.harness import Volumes, create_stand_ins, reset_schema, seed
+from benchmarks.stats import current_commit
+from src.core.config import settings
+from src.notifications.dispatcher import NotificationDispatcher, SMTPConnectionPool
+from src.notifications.models import NotificationOutbox, NotificationStatusEnum
+
+
+class CountingHandler:
+    def __init__(self, fail_every):
+        self.fail_every = fail_every
+        self.received = 0
+        self.rejected = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_every and (self.received + self.rejected + 1) % self.fail_every == 0:
+            self.rejected += 1
+            return "451 Try again later"
+        self.received += 1
+        return "250 OK"
+
+
+async def main(args):
+    settings.NOTIFICATIONS_BATCH_SIZE = args.batch_size
+    settings.NOTIFICATIONS_BACKOFF_SECONDS = 0
+    settings.NOTIFICATIONS_RATE_LIMIT = args.rate_limit
+    stand_ins = await create_stand_ins(args.database_url)
+    await reset_schema(stand_ins)
+    await seed(stand_ins, Volumes(users=args.users, companies=1, quizzes=1, questions=2, results=0, invitations=0))
+    async with stand_ins.engine.begin() as conn:
+        await conn.execute(insert(NotificationOutbox), [
+            {"recipient_user_id": index % args.users + 1, "kind": "quiz_result",
+             "payload": {"quiz_id": "benchmark", "result": 1, "questions_overall": 2}}
+            for index in range(args.messages)])
+
+    handler = CountingHandler(args.fail_every)
+    controller = Controller(handler, hostname="127.0.0.1", port=args.smtp_port)
+    controller.start()
+    pool = SMTPConnectionPool("127.0.0.1", args.smtp_port, None, None, False, args.pool_size)
+    dispatcher = NotificationDispatcher(session_maker=stand_ins.session_maker, pool=pool)
+
+    started = time.perf_counter()
+    while await dispatcher.dispatch_batch():
+        pass
+    elapsed = time.perf_counter() - started
+    await pool.close()
+    controller.stop()
+
+    async with stand_ins.session_maker() as db:
+        pending = await db.scalar(select(func.count()).select_from(NotificationOutbox).where(
+            NotificationOutbox.status != NotificationStatusEnum.SENT.value))
+    await stand_ins.engine.dispose()
+    print(json.dumps({
+        "commit": current_commit(),
+        "messages": args.messages,
+        "delivered": handler.received,
+        "rejected_and_retried": handler.rejected,
+        "not_sent": pending,
+        "batch_size": args.batch_size,
+        "pool_size": args.pool_size,
+        "seconds": elapsed,
+        "messages_per_second": handler.received / elapsed,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Messages per second, 0 for unlimited")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,145 @@
+"""
+Replay traces recorded by TrafficCaptureMiddleware against a test instance.
+
+Requests are reissued at their recorded offsets divided by --speed (0 replays as fast as
+--concurrency allows). Synthetic user ids from the trace become ``user<id>`` accounts, so seed
+the test instance with benchmarks.datagen using at least TRAFFIC_CAPTURE_SYNTHETIC_USERS users
+and the same SECRET_KEY. The report compares replayed and recorded latencies per route.
+
+    $ python -m benchmarks.replay traces.ndjson --base-url http://localhost:8000 --speed 4 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.harness import PASSWORD, username
+from benchmarks.stats import current_commit, summarize
+from src.utils.utils_auth import create_access_token
+
+
+def load_traces(path, limit=None):
+    traces = []
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                traces.append(json.loads(line))
+            if limit and len(traces) >= limit:
+                break
+    traces.sort(key=lambda trace: trace["ts"])
+    return traces
+
+
+def restore_identity(params):
+    """Swap synthetic user ids back into concrete usernames and credentials."""
+    restored = dict(params)
+    if "username" in restored:
+        restored["username"] = username(restored["username"])
+    if "password" in restored:
+        restored["password"] = PASSWORD
+    return restored
+
+
+def build_request(trace, tokens):
+    url = trace["route"].format(**trace["path_params"])
+    request = {"method": trace["method"], "url": url, "params": trace["query"] or None, "headers": {}}
+    if trace["user"] is not None:
+        if trace["user"] not in tokens:
+            tokens[trace["user"]] = create_access_token(user_id=trace["user"], username=username(trace["user"]))
+        request["headers"]["Authorization"] = f"Bearer {tokens[trace['user']]}"
+    body = trace.get("body")
+    if isinstance(body, dict) and "form" in body:
+        request["data"] = restore_identity(body["form"])
+    elif body is not None:
+        request["json"] = body
+    return request
+
+
+async def replay(traces, base_url, speed, concurrency, timeout):
+    tokens = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses, lags = defaultdict(list), defaultdict(lambda: defaultdict(int)), []
+    origin = traces[0]["ts"]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        started = time.perf_counter()
+
+        async def issue(trace):
+            due = (trace["ts"] - origin) / speed if speed else 0
+            delay = due - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with semaphore:
+                lags.append(max(0.0, time.perf_counter() - started - due))
+                route = f"{trace['method']} {trace['route']}"
+                sent = time.perf_counter()
+                try:
+                    response = await client.request(**build_request(trace, tokens))
+                    statuses[route][response.status_code] += 1
+                except httpx.HTTPError as error:
+                    statuses[route][type(error).__name__] += 1
+                latencies[route].append(time.perf_counter() - sent)
+
+        await asyncio.gather(*(issue(trace) for trace in traces))
+        wall_time = time.perf_counter() - started
+
+    recorded = defaultdict(list)
+    recorded_status = defaultdict(lambda: defaultdict(int))
+    for trace in traces:
+        route = f"{trace['method']} {trace['route']}"
+        recorded[route].append(trace["duration_ms"] / 1000)
+        recorded_status[route][trace["status"]] += 1
+
+    routes = {}
+    for route in sorted(latencies):
+        replayed = summarize(latencies[route], wall_time)
+        original = summarize(recorded[route])
+        routes[route] = {
+            "replayed": replayed,
+            "recorded": original,
+            "p95_ratio": replayed["p95_ms"] / original["p95_ms"] if original["p95_ms"] else None,
+            "replayed_status": dict(statuses[route]),
+            "recorded_status": dict(recorded_status[route]),
+        }
+    return {
+        "commit": current_commit(),
+        "requests": len(traces),
+        "speed": speed,
+        "concurrency": concurrency,
+        "wall_time_s": wall_time,
+        "schedule_lag": summarize(lags),
+        "routes": routes,
+    }
+
+
+def main(args):
+    traces = load_traces(args.traces, args.limit)
+    if not traces:
+        sys.exit("No traces to replay")
+    report = asyncio.run(replay(traces, args.base_url, args.speed, args.concurrency, args.timeout))
+    for route, stats in report["routes"].items():
+        print(f"{route}: p95 {stats['recorded']['p95_ms']:.1f}ms recorded, "
+              f"{stats['replayed']['p95_ms']:.1f}ms replayed", file=sys.stderr)
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier, 0 for no pacing")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--limit", type=int, help="Replay only the first N traces")
+    parser.add_argument("--output")
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+"""
+Company and user search latency over a large Postgres dataset.
+
+Expects a database loaded by benchmarks.datagen (at least a million users for meaningful
+numbers) with the pg_trgm indexes from ``alembic upgrade head``. Issues --queries random
+prefix and fuzzy searches per target through the search services and reports latency, plus
+the EXPLAIN plan of one query per target to confirm the GIN indexes are used.
+
+    $ python -m benchmarks.datagen --users 1000000 --companies 20000 --results 0 --skip-details
+    $ python -m benchmarks.search --queries 500 --output search.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from sqlalchemy import func, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from benchmarks.harness import username  # noqa: E402
+from benchmarks.stats import current_commit, summarize  # noqa: E402
+from src.auth.models import User  # noqa: E402
+from src.auth.services import search_users_service  # noqa: E402
+from src.companies.models import Company  # noqa: E402
+from src.companies.services import search_companies_service  # noqa: E402
+from src.database import SQLALCHEMY_DATABASE_URL  # noqa: E402
+from src.utils.utils_search import keyset_search  # noqa: E402
+
+
+def typo(value, rng):
+    index = rng.randrange(len(value))
+    return value[:index] + value[index + 1:]
+
+
+def user_term(mode, rng, users):
+    name = username(rng.randint(1, users))
+    return name[:rng.randint(6, 9)] if mode == "prefix" else typo(name, rng)
+
+
+def company_term(mode, rng, companies):
+    name = f"Company {rng.randint(1, companies)}"
+    return name[:rng.randint(9, len(name))] if mode == "prefix" else typo(name, rng)
+
+
+async def explain(session_maker, query):
+    async with session_maker() as db:
+        compiled = query.compile(db.bind, compile_kwargs={"literal_binds": True})
+        result = await db.execute(text(f"EXPLAIN {compiled}"))
+        return "\n".join(row[0] for row in result.all())
+
+
+async def main(args):
+    engine = create_async_engine(args.database_url or SQLALCHEMY_DATABASE_URL, pool_size=args.concurrency)
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as db:
+        users = await db.scalar(select(func.max(User.id)))
+        companies = await db.scalar(select(func.max(Company.id)))
+    rng = random.Random(args.seed)
+    targets = {
+        "users": (search_users_service, lambda mode: user_term(mode, rng, users)),
+        "companies": (search_companies_service, lambda mode: company_term(mode, rng, companies)),
+    }
+
+    report = {"commit": current_commit(), "users": users, "companies": companies, "scenarios": {}, "plans": {}}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    for target, (service, term) in targets.items():
+        for mode in ("prefix", "fuzzy"):
+            latencies, errors = [], 0
+
+            async def search(q):
+                nonlocal errors
+                async with semaphore, session_maker() as db:
+                    started = time.perf_counter()
+                    try:
+                        await service(q, mode, None, args.limit, db)
+                    except Exception as e:
+                        errors += 1
+                        print(f"{target} {mode} {q!r}: {e!r}", file=sys.stderr)
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(search(term(mode)) for _ in range(args.queries)))
+            name = f"{target}_{mode}"
+            report["scenarios"][name] = summarize(latencies, time.perf_counter() - started, errors)
+            print(f"{name}: {json.dumps(report['scenarios'][name])}", file=sys.stderr)
+
+    report["plans"]["users_fuzzy"] = await explain(session_maker, keyset_search(
+        select(User.id, User.username, User.email), User.id, [User.username, User.email],
+        user_term("fuzzy", rng, users), "fuzzy", None, args.limit))
+    report["plans"]["companies_prefix"] = await explain(session_maker, keyset_search(
+        select(Company.id, Company.name), Company.id, [Company.name],
+        company_term("prefix", rng, companies), "prefix", None, args.limit))
+    await engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,32 @@
+import math
+import subprocess
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, wall_time=None, errors=0):
+    """Latency summary in milliseconds; ``latencies`` are seconds."""
+    values = sorted(latency * 1000 for latency in latencies)
+    summary = {
+        "requests": len(values),
+        "errors": errors,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else None,
+    }
+    if wall_time:
+        summary["throughput_rps"] = len(values) / wall_time
+    return summary
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
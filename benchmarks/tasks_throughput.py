@@ -0,0 +1,85 @@
+"""
+Task queue throughput on one core.
+
+Enqueues --tasks no-op calls and measures how fast a single Worker runs them with the given
+--concurrency. --fail-every makes every Nth call raise once to exercise the retry path. Uses an
+in-process fake Redis unless --redis-url points at a server; the fake understates throughput
+since it skips the network round trips.
+
+    $ python -m benchmarks.tasks_throughput --tasks 20000 --concurrency 50 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.environment import configure_environment
+from benchmarks.stats import current_commit
+
+configure_environment()
+
+from src.core.config import settings  # noqa: E402
+from src.tasks.queue import task  # noqa: E402
+from src.tasks.worker import Worker  # noqa: E402
+
+QUEUE = "benchmark"
+calls = {"done": 0, "failed": set()}
+
+
+@task("benchmark.noop", queue=QUEUE, retry_delay=0)
+async def noop(index, fail_every):
+    if fail_every and index % fail_every == 0 and index not in calls["failed"]:
+        calls["failed"].add(index)
+        raise RuntimeError("planned failure")
+    calls["done"] += 1
+
+
+async def connect(redis_url):
+    if redis_url:
+        import redis.asyncio as aioredis
+        return aioredis.from_url(redis_url, decode_responses=True)
+    from fakeredis import aioredis
+    return aioredis.FakeRedis(decode_responses=True)
+
+
+async def main(args):
+    settings.TASKS_SCHEDULE_POLL_INTERVAL = 0.05
+    redis = await connect(args.redis_url)
+    await redis.flushdb()
+
+    started = time.perf_counter()
+    for offset in range(0, args.tasks, 1000):
+        async with redis.pipeline(transaction=False) as pipe:
+            for index in range(offset, min(offset + 1000, args.tasks)):
+                pipe.xadd(f"tasks:{QUEUE}:normal", noop.message([index, args.fail_every], {}))
+            await pipe.execute()
+    enqueue_seconds = time.perf_counter() - started
+
+    worker = Worker({QUEUE: args.concurrency}, redis=redis, consumer="benchmark")
+    started = time.perf_counter()
+    runner = asyncio.create_task(worker.run())
+    while calls["done"] < args.tasks and not runner.done():
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    runner.cancel()
+    await redis.close()
+    print(json.dumps({
+        "commit": current_commit(),
+        "tasks": args.tasks,
+        "concurrency": args.concurrency,
+        "redis": args.redis_url or "fakeredis",
+        "enqueued_per_second": args.tasks / enqueue_seconds,
+        "completed": calls["done"],
+        "retried": len(calls["failed"]),
+        "seconds": elapsed,
+        "tasks_per_second": calls["done"] / elapsed,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--redis-url")
+    asyncio.run(main(parser.parse_args()))
@@ -27,8 +27,6 @@ async def seed_all():
 
     async with AsyncSessionLocal() as session:
         await seed_roles(session)
-        await seed_invitation_status(session)
-        await seed_invitation_types(session)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import delete, or_, select
+
+from src.companies.models import CompanyMember, Invitation, Application
+from src.companies.services import members_count_key
+from src.core.config import settings
+from src.core.redis_config import get_redis
+from src.database import async_session
+from src.notifications.models import NotificationOutbox
+from src.tasks.queue import task
+
+logger = logging.getLogger(__name__)
+
+
+def dependent_rows(user_id):
+    """(name, model, filter) of every row a deleted user leaves behind; quiz results are kept for the companies."""
+    return (
+        ("members", CompanyMember, CompanyMember.user_id == user_id),
+        ("invitations", Invitation, or_(Invitation.sender_user_id == user_id,
+                                        Invitation.receiver_user_id == user_id)),
+        ("applications", Application, Application.sender_user_id == user_id),
+        ("notifications", NotificationOutbox, NotificationOutbox.recipient_user_id == user_id),
+    )
+
+
+class CleanupDeadline(Exception):
+    pass
+
+
+async def delete_batches(model, where, session_maker, redis, deadline):
+    """Delete matching rows USER_CLEANUP_BATCH_SIZE at a time, each batch in its own short transaction."""
+    deleted = 0
+    while True:
+        if time.monotonic() > deadline:
+            raise CleanupDeadline()
+        batch = select(model.id).where(where).limit(settings.USER_CLEANUP_BATCH_SIZE)
+        statement = delete(model).where(model.id.in_(batch.scalar_subquery()))
+        async with session_maker() as db:
+            if model is CompanyMember:
+                company_ids = (await db.execute(statement.returning(CompanyMember.company_id))).scalars().all()
+                rowcount = len(company_ids)
+            else:
+                company_ids, rowcount = (), (await db.execute(statement)).rowcount
+            await db.commit()
+        if company_ids:
+            await redis.delete(*{members_count_key(company_id) for company_id in company_ids})
+        deleted += rowcount
+        if rowcount < settings.USER_CLEANUP_BATCH_SIZE:
+            return deleted
+        await asyncio.sleep(settings.USER_CLEANUP_BATCH_PAUSE)
+
+
+@task("auth.cleanup_user", queue="default")
+async def cleanup_user(user_id, session_maker=async_session, redis=None):
+    """
+    Remove the memberships, invitations, applications and outbox rows of a soft-deleted user.
+    Every batch is idempotent, so a run past half the visibility timeout just queues its continuation.
+    """
+    redis = redis or await get_redis()
+    deadline = time.monotonic() + settings.TASKS_VISIBILITY_TIMEOUT / 2
+    deleted = {}
+    try:
+        for name, model, where in dependent_rows(user_id):
+            deleted[name] = await delete_batches(model, where, session_maker, redis, deadline)
+    except CleanupDeadline:
+        logger.info(f"User {user_id} cleanup paused after {deleted}, continuing later")
+        await cleanup_user.enqueue(user_id, priority="low", redis=redis)
+        return
+    logger.info(f"User {user_id} cleanup finished: {deleted}")
+
+
+async def start_user_cleanup(user_id, redis=None):
+    await cleanup_user.enqueue(user_id, priority="low", redis=redis)
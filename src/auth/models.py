@@ -1,12 +1,17 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, false
 
 from src.base import Base
 
 
 class User(Base):
     __tablename__ = 'user'
+    __table_args__ = (
+        Index('ix_user_username_trgm', 'username', postgresql_using='gin',
+              postgresql_ops={'username': 'gin_trgm_ops'}),
+        Index('ix_user_email_trgm', 'email', postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True)
     username = Column(String(20), unique=True, nullable=False)
@@ -15,6 +20,6 @@ class User(Base):
     is_verified = Column(Boolean(), default=False)
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
-    is_deleted = Column(Boolean(), default=False)
+    is_deleted = Column(Boolean(), nullable=False, default=False, server_default=false())
     is_staff = Column(Boolean(), default=False)
     registration_date = Column(DateTime(), default=datetime.utcnow)
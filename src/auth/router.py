@@ -1,8 +1,9 @@
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
 from fastapi import (APIRouter,
                      Depends,
                      HTTPException,
+                     Query,
                      status, )
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_pagination.links import Page
@@ -14,8 +15,9 @@ from starlette.responses import JSONResponse
 from src.auth.models import User
 from src.auth.schemas import (UserCreate,
                               UserUpdateRequestModel,
-                              UserPasswordUpdateRequestModel, Token, UserRead, )
+                              UserPasswordUpdateRequestModel, Token, UserRead, UserSearchPage, )
 from src.auth.services import (
+                               search_users_service,
                                create_user_service,
                                delete_user_service,
                                get_user_by_id_service,
@@ -32,7 +34,7 @@ router = APIRouter(
 
 @router.get("/users",response_model=Page[UserRead])
 async def get_users(db: AsyncSession = Depends(get_db_session)):
-    return await paginate(db, select(User).order_by(User.registration_date))
+    return await paginate(db, select(User).where(User.is_deleted == False).order_by(User.registration_date))
 
 
 @router.post("/users/register")
@@ -53,6 +55,25 @@ async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm,
     return {"access_token": token, 'token_type': "bearer"}
 
 
+@router.get("/users/search", response_model=UserSearchPage)
+async def search_users(user: Annotated[dict, Depends(get_current_user)],
+                       q: str = Query(min_length=3, max_length=50),
+                       mode: Literal["prefix", "fuzzy"] = "prefix",
+                       after: Optional[str] = None,
+                       limit: int = Query(default=20, ge=1, le=100),
+                       db: AsyncSession = Depends(get_db_session)):
+    """
+    Search users by username or email.
+
+    :param q: The search text, at least three characters so the trigram index applies.
+    :param mode: prefix for starts-with matching, fuzzy for similarity ranked matches.
+    :param after: The next_cursor of the previous page.
+    :param limit: The page size.
+    :return: Matching users and the next page cursor.
+    """
+    return await search_users_service(q, mode, after, limit, db)
+
+
 @router.get("/users/{user_id}")
 async def get_direct_user_by_id(user_id: int, db: AsyncSession = Depends(get_db_session)):
     return await get_user_by_id_service(user_id, db)
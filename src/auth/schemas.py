@@ -27,6 +27,11 @@ class UserPasswordUpdateRequestModel(BaseModel):
 class UserListResponseModel(BaseModel):
     users: List[UserRead]
 
+class UserSearchPage(BaseModel):
+    items: List[UserRead]
+    next_cursor: str | None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
\ No newline at end of file
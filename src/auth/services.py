@@ -1,19 +1,23 @@
 import logging
 from fastapi import status, HTTPException
 from fastapi.params import Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cleanup import start_user_cleanup
 from src.auth.models import User
 from src.auth.schemas import UserRead
+from src.companies.models import CompanyMember
+from src.companies.services import invalidate_members_count
 from src.database import get_db_session
-from src.utils.utils_auth import bcrypt_context, Validation
+from src.utils.utils_auth import bcrypt_context, Validation, revoke_user_tokens
+from src.utils.utils_search import keyset_search, search_page
 
 logger = logging.getLogger(__name__)
 
 async def get_all_users_service(db: AsyncSession):
     try:
-        result = await db.execute(select(User.id, User.username, User.email))
+        result = await db.execute(select(User.id, User.username, User.email).where(User.is_deleted == False))
         all_users = [UserRead(id=user[0], username=user[1], email=user[2]) for user in result.all()]
         return all_users
     except Exception as e:
@@ -23,9 +27,17 @@ async def get_all_users_service(db: AsyncSession):
         )
 
 
+async def search_users_service(q: str, mode: str, after, limit: int, db: AsyncSession):
+    query = keyset_search(select(User.id, User.username, User.email).where(User.is_deleted == False),
+                          User.id, [User.username, User.email], q, mode, after, limit)
+    result = await db.execute(query)
+    return search_page(result.all(), limit, lambda user: UserRead(id=user.id, username=user.username,
+                                                                  email=user.email))
+
+
 async def get_user_by_id_service(user_id: int, db: AsyncSession):
     try:
-        result = await db.execute(select(User).where(User.id == user_id))
+        result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
         user = result.scalar_one_or_none()
         if user is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -63,7 +75,7 @@ async def create_user_service(user_to_create, db: AsyncSession = Depends(get_db_
 
 async def update_user_service(user_id: int, user_update_request, db: AsyncSession = Depends(get_db_session), ):
     try:
-        result = await db.execute(select(User).where(User.id == user_id))
+        result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
         user = result.scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -88,24 +100,35 @@ async def update_user_service(user_id: int, user_update_request, db: AsyncSessio
 
 
 async def delete_user_service(user: dict, db: AsyncSession):
-    try:
-        result = await db.execute(select(User).where(User.id == user.get("id")))
-        user = result.scalar_one_or_none()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-        await db.delete(user)
-        await db.commit()
-        logger.info(f"User with ID {user.id} deleted")
-        return user
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
+    """
+    Soft-delete the account: a single-row update that frees the username and email, then the
+    user's tokens are revoked and memberships, invitations, applications and pending mail are
+    removed by the auth.cleanup_user task in small batches. The member counts of the user's
+    companies are dropped right away, since they only count members who are not deleted.
+    """
+    user_id = user.get("id")
+    result = await db.execute(update(User)
+                              .where(User.id == user_id, User.is_deleted == False)
+                              .values(is_deleted=True, is_active=False,
+                                      username=f"deleted_{user_id}",
+                                      email=f"deleted_{user_id}@deleted.invalid")
+                              .returning(User))
+    deleted_user = result.scalar_one_or_none()
+    if deleted_user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    company_ids = (await db.execute(select(CompanyMember.company_id)
+                                    .where(CompanyMember.user_id == user_id))).scalars().all()
+    await db.commit()
+    for company_id in company_ids:
+        await invalidate_members_count(company_id)
+    await revoke_user_tokens(user_id)
+    await start_user_cleanup(user_id)
+    logger.info(f"User with ID {user_id} deleted")
+    return deleted_user
 
 
 async def user_update_password_service(user_id: int, user_new_password_request, db: AsyncSession):
-    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    user = (await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))).scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
 
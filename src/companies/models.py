@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 
 from src.base import Base
 
@@ -12,16 +12,26 @@ class InvitationStatusEnum(Enum):
 
 class Company(Base):
     __tablename__ = 'company'
+    __table_args__ = (
+        Index('ix_company_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(50), unique=True, nullable=False)
     description = Column(String(255), nullable=True)
     is_private = Column(Boolean, nullable=False, default=False)
     registration_date = Column(DateTime(), default=datetime.utcnow)
+    # set on deletion; the row goes away once the background purge has removed the tenant's data
+    is_deleted = Column(Boolean, nullable=False, default=False, server_default='false')
 
 
 class CompanyMember(Base):
     __tablename__ = 'company_member'
+    __table_args__ = (
+        Index('ix_company_member_company_id_id', 'company_id', 'id'),
+        Index('ix_company_member_company_id_role_id', 'company_id', 'role', 'id'),
+        UniqueConstraint('company_id', 'user_id', name='uq_company_member_company_id_user_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'))
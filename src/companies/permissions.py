@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.companies.models import (CompanyMember, Invitation, Application, CompanyRole)
+from src.companies.models import (Company, CompanyMember, Invitation, Application, CompanyRole)
 from src.database import get_db_session
 from src.utils.utils_auth import get_current_user
 
@@ -12,8 +12,10 @@ async def is_company_admin(company_id: int, user: dict = Depends(get_current_use
     query = (
         select(CompanyMember)
         .join(CompanyRole, CompanyMember.role == CompanyRole.id)
+        .join(Company, CompanyMember.company_id == Company.id)
         .where(
             CompanyMember.company_id == company_id,
+            Company.is_deleted == False,
             CompanyMember.user_id == user.get("id"),
             CompanyRole.name.in_(["owner", "admin"])
         )
@@ -34,8 +36,10 @@ async def is_company_owner(company_id: int, user: dict = Depends(get_current_use
     query = (
         select(CompanyMember)
         .join(CompanyRole, CompanyMember.role == CompanyRole.id)
+        .join(Company, CompanyMember.company_id == Company.id)
         .where(
             CompanyMember.company_id == company_id,
+            Company.is_deleted == False,
             CompanyMember.user_id == user.get("id"),
             CompanyRole.name.in_(["owner"])
         )
@@ -56,8 +60,10 @@ async def is_company_member(company_id: int, user: dict = Depends(get_current_us
     query = (
         select(CompanyMember)
         .join(CompanyRole, CompanyMember.role == CompanyRole.id)
+        .join(Company, CompanyMember.company_id == Company.id)
         .where(
             CompanyMember.company_id == company_id,
+            Company.is_deleted == False,
             CompanyMember.user_id == user.get("id"),
             CompanyRole.name.in_(["owner", "admin", "member"])
         )
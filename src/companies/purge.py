@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import delete, select
+
+from src.companies.models import Company, CompanyMember, Invitation, Application
+from src.core.config import settings
+from src.core.mongo_config import get_mongo_database
+from src.core.redis_config import get_redis
+from src.database import async_session
+from src.quizzes.models import QuizResults
+from src.tasks.queue import task
+
+logger = logging.getLogger(__name__)
+
+# tables with a company_id column, purged in batches before the company row itself
+BATCHED_TABLES = (("quiz_results", QuizResults), ("members", CompanyMember),
+                  ("invitations", Invitation), ("applications", Application))
+
+
+def purge_key(company_id):
+    return f"company_purge:{company_id}"
+
+
+class PurgeDeadline(Exception):
+    pass
+
+
+class CompanyPurge:
+    """
+    Removes everything a deleted company left behind, one idempotent step at a time.
+
+    Progress and the Redis SCAN cursor live in the ``company_purge:<id>`` hash, so a purge
+    that crashed or ran out of time continues from the current step.
+    """
+
+    def __init__(self, company_id, session_maker, redis, mongo, deadline):
+        self.company_id = company_id
+        self.session_maker = session_maker
+        self.redis = redis
+        self.mongo = mongo
+        self.deadline = deadline
+        self.key = purge_key(company_id)
+
+    def check_deadline(self):
+        if time.monotonic() > self.deadline:
+            raise PurgeDeadline()
+
+    async def delete_batches(self, name, model):
+        while True:
+            self.check_deadline()
+            batch = select(model.id).where(model.company_id == self.company_id).limit(
+                settings.COMPANY_PURGE_BATCH_SIZE)
+            async with self.session_maker() as db:
+                result = await db.execute(delete(model).where(model.id.in_(batch.scalar_subquery())))
+                await db.commit()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self.key, name, result.rowcount)
+                pipe.hset(self.key, "updated_at", time.time())
+                await pipe.execute()
+            if result.rowcount < settings.COMPANY_PURGE_BATCH_SIZE:
+                return
+            await asyncio.sleep(settings.COMPANY_PURGE_BATCH_PAUSE)
+
+    async def delete_quizzes(self):
+        result = await self.mongo.delete_many({"company_id": self.company_id})
+        await self.redis.hincrby(self.key, "quizzes", result.deleted_count)
+        result = await self.mongo.database[settings.MONGO_VERSIONS_COLLECTION].delete_many(
+            {"company_id": self.company_id})
+        await self.redis.hincrby(self.key, "quiz_versions", result.deleted_count)
+        result = await self.mongo.database[settings.MONGO_QUESTION_BANK_COLLECTION].delete_many(
+            {"company_id": self.company_id})
+        await self.redis.hincrby(self.key, "bank_questions", result.deleted_count)
+
+    async def delete_redis_keys(self):
+        cursor = int(await self.redis.hget(self.key, "scan_cursor") or 0)
+        while True:
+            self.check_deadline()
+            cursor, keys = await self.redis.scan(cursor, match=f"Company {self.company_id} *", count=1000)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if keys:
+                    pipe.unlink(*keys)
+                    pipe.hincrby(self.key, "redis_keys", len(keys))
+                pipe.hset(self.key, "scan_cursor", cursor)
+                await pipe.execute()
+            if cursor == 0:
+                return
+
+    async def delete_company(self):
+        async with self.session_maker() as db:
+            await db.execute(delete(Company).where(Company.id == self.company_id, Company.is_deleted == True))
+            await db.commit()
+        await self.redis.delete(f"company_members_count:{self.company_id}")
+
+    async def run(self):
+        steps = [(name, lambda name=name, model=model: self.delete_batches(name, model))
+                 for name, model in BATCHED_TABLES]
+        steps += [("quizzes", self.delete_quizzes), ("redis_keys", self.delete_redis_keys),
+                  ("company", self.delete_company)]
+        done = int(await self.redis.hget(self.key, "steps_done") or 0)
+        for index, (name, step) in enumerate(steps[done:], start=done):
+            await self.redis.hset(self.key, mapping={"step": name, "updated_at": time.time()})
+            await step()
+            await self.redis.hset(self.key, "steps_done", index + 1)
+        await self.redis.hset(self.key, mapping={"status": "done", "step": "", "finished_at": time.time()})
+
+
+@task("companies.purge", queue="default")
+async def purge_company(company_id, session_maker=async_session, redis=None, mongo=None):
+    """
+    Purge a company marked as deleted. A run stops at half the visibility timeout and queues
+    its own continuation, so big tenants never hold a worker slot past the reclaim window.
+    """
+    redis = redis or await get_redis()
+    progress = await redis.hgetall(purge_key(company_id))
+    if progress.get("status") == "done":
+        return
+    purge = CompanyPurge(company_id, session_maker, redis, mongo or await get_mongo_database(),
+                         time.monotonic() + settings.TASKS_VISIBILITY_TIMEOUT / 2)
+    try:
+        await purge.run()
+    except PurgeDeadline:
+        logger.info(f"Company {company_id} purge paused at {await redis.hget(purge.key, 'step')}, continuing later")
+        await purge_company.enqueue(company_id, priority="low", redis=redis)
+
+
+async def prepare_company_purge(company_id, deleted_by, redis=None):
+    """Record the purge before the company is flagged, so a purge that was never queued can be found."""
+    redis = redis or await get_redis()
+    key = purge_key(company_id)
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={"status": "running", "deleted_by": deleted_by, "started_at": now,
+                                "updated_at": now, "steps_done": 0, "step": ""})
+        pipe.expire(key, settings.COMPANY_PURGE_PROGRESS_TTL)
+        await pipe.execute()
+
+
+async def start_company_purge(company_id, deleted_by, redis=None):
+    redis = redis or await get_redis()
+    await prepare_company_purge(company_id, deleted_by, redis)
+    await purge_company.enqueue(company_id, priority="low", redis=redis)
+
+
+@task("companies.resume_purges", queue="default")
+async def resume_company_purges(session_maker=async_session, redis=None):
+    """
+    Queue the purge of every company that is flagged as deleted but whose purge has not finished
+    and made no progress for a visibility timeout, e.g. because the process died before enqueueing
+    it. Purges are idempotent, so resuming one that is merely slow is harmless. Workers queue this
+    task when they start.
+    """
+    redis = redis or await get_redis()
+    async with session_maker() as db:
+        company_ids = (await db.execute(select(Company.id).where(Company.is_deleted == True))).scalars().all()
+    stale = time.time() - settings.TASKS_VISIBILITY_TIMEOUT
+    for company_id in company_ids:
+        progress = await redis.hgetall(purge_key(company_id))
+        if not progress:
+            # the progress hash expired or was never written; the deleting user is unknown
+            await start_company_purge(company_id, 0, redis)
+        elif progress["status"] != "done" and float(progress.get("updated_at", 0)) < stale:
+            logger.info(f"Resuming company {company_id} purge at {progress.get('step') or 'start'}")
+            await redis.hset(purge_key(company_id), "updated_at", time.time())
+            await purge_company.enqueue(company_id, priority="low", redis=redis)
+
+
+async def company_purge_progress(company_id, redis):
+    progress = await redis.hgetall(purge_key(company_id))
+    if not progress:
+        return None
+    counters = ["quiz_results", "members", "invitations", "applications", "quizzes", "quiz_versions", "bank_questions",
+                "redis_keys"]
+    return {
+        "company_id": company_id,
+        "status": progress["status"],
+        "step": progress.get("step") or None,
+        "deleted": {name: int(progress.get(name, 0)) for name in counters},
+        "started_at": float(progress["started_at"]),
+        "finished_at": float(progress["finished_at"]) if "finished_at" in progress else None,
+        "deleted_by": int(progress["deleted_by"]),
+    }
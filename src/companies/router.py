@@ -1,9 +1,10 @@
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from fastapi_pagination.ext.sqlalchemy import paginate
 from fastapi_pagination.links import Page
 from sqlalchemy import select, Boolean
+from redis.asyncio.client import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
@@ -15,18 +16,24 @@ from src.companies.permissions import (is_company_admin,
                                        is_company_owner)
 from src.companies.schemas import (CompanyCreateUpdateSchema,
                                    CompanyRead,
+                                   CompanyMembersPage,
+                                   CompanySearchPage,
                                    InviteLetterSchema,
+                                   BulkInviteLetterSchema,
                                    ApplicationLetterSchema,
                                    InviteApplicationAnswerSchema,
                                    CompanyMemberDeleteSchema,
                                    CreateDeleteCompanyAdminSchema)
 from src.companies.services import (create_company_service,
+                                    search_companies_service,
                                     update_company_service,
                                     delete_company_service,
+                                    get_company_purge_service,
                                     get_company_by_id_service,
                                     change_company_access_service,
                                     get_company_members_service,
                                     create_invitational_letter,
+                                    create_bulk_invitational_letters,
                                     get_users_invitations_service,
                                     get_company_roles_service,
                                     invitational_answer_letter_service,
@@ -41,6 +48,7 @@ from src.companies.services import (create_company_service,
                                     create_company_admin_user_service,
                                     delete_company_admin_user_service,
                                     get_company_admin_user_service)
+from src.core.redis_config import get_redis
 from src.database import get_db_session
 from src.utils.utils_auth import get_current_user
 
@@ -58,7 +66,27 @@ async def get_all_companies(db: AsyncSession = Depends(get_db_session)):
        :param db: The asynchronous database session.
        :return: A paginated list of companies, ordered by their registration date.
        """
-    return await paginate(db, select(Company).where(Company.is_private == False).order_by(Company.registration_date))
+    return await paginate(db, select(Company).where(Company.is_private == False, Company.is_deleted == False)
+                          .order_by(Company.registration_date))
+
+
+@router.get("/search", response_model=CompanySearchPage)
+async def search_companies(q: str = Query(min_length=3, max_length=50),
+                           mode: Literal["prefix", "fuzzy"] = "prefix",
+                           after: Optional[str] = None,
+                           limit: int = Query(default=20, ge=1, le=100),
+                           db: AsyncSession = Depends(get_db_session)):
+    """
+    Search public companies by name.
+
+    :param q: The search text, at least three characters so the trigram index applies.
+    :param mode: prefix for starts-with matching, fuzzy for similarity ranked matches.
+    :param after: The next_cursor of the previous page.
+    :param limit: The page size.
+    :param db: The asynchronous database session.
+    :return: Matching public companies and the next page cursor.
+    """
+    return await search_companies_service(q, mode, after, limit, db)
 
 
 @router.post("")
@@ -88,18 +116,26 @@ async def get_company_by_id(company_id: int, db: AsyncSession = Depends(get_db_s
     return await get_company_by_id_service(company_id, db)
 
 
-@router.get("/details/{company_id}/members")
+@router.get("/details/{company_id}/members", response_model=CompanyMembersPage)
 async def get_company_members(company_id: int,
                               user: Annotated[dict, Depends(get_current_user)],
-                              db: AsyncSession = Depends(get_db_session)):
+                              role: Optional[Literal["owner", "admin", "member"]] = None,
+                              after: Optional[int] = None,
+                              limit: int = Query(default=50, ge=1, le=200),
+                              db: AsyncSession = Depends(get_db_session),
+                              redis: Redis = Depends(get_redis)):
     """
-    Retrieve the list of members of a specific company by its ID.
+    Retrieve one page of the members of a specific company by its ID.
 
     :param company_id: The ID of the company whose members are to be retrieved.
+    :param role: Only list members with this role.
+    :param after: The next_cursor of the previous page.
+    :param limit: The page size.
     :param db: The asynchronous database session.
-    :return: A list of members in the specified company.
+    :param redis: The Redis client caching the member count.
+    :return: Members with usernames and role names, the total count and the next page cursor.
     """
-    return await get_company_members_service(company_id, db)
+    return await get_company_members_service(company_id, role, after, limit, db, redis)
 
 
 @router.delete("/details/{company_id}/members", status_code=status.HTTP_204_NO_CONTENT)
@@ -133,10 +169,10 @@ async def update_company(company_id: int,
 @router.delete("/details/{company_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_company(company_id: int,
                          user: Annotated[dict, Depends(get_current_user)],
-                         company: bool = Depends(is_company_admin),
+                         company: bool = Depends(is_company_owner),
                          db: AsyncSession = Depends(get_db_session)):
     """
-        Delete a company by its ID.
+        Delete a company by its ID; its data is purged in the background.
 
         :param company_id: The ID of the company to delete.
         :param user: The currently authenticated user.
@@ -144,7 +180,22 @@ async def delete_company(company_id: int,
         :param db: The asynchronous database session.
         :return: A response indicating the result of the deletion.
         """
-    return await delete_company_service(company_id=company_id, db=db)
+    return await delete_company_service(company_id=company_id, user=user, db=db)
+
+
+@router.get("/details/{company_id}/purge")
+async def get_company_purge(company_id: int,
+                            user: Annotated[dict, Depends(get_current_user)],
+                            redis: Redis = Depends(get_redis)):
+    """
+        Progress of the background purge of a deleted company, visible to the user who deleted it.
+
+        :param company_id: The ID of the deleted company.
+        :param user: The currently authenticated user.
+        :param redis: The Redis client holding the purge progress.
+        :return: The current step, the number of deleted rows, documents and keys per kind.
+        """
+    return await get_company_purge_service(company_id, user, redis)
 
 
 @router.put("/access/{company_id}")
@@ -222,6 +273,22 @@ async def create_company_invite(invitation_letter: InviteLetterSchema,
     return await create_invitational_letter(user, invitation_letter, db)
 
 
+@router.post("/company_invite/bulk")
+async def create_company_bulk_invite(bulk_letter: BulkInviteLetterSchema,
+                                     user: Annotated[dict, Depends(get_current_user)],
+                                     db: AsyncSession = Depends(get_db_session)):
+    """
+        Invite up to 1000 users by id and/or email in one request.
+
+        :param bulk_letter: The company and the receiver user ids and/or emails.
+        :param user: The currently authenticated user (must be a company admin).
+        :param db: The asynchronous database session.
+        :return: One outcome per receiver: invited, already_member, already_invited, self or not_found.
+        """
+    await is_company_admin(bulk_letter.company_id, user, db)
+    return await create_bulk_invitational_letters(user, bulk_letter, db)
+
+
 @router.post("/company_application")
 async def create_company_application(application_letter: ApplicationLetterSchema,
                                      user: Annotated[dict, Depends(get_current_user)],
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class CompanyCreateUpdateSchema(BaseModel):
@@ -17,6 +17,25 @@ class CompanyRead(BaseModel):
     registration_date: datetime
 
 
+class CompanySearchPage(BaseModel):
+    items: list[CompanyRead]
+    next_cursor: str | None
+
+
+class CompanyMemberRead(BaseModel):
+    member_id: int
+    user_id: int
+    username: str
+    role: str
+    registration_date: datetime | None
+
+
+class CompanyMembersPage(BaseModel):
+    items: list[CompanyMemberRead]
+    total: int
+    next_cursor: int | None
+
+
 class CompanyMemberDeleteSchema(BaseModel):
     user_id: int
 
@@ -29,6 +48,18 @@ class InviteLetterSchema(BaseModel):
     company_id: int
 
 
+class BulkInviteLetterSchema(BaseModel):
+    company_id: int
+    receiver_user_ids: list[int] = Field(default=[], max_length=1000)
+    receiver_emails: list[str] = Field(default=[], max_length=1000)
+
+    @model_validator(mode="after")
+    def check_receivers(self):
+        if not self.receiver_user_ids and not self.receiver_emails:
+            raise ValueError("At least one receiver user id or email is required")
+        return self
+
+
 class ApplicationLetterSchema(BaseModel):
     company_id: int
 
@@ -1,6 +1,8 @@
+import logging
+
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, literal, union_all, or_, func
 from starlette import status
 
 from src.auth.models import User
@@ -10,18 +12,52 @@ from src.companies.models import (Company,
                                   CompanyRole,
                                   InvitationStatusEnum,
                                   Application)
-from src.utils.utils_companies import get_company_role, is_company_member
+from src.companies.purge import prepare_company_purge, purge_company, purge_key, company_purge_progress
+from src.core.config import settings
+from src.core.redis_config import get_redis
+from src.notifications.models import NotificationOutbox
+from src.notifications.realtime import (publish_inbox_event,
+                                        publish_inbox_events,
+                                        user_inbox_channel,
+                                        company_inbox_channel)
+from src.notifications.services import enqueue_notification, enqueue_company_admins_notification
+from src.utils.utils_companies import get_company_role, add_company_member
+from src.utils.utils_search import keyset_search, search_page
+
+logger = logging.getLogger(__name__)
+
 
+def members_count_key(company_id):
+    return f"company_members_count:{company_id}"
+
+
+async def invalidate_members_count(company_id):
+    """Drop the cached member counts of a company; the TTL bounds staleness if Redis is unavailable."""
+    try:
+        redis = await get_redis()
+        await redis.delete(members_count_key(company_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate member count of company {company_id}: {e}")
 
 
 async def get_company_by_id_service(company_id, db):
-    result = await db.execute(select(Company).where(Company.id == company_id))
+    result = await db.execute(select(Company).where(Company.id == company_id, Company.is_deleted == False))
     company = result.scalar_one_or_none()
     if not company:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     return company
 
 
+async def search_companies_service(q, mode, after, limit, db):
+    query = keyset_search(select(Company.id, Company.name, Company.description, Company.registration_date)
+                          .where(Company.is_private == False, Company.is_deleted == False),
+                          Company.id, [Company.name], q, mode, after, limit)
+    result = await db.execute(query)
+    return search_page(result.all(), limit, lambda company: {"id": company.id, "name": company.name,
+                                                             "description": company.description,
+                                                             "registration_date": company.registration_date})
+
+
 async def create_company_service(user, company_data, db):
     company = Company(
         name=company_data.name,
@@ -36,17 +72,12 @@ async def create_company_service(user, company_data, db):
 
 
 async def create_company_member_service(user_id, company_id, role, db):
-    if not await is_company_member(user_id, company_id, db):
-        company_member = CompanyMember(
-            user_id=user_id,
-            company_id=company_id,
-            role=await get_company_role(db, role)
-        )
-        db.add(company_member)
-        await db.commit()
-    else:
+    if not await add_company_member(db, user_id, company_id, role):
+        await db.rollback()
         raise HTTPException(detail="User is already member of a company",
                             status_code=status.HTTP_400_BAD_REQUEST)
+    await db.commit()
+    await invalidate_members_count(company_id)
 
 
 async def delete_company_member_service(user_id, company_id, db):
@@ -58,11 +89,12 @@ async def delete_company_member_service(user_id, company_id, db):
 
     await db.delete(company_member_to_delete)
     await db.commit()
+    await invalidate_members_count(company_id)
 
 
 async def update_company_service(company_id, company_data, db):
     try:
-        result = await db.execute(select(Company).where(Company.id == company_id))
+        result = await db.execute(select(Company).where(Company.id == company_id, Company.is_deleted == False))
         company = result.scalar_one_or_none()
         if not company:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -81,7 +113,7 @@ async def update_company_service(company_id, company_data, db):
 
 async def change_company_access_service(company_id, db):
     try:
-        result = await db.execute(select(Company).where(Company.id == company_id))
+        result = await db.execute(select(Company).where(Company.id == company_id, Company.is_deleted == False))
         company = result.scalar_one_or_none()
         if not company:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -97,21 +129,88 @@ async def change_company_access_service(company_id, db):
         )
 
 
-async def delete_company_service(company_id, db):
-    result = await db.execute(select(Company).where(Company.id == company_id))
-    company = result.scalar_one_or_none()
-    if not company:
+async def delete_company_service(company_id, user, db):
+    """
+    Mark the company as deleted and hand its data to the background purge.
+
+    The company disappears from every read right away; its quiz results, memberships, letters,
+    quizzes and Redis keys are removed in batches by the companies.purge task. The purge progress
+    is written before the flag is committed, and companies.resume_purges queues purges that were
+    flagged but never queued.
+    """
+    result = await db.execute(update(Company)
+                              .where(Company.id == company_id, Company.is_deleted == False)
+                              .values(is_deleted=True)
+                              .returning(Company.id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    db.delete(company)
-    await db.commit()
+    redis = await get_redis()
+    await prepare_company_purge(company_id, user.get("id"), redis)
+    try:
+        await db.commit()
+    except Exception:
+        await redis.delete(purge_key(company_id))
+        raise
+    await purge_company.enqueue(company_id, priority="low", redis=redis)
 
 
-async def get_company_members_service(company_id, db):
-    result = await db.execute(select(CompanyMember).where(CompanyMember.company_id == company_id))
-    members = result.scalars().all()
-    if not members:
+async def get_company_purge_service(company_id, user, redis):
+    progress = await company_purge_progress(company_id, redis)
+    if progress is None or progress["deleted_by"] != user.get("id"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return progress
+
+
+async def get_company_members_count(company_id, role_name, role_id, db, redis):
+    """Member count per company and role, cached in one Redis hash per company."""
+    key, field = members_count_key(company_id), role_name or "all"
+    cached = await redis.hget(key, field)
+    if cached is not None:
+        return int(cached)
+    query = (select(func.count()).select_from(CompanyMember)
+             .join(User, User.id == CompanyMember.user_id)
+             .where(CompanyMember.company_id == company_id, User.is_deleted == False))
+    if role_id is not None:
+        query = query.where(CompanyMember.role == role_id)
+    count = await db.scalar(query)
+    async with redis.pipeline(transaction=True) as pipe:
+        await pipe.hset(key, field, count).expire(key, settings.MEMBERS_COUNT_CACHE_TTL).execute()
+    return count
+
+
+async def get_company_members_service(company_id, role, after, limit, db, redis):
+    """
+    One page of company members with usernames and role names, keyset-paginated on the member id.
+
+    The page is read through the (company_id, role, id) / (company_id, id) indexes, so its cost
+    does not grow with the company size.
+    """
+    role_id = await get_company_role(db, role) if role else None
+    query = (
+        select(CompanyMember.id, CompanyMember.user_id, User.username, CompanyRole.name.label("role"),
+               CompanyMember.registration_date)
+        .join(User, User.id == CompanyMember.user_id)
+        .join(CompanyRole, CompanyRole.id == CompanyMember.role)
+        .where(CompanyMember.company_id == company_id, User.is_deleted == False)
+        .order_by(CompanyMember.id)
+        .limit(limit + 1)
+    )
+    if role_id is not None:
+        query = query.where(CompanyMember.role == role_id)
+    if after is not None:
+        query = query.where(CompanyMember.id > after)
+    result = await db.execute(query)
+    members = result.all()
+    if not members and after is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    return members
+    has_more = len(members) > limit
+    members = members[:limit]
+    return {
+        "items": [{"member_id": member.id, "user_id": member.user_id, "username": member.username,
+                   "role": member.role, "registration_date": member.registration_date} for member in members],
+        "total": await get_company_members_count(company_id, role, role_id, db, redis),
+        "next_cursor": members[-1].id if has_more else None,
+    }
 
 
 async def create_invitational_letter(user, invitational_letter, db):
@@ -126,10 +225,76 @@ async def create_invitational_letter(user, invitational_letter, db):
         status=InvitationStatusEnum.INPROCESS.value
     )
     db.add(invitation)
+    enqueue_notification(db, invitational_letter.receiver_user_id, "invitation",
+                         {"company_id": invitational_letter.company_id, "sender_user_id": user.get("id")})
     await db.commit()
+    await publish_inbox_event(user_inbox_channel(invitation.receiver_user_id),
+                              {"type": "invitation", "invitation_id": invitation.id,
+                               "company_id": invitation.company_id})
     return invitation
 
 
+async def create_bulk_invitational_letters(user, bulk_letter, db):
+    """
+    Invite many users at once with a fixed number of queries regardless of the batch size.
+
+    Receivers are resolved by id or email in one query, existing members and pending invitations
+    are filtered out with one set-based query and the rest are invited with one multi-row INSERT.
+    Returns the outcome of every requested receiver; deleted accounts are not found.
+    """
+    company_id = bulk_letter.company_id
+    requested_ids = list(dict.fromkeys(bulk_letter.receiver_user_ids))
+    requested_emails = list(dict.fromkeys(bulk_letter.receiver_emails))
+
+    result = await db.execute(select(User.id, User.email).where(or_(User.id.in_(requested_ids),
+                                                                    User.email.in_(requested_emails)),
+                                                                User.is_deleted == False))
+    users = result.all()
+    user_ids = {row.id for row in users}
+    email_to_id = {row.email: row.id for row in users}
+
+    result = await db.execute(union_all(
+        select(CompanyMember.user_id, literal("already_member").label("outcome"))
+        .where(CompanyMember.company_id == company_id, CompanyMember.user_id.in_(user_ids)),
+        select(Invitation.receiver_user_id, literal("already_invited").label("outcome"))
+        .where(Invitation.company_id == company_id,
+               Invitation.receiver_user_id.in_(user_ids),
+               Invitation.is_active == True,
+               Invitation.status == InvitationStatusEnum.INPROCESS.value),
+    ))
+    skipped = {}
+    for user_id, outcome in result.all():
+        skipped.setdefault(user_id, outcome)
+    skipped[user.get("id")] = "self"
+
+    to_invite = sorted(user_ids - skipped.keys())
+    invited = {}
+    if to_invite:
+        result = await db.execute(
+            insert(Invitation)
+            .values([{"sender_user_id": user.get("id"), "receiver_user_id": user_id, "company_id": company_id,
+                      "status": InvitationStatusEnum.INPROCESS.value, "is_active": True} for user_id in to_invite])
+            .returning(Invitation.id, Invitation.receiver_user_id)
+        )
+        invited = {row.receiver_user_id: row.id for row in result.all()}
+        await db.execute(insert(NotificationOutbox).values([
+            {"recipient_user_id": user_id, "kind": "invitation",
+             "payload": {"company_id": company_id, "sender_user_id": user.get("id")}} for user_id in to_invite]))
+    await db.commit()
+    await publish_inbox_events([(user_inbox_channel(user_id),
+                                 {"type": "invitation", "invitation_id": invitation_id, "company_id": company_id})
+                                for user_id, invitation_id in invited.items()])
+
+    def outcome(receiver, user_id):
+        if user_id is None:
+            return {"receiver": receiver, "user_id": None, "outcome": "not_found", "invitation_id": None}
+        return {"receiver": receiver, "user_id": user_id, "outcome": skipped.get(user_id, "invited"),
+                "invitation_id": invited.get(user_id)}
+
+    return ([outcome(user_id, user_id if user_id in user_ids else None) for user_id in requested_ids] +
+            [outcome(email, email_to_id.get(email)) for email in requested_emails])
+
+
 async def get_users_invitations_service(user, db):
     result = await db.execute(select(Invitation).where(Invitation.receiver_user_id == user.get("id")))
     invitations = result.scalars().all()
@@ -149,7 +314,7 @@ async def get_users_applications_service(user, db):
 async def get_users_companies_service(user_id, db):
     result = await db.execute(
         select(Company.name, Company.id).join(CompanyMember, Company.id == CompanyMember.company_id).where(
-            CompanyMember.user_id == user_id))
+            CompanyMember.user_id == user_id, Company.is_deleted == False))
     companies = result.all()
     return [{"id": company.id, "name": company.name} for company in companies]
 
@@ -179,48 +344,68 @@ async def delete_invitational_letter_service(invitational_id, db):
     await db.commit()
 
 
+def answer_status(answer):
+    if answer == "rejected":
+        return InvitationStatusEnum.REJECTED.value
+    return InvitationStatusEnum.ACCEPTED.value
+
+
 async def invitational_answer_letter_service(invitational_id, invitation_answer, db):
-    invitation = await db.execute(select(Invitation).where(Invitation.id == invitational_id,
-                                                       Invitation.is_active == True))
-    invitation = invitation.scalar_one_or_none()
+    """
+    Answer an active invitation in one transaction.
+
+    The UPDATE ... RETURNING only matches an active invitation, so of several concurrent answers
+    exactly one wins and the others get 404; the membership insert ignores existing members.
+    """
+    result = await db.execute(
+        update(Invitation)
+        .where(Invitation.id == invitational_id, Invitation.is_active == True)
+        .values(status=answer_status(invitation_answer.answer), is_active=False)
+        .returning(Invitation)
+    )
+    invitation = result.scalar_one_or_none()
     if not invitation:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    if invitation_answer.answer == "rejected":
-        invitation.status = InvitationStatusEnum.REJECTED.value
-        invitation.is_private = False
-        db.add(invitation)
-        await db.commit()
+    if invitation.status == InvitationStatusEnum.ACCEPTED.value:
+        await add_company_member(db, invitation.receiver_user_id, invitation.company_id, "member")
+    enqueue_notification(db, invitation.sender_user_id, "invitation_answer",
+                         {"company_id": invitation.company_id, "answer": invitation.status})
+    await db.commit()
+    await publish_inbox_event(company_inbox_channel(invitation.company_id),
+                              {"type": "invitation_answer", "invitation_id": invitation.id,
+                               "answer": invitation.status})
+    if invitation.status == InvitationStatusEnum.REJECTED.value:
         return JSONResponse(content={"detail": "Invitation was rejected."},
                             status_code=status.HTTP_200_OK,
                             )
-    invitation.status = InvitationStatusEnum.ACCEPTED.value
-    invitation.is_active = False
-    db.add(invitation)
-    await db.commit()
-    await create_company_member_service(invitation.receiver_user_id, invitation.company_id, "member", db)
+    await invalidate_members_count(invitation.company_id)
     return invitation
 
 
 async def application_answer_letter_service(application_id, application_letter, db):
-    application = await db.execute(
-        select(Application).where(Application.id == application_id,
-                                  Application.is_active == True))
-    application = application.scalar_one_or_none()
+    """Answer an active application in one transaction, see invitational_answer_letter_service."""
+    result = await db.execute(
+        update(Application)
+        .where(Application.id == application_id, Application.is_active == True)
+        .values(status=answer_status(application_letter.answer), is_active=False)
+        .returning(Application)
+    )
+    application = result.scalar_one_or_none()
     if not application:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    if application_letter.answer == "rejected":
-        application.status = InvitationStatusEnum.REJECTED.value
-        application.is_active = False
-        db.add(application)
-        await db.commit()
+    if application.status == InvitationStatusEnum.ACCEPTED.value:
+        await add_company_member(db, application.sender_user_id, application.company_id, "member")
+    enqueue_notification(db, application.sender_user_id, "application_answer",
+                         {"company_id": application.company_id, "answer": application.status})
+    await db.commit()
+    await publish_inbox_event(user_inbox_channel(application.sender_user_id),
+                              {"type": "application_answer", "application_id": application.id,
+                               "company_id": application.company_id, "answer": application.status})
+    if application.status == InvitationStatusEnum.REJECTED.value:
         return JSONResponse(content={"detail": "Invitation was rejected."},
                             status_code=status.HTTP_200_OK,
                             )
-    application.status = InvitationStatusEnum.ACCEPTED.value
-    application.is_active = False
-    db.add(application)
-    await db.commit()
-    await create_company_member_service(application.sender_user_id, application.company_id, "member", db)
+    await invalidate_members_count(application.company_id)
     return application
 
 
@@ -231,7 +416,13 @@ async def create_application_letter(user, application_letter, db):
         status=InvitationStatusEnum.INPROCESS.value
     )
     db.add(application)
+    await enqueue_company_admins_notification(db, application_letter.company_id, "application",
+                                              {"company_id": application_letter.company_id,
+                                               "sender_user_id": user.get("id")})
     await db.commit()
+    await publish_inbox_event(company_inbox_channel(application.company_id),
+                              {"type": "application", "application_id": application.id,
+                               "sender_user_id": application.sender_user_id})
     return application
 
 
@@ -246,6 +437,7 @@ async def create_company_admin_user_service(company_id, admin_user_request,db):
     admin_user.role = await get_company_role(db, "admin")
     db.add(admin_user)
     await db.commit()
+    await invalidate_members_count(company_id)
     return admin_user
 
 
@@ -255,7 +447,8 @@ async def get_company_admin_user_service(company_id, db):
         .join(CompanyMember, User.id == CompanyMember.user_id)
         .join(CompanyRole, CompanyMember.role == CompanyRole.id)
         .where(CompanyMember.company_id == company_id,
-            CompanyRole.name.in_(["owner", "admin"])
+            CompanyRole.name.in_(["owner", "admin"]),
+            User.is_deleted == False
         ))
     admin_users = result.all()
     if not admin_users:
@@ -275,6 +468,7 @@ async def delete_company_admin_user_service(company_id, admin_user_request, db):
     not_admin_user.role = await get_company_role(db, "member")
     db.add(not_admin_user)
     await db.commit()
+    await invalidate_members_count(company_id)
     return not_admin_user
 
 
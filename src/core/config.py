@@ -23,12 +23,65 @@ class Settings(BaseSettings):
     EMAIL_PORT: int = 587
     EMAIL_USER: str
     EMAIL_PASSWORD: str
+    EMAIL_USE_TLS: bool = True
+    SMTP_POOL_SIZE: int = 2
+
+    NOTIFICATIONS_DISPATCHER_ENABLED: bool = True
+    NOTIFICATIONS_BATCH_SIZE: int = 100
+    NOTIFICATIONS_POLL_INTERVAL: float = 1.0
+    NOTIFICATIONS_MAX_ATTEMPTS: int = 5
+    NOTIFICATIONS_BACKOFF_SECONDS: int = 30
+    NOTIFICATIONS_MAX_BACKOFF_SECONDS: int = 3600
+    NOTIFICATIONS_RATE_LIMIT: float = 50.0
+    NOTIFICATIONS_LEASE_SECONDS: int = 300
+    FANOUT_CHUNK_SIZE: int = 1000
+    FANOUT_PROGRESS_TTL: int = 7 * 24 * 3600
+    INBOX_SEND_BUFFER: int = 100
+    INBOX_HEARTBEAT_SECONDS: float = 25.0
 
     REDIS_URL: str
+    MEMBERS_COUNT_CACHE_TTL: int = 300
+    COMPANY_PURGE_BATCH_SIZE: int = 5000
+    COMPANY_PURGE_BATCH_PAUSE: float = 0.05
+    COMPANY_PURGE_PROGRESS_TTL: int = 7 * 24 * 3600
+    USER_CLEANUP_BATCH_SIZE: int = 1000
+    USER_CLEANUP_BATCH_PAUSE: float = 0.05
+    USER_ACTIVE_CACHE_TTL: int = 60
+
+    TASKS_WORKER_IN_APP: bool = True
+    TASKS_QUEUES: dict[str, int] = {"default": 4, "notifications": 2}
+    TASKS_MAX_RETRIES: int = 3
+    TASKS_RETRY_DELAY: float = 5.0
+    TASKS_VISIBILITY_TIMEOUT: int = 300
+    TASKS_BLOCK_MS: int = 1000
+    TASKS_SCHEDULE_POLL_INTERVAL: float = 1.0
+    TASKS_DEAD_LETTER_MAXLEN: int = 10000
 
     MONGO_URL:str
     MONGO_DB:str
     MONGO_COLLECTION:str
+    MONGO_VERSIONS_COLLECTION: str = "quiz_versions"
+    QUIZ_VERSION_CACHE_SIZE: int = 256
+    QUIZ_IMPORT_BATCH_SIZE: int = 500
+    QUIZ_IMPORT_MAX_LINE_BYTES: int = 5 * 1024 * 1024
+    QUIZ_IMPORT_MAX_ERRORS: int = 1000
+    QUIZ_EXPORT_BATCH_SIZE: int = 1000
+    MONGO_QUESTION_BANK_COLLECTION: str = "question_bank"
+    QUIZ_ATTEMPT_TTL: int = 3600
+    QUIZ_ATTEMPT_SAVE_RETRIES: int = 3
+    QUIZ_TEXT_ANSWER_MAX_LENGTH: int = 1000
+    QUIZ_REGRADE_BATCH_SIZE: int = 10000
+    QUIZ_REGRADE_PROGRESS_TTL: int = 7 * 24 * 3600
+
+    PROFILING_TOKEN: str | None = None
+    PROFILING_DIR: str = "profiles"
+    MEMORY_TRACE_ROUTES: list[str] = []
+    TRACEMALLOC_FRAMES: int = 1
+
+    TRAFFIC_CAPTURE_FILE: str | None = None
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 1.0
+    TRAFFIC_CAPTURE_MAX_BODY: int = 65536
+    TRAFFIC_CAPTURE_SYNTHETIC_USERS: int = 10000
 
     class Config:
         env_file = ".env"
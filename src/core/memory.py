@@ -0,0 +1,112 @@
+import hmac
+import logging
+import tracemalloc
+import uuid
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEMORY_PEAK_HEADER = b"x-memory-peak"
+
+SNAPSHOTS: dict[str, tracemalloc.Snapshot] = {}
+
+
+class MemoryTracingMiddleware:
+    """
+    Reports the peak traced allocation of requests whose path starts with one of ``routes``.
+
+    The peak is returned in the ``X-Memory-Peak`` response header (bytes) and logged.
+    tracemalloc counters are process wide, so concurrent requests inflate each other's peak.
+    """
+
+    def __init__(self, app, routes: list[str]):
+        self.app = app
+        self.routes = tuple(routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.routes):
+            return await self.app(scope, receive, send)
+
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+
+        async def send_with_peak(message):
+            if message["type"] == "http.response.start":
+                _, peak = tracemalloc.get_traced_memory()
+                message["headers"] = list(message.get("headers", [])) + [
+                    (MEMORY_PEAK_HEADER, str(peak - start).encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_peak)
+        _, peak = tracemalloc.get_traced_memory()
+        logger.info(f"{scope['method']} {scope['path']} peak allocation {peak - start} bytes")
+
+
+async def check_debug_token(x_profile_token: str = Header(default="")):
+    if not hmac.compare_digest(x_profile_token.encode(), (settings.PROFILING_TOKEN or "").encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+router = APIRouter(
+    prefix="/debug/memory",
+    tags=["debug"],
+    dependencies=[Depends(check_debug_token)],
+)
+
+
+def _format_stats(stats, limit):
+    return [{"location": str(stat.traceback),
+             "size": stat.size,
+             "size_diff": getattr(stat, "size_diff", None),
+             "count": stat.count}
+            for stat in stats[:limit]]
+
+
+@router.post("/snapshot")
+async def take_snapshot(limit: int = 20):
+    """
+    Take a tracemalloc snapshot and keep it for later diffs.
+
+    :param limit: How many of the biggest allocation sites to return.
+    :return: The snapshot id and its top allocation sites.
+    """
+    snapshot = tracemalloc.take_snapshot()
+    snapshot_id = uuid.uuid4().hex
+    SNAPSHOTS[snapshot_id] = snapshot
+    return {"snapshot_id": snapshot_id,
+            "top": _format_stats(snapshot.statistics("lineno"), limit)}
+
+
+@router.get("/diff/{snapshot_id}")
+async def diff_snapshot(snapshot_id: str, against: str | None = None, limit: int = 20):
+    """
+    Compare a stored snapshot with another stored snapshot or with the current heap.
+
+    :param snapshot_id: The id of the base snapshot.
+    :param against: The id of the snapshot to compare with, a fresh snapshot is taken if omitted.
+    :param limit: How many of the biggest differences to return.
+    :return: Allocation sites sorted by size difference.
+    """
+    if snapshot_id not in SNAPSHOTS or (against is not None and against not in SNAPSHOTS):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+    target = SNAPSHOTS[against] if against else tracemalloc.take_snapshot()
+    return {"diff": _format_stats(target.compare_to(SNAPSHOTS[snapshot_id], "lineno"), limit)}
+
+
+@router.delete("/snapshot", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_snapshots():
+    SNAPSHOTS.clear()
+
+
+def install_memory_tracing(app):
+    if not settings.debug or not (settings.PROFILING_TOKEN or settings.MEMORY_TRACE_ROUTES):
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+    if settings.MEMORY_TRACE_ROUTES:
+        app.add_middleware(MemoryTracingMiddleware, routes=settings.MEMORY_TRACE_ROUTES)
+    if settings.PROFILING_TOKEN:
+        app.include_router(router)
@@ -1,10 +1,53 @@
+import logging
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, TEXT
+from pymongo.errors import PyMongoError
 
 from src.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+QUIZ_TEXT_INDEX = "quiz_text_search"
+QUIZ_TEXT_INDEX_KEYS = [("company_id", ASCENDING), ("name", TEXT), ("description", TEXT), ("questions.text", TEXT)]
+QUIZ_TEXT_INDEX_WEIGHTS = {"name": 10, "description": 5, "questions.text": 1}
+
+# mongo setup
+mongo_client: AsyncIOMotorClient = None
+
 
 async def get_mongo_database():
-    client = AsyncIOMotorClient(settings.MONGO_URL)
-    db = client[settings.MONGO_DB]
-    db_collection = db[settings.MONGO_COLLECTION]
-    return db_collection
\ No newline at end of file
+    global mongo_client
+    if mongo_client is None:
+        mongo_client = AsyncIOMotorClient(settings.MONGO_URL)
+    return mongo_client[settings.MONGO_DB][settings.MONGO_COLLECTION]
+
+
+async def ensure_quiz_indexes(collection):
+    """
+    Create the company-scoped quiz text index, replacing an outdated one.
+
+    A collection can only hold one text index, so any other text index is dropped first.
+    """
+    try:
+        indexes = await collection.index_information()
+        for name, index in indexes.items():
+            if name != QUIZ_TEXT_INDEX and any(kind == "text" for _, kind in index["key"]):
+                await collection.drop_index(name)
+        await collection.create_index(QUIZ_TEXT_INDEX_KEYS, name=QUIZ_TEXT_INDEX, weights=QUIZ_TEXT_INDEX_WEIGHTS,
+                                      default_language="english")
+        await collection.database[settings.MONGO_VERSIONS_COLLECTION].create_index([("company_id", ASCENDING)])
+        await collection.database[settings.MONGO_QUESTION_BANK_COLLECTION].create_index(
+            [("company_id", ASCENDING), ("tags", ASCENDING)])
+    except PyMongoError as e:
+        logger.error(f"Could not create quiz indexes: {e}")
+
+
+async def init_mongo_client():
+    global mongo_client
+    mongo_client = AsyncIOMotorClient(settings.MONGO_URL)
+    await ensure_quiz_indexes(await get_mongo_database())
+
+
+async def close_mongo_client():
+    mongo_client.close()
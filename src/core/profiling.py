@@ -0,0 +1,66 @@
+import cProfile
+import hmac
+import logging
+import os
+import uuid
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request with cProfile when it carries a valid ``X-Profile-Token`` header.
+
+    The stats are dumped to ``<profile_dir>/<profile_id>.prof`` (open them with ``pstats``,
+    snakeviz or flameprof) and the id is returned in the ``X-Profile-Id`` response header.
+    The middleware is only installed in debug mode, so production requests never pass through it.
+    cProfile hooks the whole event loop thread, so concurrent requests show up in the profile too
+    and only one request is profiled at a time.
+    """
+
+    def __init__(self, app, token: str, profile_dir: str):
+        self.app = app
+        self.token = token.encode()
+        self.profile_dir = profile_dir
+        self.busy = False
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def _is_authorized(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_TOKEN_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy or not self._is_authorized(scope):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self.busy = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.busy = False
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{profile_id}.prof"))
+            logger.info(f"Profiled {scope['method']} {scope['path']} as {profile_id}")
+
+
+def install_profiling(app):
+    if settings.debug and settings.PROFILING_TOKEN:
+        app.add_middleware(ProfilingMiddleware,
+                           token=settings.PROFILING_TOKEN,
+                           profile_dir=settings.PROFILING_DIR)
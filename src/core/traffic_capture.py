@@ -0,0 +1,132 @@
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from urllib.parse import parse_qsl
+
+from jose import jwt, JWTError
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_FIELDS = {"password", "new_password", "access_token", "token", "email"}
+USER_FIELDS = {"user_id", "receiver_user_id", "username"}
+
+
+def synthetic_user(identity) -> int:
+    """Map a real user id or username onto a stable synthetic user id in 1..TRAFFIC_CAPTURE_SYNTHETIC_USERS."""
+    digest = hmac.new(settings.SECRET_KEY.encode(), str(identity).encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:8], "big") % settings.TRAFFIC_CAPTURE_SYNTHETIC_USERS + 1
+
+
+def sanitize(params: dict) -> dict:
+    sanitized = {}
+    for key, value in params.items():
+        if key in SENSITIVE_FIELDS:
+            sanitized[key] = None
+        elif key in USER_FIELDS and isinstance(value, list):
+            sanitized[key] = [synthetic_user(item) if item is not None else None for item in value]
+        elif key in USER_FIELDS and value is not None:
+            sanitized[key] = synthetic_user(value)
+        else:
+            sanitized[key] = sanitize_value(value)
+    return sanitized
+
+
+def sanitize_value(value):
+    """Nested objects are sanitized wherever they appear, including inside arrays."""
+    if isinstance(value, dict):
+        return sanitize(value)
+    if isinstance(value, list):
+        return [sanitize_value(item) for item in value]
+    return value
+
+
+def request_user(scope):
+    for name, value in scope["headers"]:
+        if name == b"authorization" and value.lower().startswith(b"bearer "):
+            try:
+                payload = jwt.decode(value[7:].decode(), settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            except JWTError:
+                return None
+            return synthetic_user(payload.get("id"))
+    return None
+
+
+def parse_body(scope, body: bytes):
+    content_type = dict(scope["headers"]).get(b"content-type", b"")
+    try:
+        if content_type.startswith(b"application/json"):
+            parsed = json.loads(body)
+            return sanitize_value(parsed)
+        if content_type.startswith(b"application/x-www-form-urlencoded"):
+            return {"form": sanitize(dict(parse_qsl(body.decode())))}
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return None
+
+
+class TrafficCaptureMiddleware:
+    """
+    Appends a sanitized trace of each sampled request to an NDJSON file for benchmarks/replay.py.
+
+    A trace holds the route template, path/query params, the JSON or form body, the response
+    status and duration. Credentials and emails are dropped and user identities (token subject,
+    user id params, usernames) are replaced with stable synthetic user ids.
+    """
+
+    def __init__(self, app, path: str, sample_rate: float, max_body: int):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body = max_body
+        self.file = open(path, "a", buffering=1)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        body = bytearray()
+        status_code = None
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= self.max_body:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            route = scope.get("route")
+            trace = {
+                "ts": started_at,
+                "method": scope["method"],
+                "route": getattr(route, "path", scope["path"]),
+                "path_params": sanitize(scope.get("path_params", {})),
+                "query": sanitize(dict(parse_qsl(scope["query_string"].decode()))),
+                "body": parse_body(scope, bytes(body)) if body and len(body) <= self.max_body else None,
+                "user": request_user(scope),
+                "status": status_code,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+            }
+            self.file.write(json.dumps(trace) + "\n")
+
+
+def install_traffic_capture(app):
+    if settings.TRAFFIC_CAPTURE_FILE:
+        logger.info(f"Capturing request traces to {settings.TRAFFIC_CAPTURE_FILE}")
+        app.add_middleware(TrafficCaptureMiddleware,
+                           path=settings.TRAFFIC_CAPTURE_FILE,
+                           sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+                           max_body=settings.TRAFFIC_CAPTURE_MAX_BODY)
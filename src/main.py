@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 
@@ -11,15 +12,37 @@ from fastapi_pagination import add_pagination
 from src.auth.router import router as auth_router
 from src.companies.router import router as company_router
 from src.core.config import settings
-from src.core.redis_config import init_redis_pool, close_redis_pool
+from src.core.memory import install_memory_tracing
+from src.core.mongo_config import init_mongo_client, close_mongo_client
+from src.core.profiling import install_profiling
+from src.core.redis_config import init_redis_pool, close_redis_pool, get_redis
+from src.core.traffic_capture import install_traffic_capture
+from src.notifications.dispatcher import NotificationDispatcher
+from src.notifications.realtime import inbox_broker
+from src.notifications.router import router as notifications_router
 from src.quizzes.router import router as quizzes_router
+from src.tasks.worker import Worker
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     await init_redis_pool()
+    await init_mongo_client()
+    await inbox_broker.start(await get_redis())
     redis = aioredis.from_url(settings.REDIS_URL)
     FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    dispatcher = None
+    if settings.NOTIFICATIONS_DISPATCHER_ENABLED:
+        dispatcher = asyncio.create_task(NotificationDispatcher().run())
+    worker = None
+    if settings.TASKS_WORKER_IN_APP:
+        worker = asyncio.create_task(Worker(settings.TASKS_QUEUES).run())
     yield
+    if dispatcher is not None:
+        dispatcher.cancel()
+    if worker is not None:
+        worker.cancel()
+    await inbox_broker.stop()
+    await close_mongo_client()
     await close_redis_pool()
 app = FastAPI(lifespan=lifespan)
 
@@ -31,9 +54,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+install_profiling(app)
+install_memory_tracing(app)
+install_traffic_capture(app)
+
 app.include_router(auth_router)
 app.include_router(company_router)
 app.include_router(quizzes_router)
+app.include_router(notifications_router)
 
 add_pagination(app)
 
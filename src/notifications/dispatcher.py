@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import smtplib
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import select, update
+
+from src.auth.models import User
+from src.core.config import settings
+from src.database import async_session
+from src.notifications.models import NotificationOutbox, NotificationStatusEnum
+from src.notifications.services import render_notification
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` logged-in SMTP connections open and reuses them across batches."""
+
+    def __init__(self, host, port, user, password, use_tls, size):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.idle = asyncio.Queue()
+        self.semaphore = asyncio.Semaphore(size)
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            connection.starttls()
+        if self.user and self.password:
+            connection.login(self.user, self.password)
+        return connection
+
+    def _send(self, connection, message):
+        try:
+            connection.send_message(message)
+            return connection
+        except smtplib.SMTPServerDisconnected:
+            connection = self._connect()
+            connection.send_message(message)
+            return connection
+
+    async def send(self, message):
+        async with self.semaphore:
+            connection = self.idle.get_nowait() if not self.idle.empty() else None
+            try:
+                if connection is None:
+                    connection = await asyncio.to_thread(self._connect)
+                connection = await asyncio.to_thread(self._send, connection, message)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                # the server answered, so the session is reusable once the transaction is reset
+                if connection is not None and await asyncio.to_thread(self._reset, connection):
+                    self.idle.put_nowait(connection)
+                raise
+            except Exception:
+                if connection is not None:
+                    await asyncio.to_thread(self._close, connection)
+                raise
+            self.idle.put_nowait(connection)
+
+    def _reset(self, connection):
+        try:
+            connection.rset()
+            return True
+        except smtplib.SMTPException:
+            self._close(connection)
+            return False
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.quit()
+        except smtplib.SMTPException:
+            connection.close()
+
+    async def close(self):
+        while not self.idle.empty():
+            await asyncio.to_thread(self._close, self.idle.get_nowait())
+
+
+class RateLimiter:
+    """Token bucket shared by the dispatcher's concurrent sends; a rate of 0 disables it."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class NotificationDispatcher:
+    """
+    Drains the notification outbox in batches outside the request path.
+
+    A batch is claimed in a short transaction that flips due rows to ``sending`` with a lease of
+    NOTIFICATIONS_LEASE_SECONDS, picking them with ``FOR UPDATE SKIP LOCKED`` so several dispatchers
+    can run side by side. The mail goes out with no transaction open, and the outcomes are written
+    in a second short transaction; rows whose lease expired before that are claimed again.
+    Failed deliveries are retried with exponential backoff until NOTIFICATIONS_MAX_ATTEMPTS.
+    Sends are throttled to NOTIFICATIONS_RATE_LIMIT per second and lower-priority fan-out rows
+    are only picked up once no transactional mail is due.
+    """
+
+    def __init__(self, session_maker=async_session, pool=None, rate_limiter=None):
+        self.session_maker = session_maker
+        self.pool = pool or SMTPConnectionPool(settings.EMAIL_HOST, settings.EMAIL_PORT,
+                                               settings.EMAIL_USER, settings.EMAIL_PASSWORD,
+                                               settings.EMAIL_USE_TLS, settings.SMTP_POOL_SIZE)
+        self.rate_limiter = rate_limiter or RateLimiter(settings.NOTIFICATIONS_RATE_LIMIT)
+        self.sent = 0
+        self.failed = 0
+
+    def build_message(self, notification, email):
+        subject, body = render_notification(notification.kind, notification.payload)
+        message = EmailMessage()
+        message["From"] = settings.EMAIL_USER
+        message["To"] = email
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    def backoff(self, attempts):
+        return timedelta(seconds=min(settings.NOTIFICATIONS_BACKOFF_SECONDS * 2 ** (attempts - 1),
+                                     settings.NOTIFICATIONS_MAX_BACKOFF_SECONDS))
+
+    async def claim_batch(self):
+        """Lease one batch of due rows, pending or with an expired lease; returns the lease and (row, email) pairs."""
+        now = datetime.utcnow()
+        lease = now + timedelta(seconds=settings.NOTIFICATIONS_LEASE_SECONDS)
+        due = (
+            select(NotificationOutbox.id)
+            .where(NotificationOutbox.status.in_([NotificationStatusEnum.PENDING.value,
+                                                  NotificationStatusEnum.SENDING.value]),
+                   NotificationOutbox.next_attempt_at <= now)
+            .order_by(NotificationOutbox.priority, NotificationOutbox.id)
+            .limit(settings.NOTIFICATIONS_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_maker() as db:
+            result = await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(due.scalar_subquery()))
+                .values(status=NotificationStatusEnum.SENDING.value, next_attempt_at=lease)
+                .returning(NotificationOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            batch = result.scalars().all()
+            emails = dict((await db.execute(
+                select(User.id, User.email)
+                .where(User.id.in_({notification.recipient_user_id for notification in batch}))
+            )).all())
+            await db.commit()
+        return lease, [(notification, emails[notification.recipient_user_id]) for notification in batch]
+
+    async def record(self, lease, outcomes):
+        """Write the delivery outcomes, skipping rows whose lease ran out and were claimed by another dispatcher."""
+        leased = (NotificationOutbox.status == NotificationStatusEnum.SENDING.value,
+                  NotificationOutbox.next_attempt_at == lease)
+        sent = [notification_id for notification_id, outcome in outcomes if outcome is None]
+        async with self.session_maker() as db:
+            if sent:
+                await db.execute(update(NotificationOutbox)
+                                 .where(NotificationOutbox.id.in_(sent), *leased)
+                                 .values(status=NotificationStatusEnum.SENT.value, sent_at=datetime.utcnow()))
+            for notification_id, outcome in outcomes:
+                if outcome is not None:
+                    await db.execute(update(NotificationOutbox)
+                                     .where(NotificationOutbox.id == notification_id, *leased)
+                                     .values(**outcome))
+            await db.commit()
+
+    async def deliver(self, notification, email):
+        """Send one message; returns the row id and the column values recording a failure, None once sent."""
+        await self.rate_limiter.acquire()
+        try:
+            await self.pool.send(self.build_message(notification, email))
+        except Exception as e:
+            attempts = notification.attempts + 1
+            outcome = {"attempts": attempts, "last_error": str(e)[:255]}
+            if attempts >= settings.NOTIFICATIONS_MAX_ATTEMPTS:
+                outcome["status"] = NotificationStatusEnum.FAILED.value
+            else:
+                outcome["status"] = NotificationStatusEnum.PENDING.value
+                outcome["next_attempt_at"] = datetime.utcnow() + self.backoff(attempts)
+            self.failed += 1
+            logger.warning(f"Notification {notification.id} failed: {e}")
+        else:
+            outcome = None
+            self.sent += 1
+        return notification.id, outcome
+
+    async def dispatch_batch(self):
+        """Send one batch of due notifications; returns how many rows were claimed."""
+        lease, batch = await self.claim_batch()
+        outcomes = await asyncio.gather(*(self.deliver(notification, email) for notification, email in batch))
+        await self.record(lease, outcomes)
+        return len(batch)
+
+    async def run(self):
+        logger.info("Notification dispatcher started")
+        try:
+            while True:
+                try:
+                    claimed = await self.dispatch_batch()
+                except Exception as e:
+                    logger.error(f"Notification batch failed: {e}")
+                    claimed = 0
+                if claimed < settings.NOTIFICATIONS_BATCH_SIZE:
+                    await asyncio.sleep(settings.NOTIFICATIONS_POLL_INTERVAL)
+        finally:
+            await self.pool.close()
@@ -0,0 +1,108 @@
+import time
+from datetime import timezone
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+
+from src.companies.models import CompanyMember
+from src.core.config import settings
+from src.core.redis_config import get_redis
+from src.database import async_session
+from src.notifications.models import NotificationOutbox, NotificationStatusEnum
+from src.tasks.queue import task
+
+FANOUT_PRIORITY = 1
+
+
+def fanout_key(fanout_id):
+    return f"fanout:{fanout_id}"
+
+
+def quiz_fanout_id(quiz_id):
+    return f"quiz-{quiz_id}"
+
+
+@task("notifications.fan_out", queue="notifications")
+async def fan_out_company_notification(fanout_id, company_id, kind, payload, exclude_user_id=None,
+                                       session_maker=async_session, redis=None):
+    """
+    Enqueue one outbox row per company member; runs on the task worker, never in a request.
+
+    Members are streamed in FANOUT_CHUNK_SIZE chunks keyset-paginated on ``company_member.id`` and
+    every chunk is written with one bulk insert. Progress lives in the ``fanout:<id>`` Redis hash;
+    the last member id is stored after each committed chunk, so a retried fan-out resumes there.
+    A chunk committed before its progress was stored is written again, and the unique
+    (fanout_id, recipient_user_id) constraint drops the rows it already has.
+    """
+    redis = redis or await get_redis()
+    key = fanout_key(fanout_id)
+    progress = await redis.hgetall(key)
+    if progress.get("status") == "enqueued":
+        return int(progress["enqueued"])
+    last_member_id = int(progress.get("last_member_id", 0))
+    enqueued = int(progress.get("enqueued", 0))
+
+    async with session_maker() as db:
+        if not progress:
+            total = await db.scalar(select(func.count()).select_from(CompanyMember)
+                                    .where(CompanyMember.company_id == company_id))
+            await redis.hset(key, mapping={"company_id": company_id, "kind": kind, "status": "running",
+                                           "total": total, "enqueued": 0, "last_member_id": 0,
+                                           "started_at": time.time()})
+            await redis.expire(key, settings.FANOUT_PROGRESS_TTL)
+
+        while True:
+            result = await db.execute(
+                select(CompanyMember.id, CompanyMember.user_id)
+                .where(CompanyMember.company_id == company_id, CompanyMember.id > last_member_id)
+                .order_by(CompanyMember.id)
+                .limit(settings.FANOUT_CHUNK_SIZE)
+            )
+            chunk = result.all()
+            if not chunk:
+                break
+            rows = [{"recipient_user_id": user_id, "kind": kind, "payload": payload,
+                     "fanout_id": fanout_id, "priority": FANOUT_PRIORITY}
+                    for _, user_id in chunk if user_id != exclude_user_id]
+            if rows:
+                await db.execute(insert(NotificationOutbox).on_conflict_do_nothing(
+                    index_elements=[NotificationOutbox.fanout_id, NotificationOutbox.recipient_user_id]), rows)
+            await db.commit()
+            last_member_id = chunk[-1].id
+            enqueued += len(rows)
+            await redis.hset(key, mapping={"enqueued": enqueued, "last_member_id": last_member_id})
+
+    await redis.hset(key, mapping={"status": "enqueued", "finished_at": time.time()})
+    return enqueued
+
+
+async def fanout_progress(fanout_id, db, redis):
+    """Enqueue progress from Redis plus delivery counts and rates from the outbox; None for unknown ids."""
+    progress = await redis.hgetall(fanout_key(fanout_id))
+    if not progress:
+        return None
+    result = await db.execute(
+        select(NotificationOutbox.status, func.count(), func.max(NotificationOutbox.sent_at))
+        .where(NotificationOutbox.fanout_id == fanout_id)
+        .group_by(NotificationOutbox.status)
+    )
+    delivery = {status.value: 0 for status in NotificationStatusEnum}
+    last_sent_at = None
+    for status, count, sent_at in result.all():
+        delivery[status] = count
+        last_sent_at = sent_at or last_sent_at
+
+    started_at = float(progress["started_at"])
+    enqueue_seconds = float(progress.get("finished_at", time.time())) - started_at
+    delivery_seconds = last_sent_at.replace(tzinfo=timezone.utc).timestamp() - started_at if last_sent_at else 0
+    return {
+        "fanout_id": fanout_id,
+        "company_id": int(progress["company_id"]),
+        "kind": progress["kind"],
+        "status": progress["status"],
+        "members": int(progress["total"]),
+        "enqueued": int(progress["enqueued"]),
+        "enqueued_per_second": int(progress["enqueued"]) / enqueue_seconds if enqueue_seconds > 0 else None,
+        "delivery": delivery,
+        "delivered_per_second": delivery["sent"] / delivery_seconds if delivery_seconds > 0 else None,
+    }
@@ -0,0 +1,37 @@
+from datetime import datetime
+from enum import Enum
+
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, ForeignKey, JSON, Index, UniqueConstraint
+
+from src.base import Base
+
+
+class NotificationStatusEnum(Enum):
+    PENDING = "pending"
+    # claimed by a dispatcher; next_attempt_at holds the lease expiry until the outcome is written
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class NotificationOutbox(Base):
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        # one row per recipient and fan-out, so a retried chunk cannot notify anyone twice
+        UniqueConstraint('fanout_id', 'recipient_user_id', name='uq_notification_outbox_fanout_id_recipient_user_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    recipient_user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default=NotificationStatusEnum.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(255), nullable=True)
+    next_attempt_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime(), nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime(), nullable=True)
+    # bulk fan-out rows carry their fan-out id and a lower priority than transactional mail
+    fanout_id = Column(String(64), nullable=True)
+    priority = Column(SmallInteger, nullable=False, default=0)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from src.core.config import settings
+from src.core.redis_config import get_redis
+
+logger = logging.getLogger(__name__)
+
+PING = json.dumps({"type": "ping"})
+
+
+def user_inbox_channel(user_id):
+    return f"inbox:user:{user_id}"
+
+
+def company_inbox_channel(company_id):
+    return f"inbox:company:{company_id}"
+
+
+async def publish_inbox_event(channel, event):
+    """Best-effort push; the inbox endpoints stay the source of truth, so failures are only logged."""
+    try:
+        redis = await get_redis()
+        await redis.publish(channel, json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Could not publish inbox event to {channel}: {e}")
+
+
+async def publish_inbox_events(events):
+    """Publish many (channel, event) pairs in one pipeline round trip, best-effort like publish_inbox_event."""
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for channel, event in events:
+                pipe.publish(channel, json.dumps(event))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not publish {len(events)} inbox events: {e}")
+
+
+class InboxConnection:
+    """Bounded send buffer of one socket; the oldest events are dropped when a client falls behind."""
+
+    def __init__(self, buffer_size):
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def push(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class InboxBroker:
+    """
+    Fans Redis pub/sub inbox events out to the sockets connected to this worker.
+
+    Every worker holds a single pub/sub connection and subscribes to a channel only while at least
+    one local socket listens on it, so an idle socket costs a queue and two parked tasks.
+    """
+
+    def __init__(self):
+        self.connections: dict[str, set[InboxConnection]] = {}
+        self.listening = asyncio.Event()
+        # sockets connect concurrently; (un)subscribe commands share one pub/sub connection
+        self.lock = asyncio.Lock()
+        self.pubsub = None
+        self.reader = None
+
+    async def start(self, redis):
+        self.pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        self.reader = asyncio.create_task(self._read())
+
+    async def stop(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.pubsub is not None:
+            await self.pubsub.close()
+
+    async def _read(self):
+        while True:
+            await self.listening.wait()
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                logger.error(f"Inbox pub/sub read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            for connection in self.connections.get(message["channel"], ()):
+                connection.push(message["data"])
+
+    async def subscribe(self, channel, connection):
+        async with self.lock:
+            listeners = self.connections.setdefault(channel, set())
+            if not listeners:
+                await self.pubsub.subscribe(channel)
+            listeners.add(connection)
+            self.listening.set()
+
+    async def unsubscribe(self, channel, connection):
+        async with self.lock:
+            listeners = self.connections.get(channel, set())
+            listeners.discard(connection)
+            if not listeners:
+                self.connections.pop(channel, None)
+                await self.pubsub.unsubscribe(channel)
+            if not self.connections:
+                self.listening.clear()
+
+    @staticmethod
+    async def _receive(websocket: WebSocket):
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    @staticmethod
+    async def _send(websocket: WebSocket, connection: InboxConnection):
+        # the pending get survives heartbeat timeouts, so an event arriving at the deadline is not lost
+        getter = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(connection.queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=settings.INBOX_HEARTBEAT_SECONDS)
+                if done:
+                    event, getter = getter.result(), None
+                else:
+                    event = PING
+                await websocket.send_text(event)
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+    async def serve(self, websocket: WebSocket, channel):
+        connection = InboxConnection(settings.INBOX_SEND_BUFFER)
+        await self.subscribe(channel, connection)
+        tasks = {asyncio.create_task(self._receive(websocket)),
+                 asyncio.create_task(self._send(websocket, connection))}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() and not isinstance(task.exception(),
+                                                                                WebSocketDisconnect):
+                    logger.warning(f"Inbox socket on {channel} closed: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.unsubscribe(channel, connection)
+
+
+inbox_broker = InboxBroker()
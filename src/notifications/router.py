@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, status
+from redis.asyncio.client import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.companies.permissions import is_company_admin
+from src.core.redis_config import get_redis
+from src.database import async_session, get_db_session
+from src.notifications.fanout import fanout_progress
+from src.notifications.realtime import inbox_broker, user_inbox_channel, company_inbox_channel
+from src.utils.utils_auth import get_current_user
+
+router = APIRouter(
+    prefix="/notifications",
+    tags=["notifications"],
+)
+
+
+@router.websocket("/ws/user_inbox")
+async def user_inbox_socket(websocket: WebSocket, token: str):
+    """
+    Push channel for the current user's invitations and application answers.
+
+    :param websocket: The client socket.
+    :param token: The JWT access token, browsers cannot send headers on a WebSocket handshake.
+    """
+    try:
+        user = await get_current_user(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await inbox_broker.serve(websocket, user_inbox_channel(user.get("id")))
+
+
+@router.websocket("/ws/company_inbox/{company_id}")
+async def company_inbox_socket(websocket: WebSocket, company_id: int, token: str):
+    """
+    Push channel for a company's applications and invitation answers, company admins only.
+
+    :param websocket: The client socket.
+    :param company_id: The ID of the company whose inbox is streamed.
+    :param token: The JWT access token.
+    """
+    try:
+        user = await get_current_user(token)
+        async with async_session() as db:
+            await is_company_admin(company_id, user, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    await inbox_broker.serve(websocket, company_inbox_channel(company_id))
+
+
+@router.get("/{company_id}/fanout/{fanout_id}")
+async def get_fanout_progress(company_id: int, fanout_id: str,
+                              company: bool = Depends(is_company_admin),
+                              db: AsyncSession = Depends(get_db_session),
+                              redis: Redis = Depends(get_redis)):
+    """
+    Progress and throughput of a company-wide notification fan-out.
+
+    :param company_id: The ID of the company that started the fan-out.
+    :param fanout_id: The fan-out ID returned when the quiz was created.
+    :param company: Check if the user is an admin of the company.
+    :param db: The database session.
+    :param redis: The Redis client holding the fan-out progress.
+    :return: Members, enqueued rows and delivery counts with their rates.
+    """
+    progress = await fanout_progress(fanout_id, db, redis)
+    if progress is None or progress["company_id"] != company_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fan-out not found")
+    return progress
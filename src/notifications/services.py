@@ -0,0 +1,42 @@
+from sqlalchemy import insert, select, literal
+from sqlalchemy.types import JSON
+
+from src.companies.models import CompanyMember, CompanyRole
+from src.notifications.models import NotificationOutbox
+
+TEMPLATES = {
+    "invitation": ("Invitation to company {company_id}",
+                   "User {sender_user_id} invited you to join company {company_id}."),
+    "invitation_answer": ("Invitation {answer}",
+                          "Your invitation to company {company_id} was {answer}."),
+    "application": ("New application to company {company_id}",
+                    "User {sender_user_id} applied to join company {company_id}."),
+    "application_answer": ("Application {answer}",
+                           "Your application to company {company_id} was {answer}."),
+    "quiz_result": ("Quiz result",
+                    "You answered {result} of {questions_overall} questions of quiz {quiz_id} correctly."),
+    "quiz_published": ("New quiz in company {company_id}",
+                       "Quiz \"{quiz_name}\" ({quiz_id}) was published in company {company_id}."),
+}
+
+
+def render_notification(kind, payload):
+    subject, body = TEMPLATES[kind]
+    return subject.format(**payload), body.format(**payload)
+
+
+def enqueue_notification(db, recipient_user_id, kind, payload):
+    """Stage an outbox row in the caller's session so it commits or rolls back with the caller's changes."""
+    db.add(NotificationOutbox(recipient_user_id=recipient_user_id, kind=kind, payload=payload))
+
+
+async def enqueue_company_admins_notification(db, company_id, kind, payload):
+    """Stage one outbox row per company owner/admin with a single INSERT ... SELECT."""
+    admins = (
+        select(CompanyMember.user_id, literal(kind), literal(payload, JSON))
+        .join(CompanyRole, CompanyMember.role == CompanyRole.id)
+        .where(CompanyMember.company_id == company_id,
+               CompanyRole.name.in_(["owner", "admin"]))
+    )
+    await db.execute(insert(NotificationOutbox).from_select(
+        [NotificationOutbox.recipient_user_id, NotificationOutbox.kind, NotificationOutbox.payload], admins))
@@ -0,0 +1,121 @@
+import json
+import time
+import uuid
+
+from fastapi import HTTPException, status
+from redis.exceptions import WatchError
+
+from src.core.config import settings
+
+ANSWER_FIELD_PREFIX = "answer:"
+SUBMITTED_FIELD = "submitted"
+
+
+def attempt_key(attempt_id):
+    return f"quiz_attempt:{attempt_id}"
+
+
+async def create_attempt(redis, user_id, company_id, quiz_id, max_number, quiz_version=None, questions=None,
+                         answer_key=None, time_limit=None):
+    """
+    Open an attempt as the ``quiz_attempt:<id>`` hash, which expires with the attempt after
+    ``time_limit`` seconds (QUIZ_ATTEMPT_TTL by default); autosaved answers are fields of the same
+    hash, so they expire with it.
+    Attempts on a quiz reference its immutable version. Assembled quizzes have no version, so their
+    questions and answer key are cached in the hash and they are recorded as ``attempt:<id>``.
+    """
+    attempt_id = uuid.uuid4().hex
+    key = attempt_key(attempt_id)
+    time_limit = time_limit or settings.QUIZ_ATTEMPT_TTL
+    started_at = time.time()
+    attempt = {"user_id": user_id, "company_id": company_id, "quiz_id": quiz_id or f"attempt:{attempt_id}",
+               "quiz_version": quiz_version or "", "started_at": started_at, "max_number": max_number}
+    if answer_key is not None:
+        attempt.update(questions=json.dumps(questions), answer_key=json.dumps(answer_key))
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=attempt)
+        pipe.expire(key, time_limit)
+        await pipe.execute()
+    return {"attempt_id": attempt_id, "expires_at": started_at + time_limit}
+
+
+async def save_answer(redis, attempt_id, user_id, company_id, number, answer):
+    """
+    Autosave one answer with a single HSET. The attempt key is watched, so a write racing the
+    attempt's expiry or submission fails instead of recreating the hash without a TTL; an attempt
+    that is being submitted takes no more answers.
+    """
+    key = attempt_key(attempt_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        for _ in range(settings.QUIZ_ATTEMPT_SAVE_RETRIES):
+            try:
+                await pipe.watch(key)
+                owner, company, max_number, submitted = await pipe.hmget(key, "user_id", "company_id", "max_number",
+                                                                         SUBMITTED_FIELD)
+                if owner is None or int(owner) != user_id or int(company) != company_id:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attempt not found or expired")
+                if submitted is not None:
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt already submitted")
+                if not 1 <= number <= int(max_number):
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No such question")
+                pipe.multi()
+                pipe.hset(key, f"{ANSWER_FIELD_PREFIX}{number}", json.dumps(answer))
+                await pipe.execute()
+                return
+            except WatchError:
+                continue
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt is being updated, try again")
+
+
+async def get_attempt(redis, attempt_id, user_id, company_id):
+    """The attempt with its autosaved answers keyed by question number and its remaining lifetime."""
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hgetall(attempt_key(attempt_id))
+        pipe.ttl(attempt_key(attempt_id))
+        attempt, ttl = await pipe.execute()
+    if not attempt or int(attempt["user_id"]) != user_id or int(attempt["company_id"]) != company_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attempt not found or expired")
+    attempt.pop(SUBMITTED_FIELD, None)
+    answers = {}
+    for field in [field for field in attempt if field.startswith(ANSWER_FIELD_PREFIX)]:
+        answers[int(field[len(ANSWER_FIELD_PREFIX):])] = json.loads(attempt.pop(field))
+    attempt["answers"] = answers
+    attempt["quiz_version"] = attempt["quiz_version"] or None
+    attempt["expires_in"] = max(ttl, 0)
+    if "answer_key" in attempt:
+        attempt["questions"] = json.loads(attempt["questions"])
+        attempt["answer_key"] = json.loads(attempt["answer_key"])
+    return attempt
+
+
+async def claim_attempt(redis, attempt_id):
+    """
+    Mark a graded attempt as being submitted, so it is stored at most once even when submitted
+    twice. The hash and its answers stay until finish_attempt, after the result is committed;
+    release_attempt gives the attempt back when storing it failed.
+    """
+    key = attempt_key(attempt_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        for _ in range(settings.QUIZ_ATTEMPT_SAVE_RETRIES):
+            try:
+                await pipe.watch(key)
+                owner, submitted = await pipe.hmget(key, "user_id", SUBMITTED_FIELD)
+                if owner is None:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attempt not found or expired")
+                if submitted is not None:
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt already submitted")
+                pipe.multi()
+                pipe.hset(key, SUBMITTED_FIELD, time.time())
+                await pipe.execute()
+                return
+            except WatchError:
+                continue
+    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt is being updated, try again")
+
+
+async def release_attempt(redis, attempt_id):
+    await redis.hdel(attempt_key(attempt_id), SUBMITTED_FIELD)
+
+
+async def finish_attempt(redis, attempt_id):
+    await redis.delete(attempt_key(attempt_id))
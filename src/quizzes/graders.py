@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from collections import OrderedDict
+
+from src.core.config import settings
+
+# question type -> compiler turning one answer key into a matcher(answer) -> score in [0, 1]
+GRADERS = {}
+
+# compiled answer keys by quiz version; versions never change, so like the version cache this LRU needs no invalidation
+COMPILED_ANSWER_KEYS = OrderedDict()
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def grader(question_type):
+    def register(compiler):
+        GRADERS[question_type] = compiler
+        return compiler
+    return register
+
+
+def as_options(answer):
+    """Option indexes of a choice answer, None when the answer is not one; validated lists only hold ints."""
+    if type(answer) is list:
+        return answer
+    if type(answer) is int:
+        return (answer,)
+    return None
+
+
+def as_number(answer):
+    if isinstance(answer, bool):
+        return None
+    if isinstance(answer, (int, float)):
+        return answer
+    try:
+        return float(answer)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_text(text):
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+@grader("choice")
+def compile_choice(key):
+    options = frozenset(key["options"])
+
+    def match(answer):
+        answer = as_options(answer)
+        return 1.0 if answer is not None and frozenset(answer) == options else 0.0
+    return match
+
+
+@grader("multi_select")
+def compile_multi_select(key):
+    """Each right option earns its share of the point and each wrong one takes a share back, down to zero."""
+    options = frozenset(key["options"])
+    share = 1.0 / len(options)
+
+    def match(answer):
+        answer = as_options(answer)
+        if answer is None:
+            return 0.0
+        chosen = frozenset(answer)
+        return max(0.0, (len(chosen & options) - len(chosen - options)) * share)
+    return match
+
+
+@grader("sequence")
+def compile_sequence(key):
+    order = tuple(key["order"])
+
+    def match(answer):
+        answer = as_options(answer)
+        return 1.0 if answer is not None and tuple(answer) == order else 0.0
+    return match
+
+
+@grader("range")
+def compile_range(key):
+    low, high = key["min"], key["max"]
+
+    def match(answer):
+        number = as_number(answer)
+        return 1.0 if number is not None and low <= number <= high else 0.0
+    return match
+
+
+@grader("text")
+def compile_text(key):
+    """
+    Answers are compared NFKC-normalized, casefolded and with whitespace collapsed; patterns are
+    NFKC-normalized and match case-insensitively. Answers longer than QUIZ_TEXT_ANSWER_MAX_LENGTH
+    never reach a pattern and score 0.
+    """
+    accepted = frozenset(normalize_text(text) for text in key.get("accepted", ()))
+    patterns = [re.compile(unicodedata.normalize("NFKC", pattern), re.IGNORECASE)
+                for pattern in key.get("patterns", ())]
+    max_length = settings.QUIZ_TEXT_ANSWER_MAX_LENGTH
+
+    def match(answer):
+        if not isinstance(answer, str) or len(answer) > max_length:
+            return 0.0
+        answer = normalize_text(answer)
+        if answer in accepted or any(pattern.fullmatch(answer) for pattern in patterns):
+            return 1.0
+        return 0.0
+    return match
+
+
+def compile_key(key):
+    """A plain list of option indexes is the original exact-choice key."""
+    if isinstance(key, list):
+        return compile_choice({"options": key})
+    return GRADERS[key["type"]](key)
+
+
+def compile_answer_key(answer_key):
+    return {number: compile_key(key) for number, key in answer_key.items()}
+
+
+def compiled_answer_key(version, answer_key):
+    """Matchers of a quiz version, compiled once per version and kept in an in-process LRU."""
+    if version in COMPILED_ANSWER_KEYS:
+        COMPILED_ANSWER_KEYS.move_to_end(version)
+        return COMPILED_ANSWER_KEYS[version]
+    matchers = compile_answer_key(answer_key)
+    COMPILED_ANSWER_KEYS[version] = matchers
+    if len(COMPILED_ANSWER_KEYS) > settings.QUIZ_VERSION_CACHE_SIZE:
+        COMPILED_ANSWER_KEYS.popitem(last=False)
+    return matchers
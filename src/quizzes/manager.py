@@ -1,18 +1,38 @@
+import hashlib
+import json
+from collections import OrderedDict
 from typing import List, Dict
 
 import pymongo
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 
 from motor.motor_asyncio import AsyncIOMotorCollection
 from pydantic import BaseModel, Field, conint
-from pymongo.errors import PyMongoError
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from src.core.config import settings
+
+# the fields a version is addressed by; everything else on the quiz document is bookkeeping
+VERSIONED_FIELDS = ("company_id", "name", "description", "questions", "correct_answers")
+
+# versions never change, so this in-process LRU needs no invalidation
+QUIZ_VERSION_CACHE = OrderedDict()
 
 
 class QuizNotFound(Exception):
     pass
 
 
+class InvalidCursor(Exception):
+    pass
+
+
+class QuizEditConflict(Exception):
+    pass
+
+
 class MongoManager:
 
     @classmethod
@@ -43,6 +63,13 @@ class MongoManager:
     #     return cls.id_to_string(document)
 
 
+def quiz_version_hash(quiz_id, quiz):
+    content = {field: quiz.get(field) for field in VERSIONED_FIELDS}
+    content["quiz_id"] = str(quiz_id)
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
 class QuizManager(MongoManager):
 
     @classmethod
@@ -72,11 +99,137 @@ class QuizManager(MongoManager):
             return cls.id_to_string(existing_quiz)
         raise ValueError("Invalid Quiz id")
 
+    @classmethod
+    def versions(cls, db):
+        return db.database[settings.MONGO_VERSIONS_COLLECTION]
+
+    @classmethod
+    def version_document(cls, quiz_id, quiz):
+        document = {field: quiz.get(field) for field in VERSIONED_FIELDS}
+        document.update(quiz_id=str(quiz_id), created_at=datetime.utcnow())
+        return document
+
+    @classmethod
+    async def save_version(cls, db, quiz_id, quiz):
+        """Store the immutable version of ``quiz``; saving identical content again is a no-op."""
+        version = quiz_version_hash(quiz_id, quiz)
+        await cls.versions(db).update_one({"_id": version}, {"$setOnInsert": cls.version_document(quiz_id, quiz)},
+                                          upsert=True)
+        return version
+
+    @classmethod
+    async def commit_version(cls, db, document):
+        """
+        Version an edited quiz document and move its current pointer there, unless a newer edit
+        (a higher revision) got in first and owns the pointer.
+        """
+        version = await cls.save_version(db, document["_id"], document)
+        await db.update_one({"_id": ObjectId(document["_id"]), "revision": document.get("revision")},
+                            {"$set": {"version": version}})
+        document["version"] = version
+        return document
+
+    @classmethod
+    async def get_current_version(cls, db, quiz_id):
+        """The mutable pointer of a quiz; quizzes created before versioning get their first version here."""
+        if not ObjectId.is_valid(quiz_id):
+            raise ValueError("Invalid Quiz id")
+        pointer = await db.find_one({"_id": ObjectId(quiz_id)},
+                                    projection={"company_id": 1, "version": 1, "time_limit": 1})
+        if not pointer:
+            raise QuizNotFound("Quiz not found")
+        if not pointer.get("version"):
+            pointer = await cls.commit_version(db, await db.find_one({"_id": ObjectId(quiz_id)}))
+        return {"quiz_id": str(pointer["_id"]), "company_id": pointer["company_id"], "version": pointer["version"],
+                "time_limit": pointer.get("time_limit")}
+
+    @classmethod
+    async def get_quiz_version(cls, db, version):
+        if version in QUIZ_VERSION_CACHE:
+            QUIZ_VERSION_CACHE.move_to_end(version)
+            return QUIZ_VERSION_CACHE[version]
+        document = await cls.versions(db).find_one({"_id": version})
+        if not document:
+            raise QuizNotFound("Quiz version not found")
+        QUIZ_VERSION_CACHE[version] = document
+        if len(QUIZ_VERSION_CACHE) > settings.QUIZ_VERSION_CACHE_SIZE:
+            QUIZ_VERSION_CACHE.popitem(last=False)
+        return document
+
+    @classmethod
+    async def get_version_questions(cls, db, version, offset, limit):
+        """
+        A window of a version's questions without answer keys. A version cached in-process is
+        sliced in memory, otherwise only the window leaves Mongo through a $slice projection.
+        """
+        if version in QUIZ_VERSION_CACHE:
+            document = QUIZ_VERSION_CACHE[version]
+            return {"quiz_id": document["quiz_id"], "company_id": document["company_id"],
+                    "total": len(document["questions"]), "questions": document["questions"][offset:offset + limit]}
+        documents = await cls.versions(db).aggregate([
+            {"$match": {"_id": version}},
+            {"$project": {"_id": 0, "quiz_id": 1, "company_id": 1, "total": {"$size": "$questions"},
+                          "questions": {"$slice": ["$questions", offset, limit]}}},
+        ]).to_list(length=1)
+        if not documents:
+            raise QuizNotFound("Quiz version not found")
+        return documents[0]
+
+    @classmethod
+    async def get_version_summary(cls, db, version):
+        """Name, description and question count of a version, without any question."""
+        if version in QUIZ_VERSION_CACHE:
+            document = QUIZ_VERSION_CACHE[version]
+            return {**{field: document[field] for field in ("quiz_id", "company_id", "name", "description",
+                                                           "created_at")},
+                    "questions_count": len(document["questions"])}
+        documents = await cls.versions(db).aggregate([
+            {"$match": {"_id": version}},
+            {"$project": {"_id": 0, "quiz_id": 1, "company_id": 1, "name": 1, "description": 1, "created_at": 1,
+                          "questions_count": {"$size": "$questions"}}},
+        ]).to_list(length=1)
+        if not documents:
+            raise QuizNotFound("Quiz version not found")
+        return documents[0]
+
     @classmethod
     async def create_quiz(cls, db, quiz_data):
+        quiz_data["_id"] = ObjectId()
+        quiz_data["revision"] = 1
+        quiz_data["version"] = await cls.save_version(db, quiz_data["_id"], quiz_data)
         new_quiz_id = await db.insert_one(quiz_data)
         return await cls.get_quiz(db, new_quiz_id.inserted_id)
 
+    @classmethod
+    async def insert_quizzes(cls, db, quizzes):
+        """
+        Version and insert a batch of new quizzes with unordered bulk writes, so one bad document
+        does not stop the rest.
+
+        Returns:
+            The number of inserted quizzes and the write errors by index into ``quizzes``.
+        """
+        errors, versions = {}, []
+        for quiz in quizzes:
+            quiz["_id"], quiz["revision"] = ObjectId(), 1
+            quiz["version"] = quiz_version_hash(quiz["_id"], quiz)
+            versions.append({"_id": quiz["version"], **cls.version_document(quiz["_id"], quiz)})
+        try:
+            await cls.versions(db).insert_many(versions, ordered=False)
+        except BulkWriteError as e:
+            errors.update({error["index"]: error["errmsg"] for error in e.details["writeErrors"]})
+        # a quiz whose version could not be stored would point at nothing
+        batch = [index for index in range(len(quizzes)) if index not in errors]
+        if not batch:
+            return 0, errors
+        try:
+            result = await db.insert_many([quizzes[index] for index in batch], ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details["nInserted"]
+            errors.update({batch[error["index"]]: error["errmsg"] for error in e.details["writeErrors"]})
+        return inserted, errors
+
     @classmethod
     async def get_all_quizzes(cls, db):
         quizzes = db.find()
@@ -113,6 +266,39 @@ class QuizManager(MongoManager):
             "total_count": total_count
         }
 
+    @classmethod
+    async def search_quizzes(cls, db, company_id, text, after=None, limit=20):
+        """
+        Rank a company's quizzes against ``text`` with the quiz text index.
+
+        Pages are ordered by text score, then _id; ``after`` is the cursor of the previous page.
+        """
+        pipeline = [
+            {"$match": {"company_id": company_id, "$text": {"$search": text}}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if after:
+            try:
+                score, quiz_id = after.split(":")
+                score, quiz_id = float(score), ObjectId(quiz_id)
+            except (ValueError, InvalidId):
+                raise InvalidCursor(after)
+            pipeline.append({"$match": {"$or": [{"score": {"$lt": score}},
+                                                 {"score": score, "_id": {"$gt": quiz_id}}]}})
+        pipeline += [
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": limit + 1},
+            {"$project": {"name": 1, "description": 1, "created_at": 1, "score": 1,
+                          "questions_count": {"$size": {"$ifNull": ["$questions", []]}}}},
+        ]
+        documents = await db.aggregate(pipeline).to_list(length=limit + 1)
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        return {
+            "items": [cls.id_to_string(document) for document in documents],
+            "next_cursor": f"{documents[-1]['score']!r}:{documents[-1]['_id']}" if has_more else None,
+        }
+
     @classmethod
     async def update_quiz(cls, db, quiz_id, update_data):
         document = await db.find_one_and_update(
@@ -120,12 +306,129 @@ class QuizManager(MongoManager):
                 "_id": ObjectId(quiz_id)
             },
             {
-                "$set": update_data
+                "$set": update_data,
+                "$inc": {"revision": 1}
             },
             return_document=pymongo.ReturnDocument.AFTER
         )
+        if not document:
+            raise QuizNotFound("Quiz not found")
+        return cls.id_to_string(await cls.commit_version(db, document))
+
+
+    @classmethod
+    async def edit_quiz(cls, db, query, update, projection, array_filters=None):
+        """
+        Apply a partial update to one quiz and return only ``projection`` of the result.
+
+        The edit bumps the revision and drops the version pointer instead of hashing the whole
+        quiz on the write path; get_current_version versions the edited quiz on its next read.
+        """
+        if isinstance(update, list):
+            update = update + [{"$set": {"revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}},
+                               {"$unset": "version"}]
+        else:
+            update = {**update, "$inc": {"revision": 1}, "$unset": {**update.get("$unset", {}), "version": ""}}
+        document = await db.find_one_and_update(query, update, projection={**projection, "revision": 1},
+                                                array_filters=array_filters,
+                                                return_document=pymongo.ReturnDocument.AFTER)
         return cls.id_to_string(document)
 
+    @classmethod
+    def question_fragment(cls, document, number):
+        return {
+            "quiz_id": document["_id"],
+            "revision": document["revision"],
+            "question": document["questions"][0],
+            "correct_answers": document.get("correct_answers", {}).get(str(number)),
+        }
+
+    @classmethod
+    async def add_question(cls, db, company_id, quiz_id, question, correct_answers, position=None):
+        """Append (or insert at ``position``) a question under the next free number."""
+        for _ in range(3):
+            numbers = await db.aggregate([
+                {"$match": {"_id": ObjectId(quiz_id), "company_id": company_id}},
+                {"$project": {"number": {"$max": "$questions.number"}}},
+            ]).to_list(length=1)
+            if not numbers:
+                raise QuizNotFound("Quiz not found")
+            number = (numbers[0]["number"] or 0) + 1
+            push = {"$each": [{**question, "number": number}]}
+            if position is not None:
+                push["$position"] = position
+            # a concurrent add that took the same number makes the filter miss, so pick the next one
+            document = await cls.edit_quiz(
+                db,
+                {"_id": ObjectId(quiz_id), "company_id": company_id, "questions.number": {"$ne": number}},
+                {"$push": {"questions": push}, "$set": {f"correct_answers.{number}": correct_answers}},
+                {"questions": {"$elemMatch": {"number": number}}, f"correct_answers.{number}": 1})
+            if document:
+                return cls.question_fragment(document, number)
+        raise QuizEditConflict("Too many concurrent question additions")
+
+    @classmethod
+    async def update_question(cls, db, company_id, quiz_id, number, changes, correct_answers=None):
+        update = {f"questions.$[question].{field}": value for field, value in changes.items()}
+        if correct_answers is not None:
+            update[f"correct_answers.{number}"] = correct_answers
+        document = await cls.edit_quiz(
+            db,
+            {"_id": ObjectId(quiz_id), "company_id": company_id, "questions.number": number},
+            {"$set": update},
+            {"questions": {"$elemMatch": {"number": number}}, f"correct_answers.{number}": 1},
+            array_filters=[{"question.number": number}] if changes else None)
+        if not document:
+            raise QuizNotFound("Question not found")
+        return cls.question_fragment(document, number)
+
+    @classmethod
+    async def get_question(cls, db, company_id, quiz_id, number):
+        """One question of a quiz with its answer key, None when there is no such question."""
+        document = await db.find_one(
+            {"_id": ObjectId(quiz_id), "company_id": company_id, "questions.number": number},
+            projection={"questions": {"$elemMatch": {"number": number}}, f"correct_answers.{number}": 1})
+        if not document:
+            return None
+        return document["questions"][0], document.get("correct_answers", {}).get(str(number))
+
+    @classmethod
+    async def move_question(cls, db, company_id, quiz_id, number, position):
+        """Move a question to ``position``; numbers, and so the answer keys, stay as they are."""
+        questions = {"$filter": {"input": "$questions", "cond": {"$ne": ["$$this.number", number]}}}
+        moved = {"$filter": {"input": "$questions", "cond": {"$eq": ["$$this.number", number]}}}
+        document = await cls.edit_quiz(
+            db,
+            {"_id": ObjectId(quiz_id), "company_id": company_id, "questions.number": number},
+            [{"$set": {"questions": {"$let": {
+                "vars": {"rest": questions, "moved": moved},
+                "in": {"$concatArrays": [
+                    {"$slice": ["$$rest", position]},
+                    "$$moved",
+                    {"$slice": ["$$rest", position, {"$max": [1, {"$size": "$$rest"}]}]},
+                ]},
+            }}}}],
+            {"questions.number": 1})
+        if not document:
+            raise QuizNotFound("Question not found")
+        return {"quiz_id": document["_id"], "revision": document["revision"],
+                "order": [question["number"] for question in document["questions"]]}
+
+    @classmethod
+    async def remove_question(cls, db, company_id, quiz_id, number):
+        document = await cls.edit_quiz(
+            db,
+            # a quiz keeps at least two questions
+            {"_id": ObjectId(quiz_id), "company_id": company_id, "questions.number": number,
+             "questions.2": {"$exists": True}},
+            {"$pull": {"questions": {"number": number}}, "$unset": {f"correct_answers.{number}": ""}},
+            {"_id": 1})
+        if document:
+            return {"quiz_id": document["_id"], "revision": document["revision"], "removed": number}
+        if await cls.check_if_exist(db, {"_id": ObjectId(quiz_id), "company_id": company_id,
+                                         "questions.number": number}):
+            raise QuizEditConflict("A quiz needs at least two questions")
+        raise QuizNotFound("Question not found")
 
     @classmethod
     async def delete_quiz(cls,db, quiz_id):
@@ -148,3 +451,40 @@ class QuizManager(MongoManager):
     async def quiz_filter(cls, db, query, projection=None):
         cursor = db.find(query, projection)
         return await cls.to_list(cursor)
+
+
+class QuestionBankManager(MongoManager):
+    """Company question banks; every document is one question with its answer key and tags."""
+
+    @classmethod
+    def collection(cls, db):
+        return db.database[settings.MONGO_QUESTION_BANK_COLLECTION]
+
+    @classmethod
+    async def add_questions(cls, db, company_id, questions):
+        result = await cls.collection(db).insert_many([{**question, "company_id": company_id}
+                                                       for question in questions])
+        return [str(question_id) for question_id in result.inserted_ids]
+
+    @classmethod
+    async def delete_question(cls, db, company_id, question_id):
+        if not ObjectId.is_valid(question_id):
+            raise ValueError("Invalid question id")
+        result = await cls.collection(db).delete_one({"_id": ObjectId(question_id), "company_id": company_id})
+        if not result.deleted_count:
+            raise QuizNotFound("Question not found")
+
+    @classmethod
+    async def get_questions(cls, db, question_ids):
+        """Bank questions by id; ids of deleted questions are left out."""
+        ids = [ObjectId(question_id) for question_id in question_ids if ObjectId.is_valid(question_id)]
+        return await cls.to_list(cls.collection(db).find({"_id": {"$in": ids}},
+                                                         projection={"text": 1, "answers": 1}))
+
+    @classmethod
+    async def sample_questions(cls, db, company_id, tags, size):
+        """Draw ``size`` random questions carrying all ``tags`` with $sample on the (company_id, tags) index."""
+        match = {"company_id": company_id}
+        if tags:
+            match["tags"] = {"$all": tags}
+        return await cls.to_list(cls.collection(db).aggregate([{"$match": match}, {"$sample": {"size": size}}]))
@@ -1,16 +1,37 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime, String, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 
 from src.database import Base
 
 
 class QuizResults(Base):
     __tablename__ = 'quiz_result'
+    __table_args__ = (
+        Index('ix_quiz_result_company_id_id', 'company_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     quiz_id = Column(String)
+    # content hash of the quiz version the answers were graded against
+    quiz_version = Column(String(64), nullable=True)
     user_id = Column(Integer, ForeignKey('user.id'))
     company_id = Column(Integer, ForeignKey('company.id'))
     result = Column(Float, nullable=False)
     questions_overall = Column(Integer)
     quiz_date = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class QuizResultDetail(Base):
+    __tablename__ = 'quiz_result_detail'
+    __table_args__ = (
+        Index('ix_quiz_result_detail_answers', 'answers', postgresql_using='gin',
+              postgresql_ops={'answers': 'jsonb_path_ops'}),
+    )
+
+    result_id = Column(Integer, ForeignKey('quiz_result.id', ondelete='CASCADE'), primary_key=True)
+    # answer and score per question number, e.g. {"1": [0, 2], "2": 3.14} and {"1": 0.5, "2": 1.0}
+    answers = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+    scores = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+    # bank question id per number of assembled quizzes, which have no version to read them from
+    question_ids = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
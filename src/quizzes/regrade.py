@@ -0,0 +1,329 @@
+import json
+import logging
+import time
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+from sqlalchemy import insert, select, update
+
+from src.core.config import settings
+from src.core.mongo_config import get_mongo_database
+from src.core.redis_config import get_redis
+from src.database import async_session
+from src.quizzes.graders import as_number, compiled_answer_key
+from src.quizzes.manager import QuizManager, QuizNotFound
+from src.quizzes.models import QuizResults, QuizResultDetail
+from src.tasks.queue import task
+
+logger = logging.getLogger(__name__)
+
+# question type -> column scorer(key, answers) -> float64 scores; other types fall back to their compiled matcher
+COLUMN_GRADERS = {}
+
+COUNTERS = ("scanned", "changed", "missing")
+
+
+def column_grader(question_type):
+    def register(scorer):
+        COLUMN_GRADERS[question_type] = scorer
+        return scorer
+    return register
+
+
+def regrade_key(quiz_id):
+    return f"quiz_regrade:{quiz_id}"
+
+
+def regrade_lock_key(quiz_id):
+    """Held while a regrade runs; it expires a visibility timeout after the last batch, so a lost task frees it."""
+    return f"quiz_regrade_lock:{quiz_id}"
+
+
+def answer_types(answers):
+    return np.fromiter(map(type, answers), dtype=object, count=len(answers))
+
+
+def option_masks(answers):
+    """
+    Chosen options of every answer as a uint64 bitmask; an empty or non-choice answer is 0.
+
+    The option lists of the whole column are flattened into one index array and OR-ed into
+    their rows with one ufunc call instead of a Python loop per answer.
+    """
+    kinds = answer_types(answers)
+    lists, singles = kinds == list, kinds == int
+    chosen = answers[lists]
+    lengths = np.fromiter(map(len, chosen), dtype=np.intp, count=len(chosen))
+    options = np.concatenate([np.fromiter(chain.from_iterable(chosen), dtype=np.int64, count=int(lengths.sum())),
+                              answers[singles].astype(np.int64)])
+    if len(options) and (options.min() < 0 or options.max() >= 64):
+        raise OverflowError(options.max())
+    masks = np.zeros(len(answers), dtype=np.uint64)
+    rows = np.concatenate([np.repeat(np.flatnonzero(lists), lengths), np.flatnonzero(singles)])
+    np.bitwise_or.at(masks, rows, np.left_shift(np.uint64(1), options.astype(np.uint64)))
+    return masks
+
+
+def key_mask(options):
+    return np.uint64(sum(1 << option for option in set(options)))
+
+
+@column_grader("choice")
+def score_choice(key, answers):
+    return (option_masks(answers) == key_mask(key["options"])).astype(np.float64)
+
+
+@column_grader("multi_select")
+def score_multi_select(key, answers):
+    masks, options = option_masks(answers), key_mask(key["options"])
+    right = np.bitwise_count(masks & options).astype(np.int16)
+    wrong = np.bitwise_count(masks & ~options).astype(np.int16)
+    return np.clip((right - wrong) / len(set(key["options"])), 0.0, None)
+
+
+@column_grader("range")
+def score_range(key, answers):
+    """Numeric answers are cast as one array; only answers sent as strings are parsed one by one."""
+    kinds = answer_types(answers)
+    numeric, strings = (kinds == int) | (kinds == float), kinds == str
+    numbers = np.full(len(answers), np.nan)
+    numbers[numeric] = answers[numeric].astype(np.float64)
+    numbers[strings] = [np.nan if (number := as_number(answer)) is None else number for answer in answers[strings]]
+    return ((numbers >= key["min"]) & (numbers <= key["max"])).astype(np.float64)
+
+
+def score_column(key, match, answers):
+    key = {"type": "choice", "options": key} if isinstance(key, list) else key
+    scorer = COLUMN_GRADERS.get(key["type"])
+    if scorer is not None:
+        try:
+            return scorer(key, answers)
+        except OverflowError:
+            pass
+    return np.fromiter(map(match, answers), dtype=np.float64, count=len(answers))
+
+
+def question_column(rows, number, default, dtype=object):
+    """
+    The value of question ``number`` in every row dict as one array. The rows are read with a
+    mapped itemgetter rather than a comprehension; only when one lacks the number does the column
+    fall back to ``dict.get`` with ``default``.
+    """
+    try:
+        return np.fromiter(map(itemgetter(str(number)), rows), dtype=dtype, count=len(rows))
+    except KeyError:
+        return np.fromiter((row.get(str(number), default) for row in rows), dtype=dtype, count=len(rows))
+
+
+def score_matrix(answer_key, matchers, numbers, answers):
+    """Scores of ``answers`` (one column of answers per question number) as an (attempts, questions) matrix."""
+    return np.column_stack([score_column(answer_key[str(number)], matchers[str(number)], column)
+                            for number, column in zip(numbers, answers)])
+
+
+class QuizRegrade:
+    """
+    Re-scores every stored result of a quiz against the answer key of its current version.
+
+    Results are streamed in id order, QUIZ_REGRADE_BATCH_SIZE at a time; each batch becomes one
+    object array of answers per question, scored column by column with NumPy, and only changed
+    scores are written back. Choice and multi_select columns are scored as option bitmasks and
+    range columns as a float array. Sequence and text answers, range answers sent as strings and
+    choice options outside 0-63 fall back to the compiled matcher, one answer at a time.
+    Progress and the last processed id live in the ``quiz_regrade:<id>`` hash, so a run that ran
+    out of time continues where it stopped.
+    """
+
+    def __init__(self, company_id, quiz_id, version, session_maker, redis, mongo, deadline):
+        self.company_id = company_id
+        self.quiz_id = quiz_id
+        self.version = version
+        self.session_maker = session_maker
+        self.redis = redis
+        self.mongo = mongo
+        self.deadline = deadline
+        self.key = regrade_key(quiz_id)
+        self.lock_key = regrade_lock_key(quiz_id)
+
+    async def compatible_versions(self, numbers):
+        """Versions with the same question numbers as the current one; other results cannot be re-scored."""
+        async with self.session_maker() as db:
+            versions = (await db.execute(select(QuizResults.quiz_version).distinct().where(
+                QuizResults.company_id == self.company_id, QuizResults.quiz_id == self.quiz_id))).scalars().all()
+        compatible = []
+        for version in filter(None, versions):
+            try:
+                document = await QuizManager.get_quiz_version(self.mongo, version)
+            except QuizNotFound:
+                logger.warning(f"Quiz {self.quiz_id} version {version} is missing, its results are not regraded")
+                continue
+            if sorted(question["number"] for question in document["questions"]) == numbers:
+                compatible.append(version)
+        return compatible, None in versions
+
+    async def fetch_batch(self, last_id, versions, unversioned):
+        in_versions = QuizResults.quiz_version.in_(versions)
+        async with self.session_maker() as db:
+            rows = (await db.execute(
+                select(QuizResults.id, QuizResults.user_id, QuizResults.result, QuizResultDetail.answers,
+                       QuizResultDetail.scores)
+                .outerjoin(QuizResultDetail, QuizResultDetail.result_id == QuizResults.id)
+                .where(QuizResults.company_id == self.company_id, QuizResults.quiz_id == self.quiz_id,
+                       QuizResults.id > last_id,
+                       (in_versions | QuizResults.quiz_version.is_(None)) if unversioned else in_versions)
+                .order_by(QuizResults.id)
+                .limit(settings.QUIZ_REGRADE_BATCH_SIZE))).all()
+        return rows
+
+    async def blob_answers(self, rows):
+        """Answers of results stored before quiz_result_detail, from their Redis blob while it lasts."""
+        if not rows:
+            return []
+        blobs = await self.redis.mget([f"Company {self.company_id} {row.user_id} {self.quiz_id} {row.id}"
+                                       for row in rows])
+        found = []
+        for row, blob in zip(rows, blobs):
+            if blob:
+                blob = json.loads(blob)
+                found.append((row, {key[len("Question "):]: value["answer"] for key, value in blob.items()
+                                    if key.startswith("Question ")}))
+        return found
+
+    async def regrade_batch(self, rows, answer_key, matchers, numbers):
+        stored = [(row, row.answers) for row in rows if row.answers is not None]
+        from_blobs = await self.blob_answers([row for row in rows if row.answers is None])
+        found = stored + from_blobs
+        if not found:
+            return 0, len(rows)
+        answers = [row_answers for _, row_answers in found]
+        scores = score_matrix(answer_key, matchers, numbers,
+                              [question_column(answers, number, []) for number in numbers])
+        totals = scores.sum(axis=1)
+        old = np.fromiter((row.result for row, _ in found), dtype=np.float64, count=len(found))
+        changed = np.flatnonzero(~np.isclose(totals, old))
+        # a result can keep its total while single questions flip, so the detail is compared per question
+        old_scores = [row.scores or {} for row, _ in stored]
+        old_scores = np.column_stack([question_column(old_scores, number, np.nan, np.float64)
+                                      for number in numbers]).reshape(len(stored), len(numbers))
+        rescored = np.flatnonzero(np.any(~np.isclose(scores[:len(stored)], old_scores), axis=1))
+        # every result whose scores were written is graded by this version now, not just those whose total moved
+        versioned = np.setdiff1d(np.union1d(rescored, np.arange(len(stored), len(found))), changed)
+
+        def detail(index):
+            row, row_answers = found[index]
+            return {"result_id": row.id, "answers": row_answers,
+                    "scores": {str(number): float(scores[index, column]) for column, number in enumerate(numbers)}}
+
+        async with self.session_maker() as db:
+            if len(changed):
+                await db.execute(update(QuizResults), [
+                    {"id": found[index][0].id, "result": float(totals[index]), "quiz_version": self.version}
+                    for index in changed])
+            if len(versioned):
+                await db.execute(update(QuizResults), [
+                    {"id": found[index][0].id, "quiz_version": self.version} for index in versioned])
+            if len(rescored):
+                await db.execute(update(QuizResultDetail), [
+                    {key: value for key, value in detail(index).items() if key != "answers"} for index in rescored])
+            if from_blobs:
+                # results regraded from a blob keep their answers for good
+                await db.execute(insert(QuizResultDetail), [detail(index) for index in range(len(stored), len(found))])
+            await db.commit()
+        return len(changed), len(rows) - len(found)
+
+    async def run(self):
+        quiz = await QuizManager.get_quiz_version(self.mongo, self.version)
+        answer_key = quiz["correct_answers"]
+        matchers = compiled_answer_key(self.version, answer_key)
+        numbers = sorted(question["number"] for question in quiz["questions"])
+        versions, unversioned = await self.compatible_versions(numbers)
+        last_id = int(await self.redis.hget(self.key, "last_id") or 0)
+        while True:
+            if time.monotonic() > self.deadline:
+                return False
+            rows = await self.fetch_batch(last_id, versions, unversioned)
+            if not rows:
+                break
+            changed, missing = await self.regrade_batch(rows, answer_key, matchers, numbers)
+            last_id = rows[-1].id
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hincrby(self.key, "scanned", len(rows))
+                pipe.hincrby(self.key, "changed", changed)
+                pipe.hincrby(self.key, "missing", missing)
+                pipe.hset(self.key, "last_id", last_id)
+                pipe.expire(self.lock_key, settings.TASKS_VISIBILITY_TIMEOUT)
+                await pipe.execute()
+        await self.finish("done")
+        return True
+
+    async def finish(self, status, error=None):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.key, mapping={"status": status, "finished_at": time.time(),
+                                         **({"error": error[:255]} if error else {})})
+            pipe.delete(self.lock_key)
+            await pipe.execute()
+
+
+@task("quizzes.regrade", queue="default")
+async def regrade_quiz(quiz_id, session_maker=async_session, redis=None, mongo=None):
+    """
+    Re-score the stored results of a quiz after its answer key changed. A run stops at half the
+    visibility timeout and queues its own continuation, like the company purge. A run that fails
+    marks the regrade as failed and releases it instead of being retried, so it can be started again.
+    """
+    redis = redis or await get_redis()
+    progress = await redis.hgetall(regrade_key(quiz_id))
+    if progress.get("status") != "running":
+        return
+    regrade = QuizRegrade(int(progress["company_id"]), quiz_id, progress["version"], session_maker, redis,
+                          mongo or await get_mongo_database(), time.monotonic() + settings.TASKS_VISIBILITY_TIMEOUT / 2)
+    try:
+        finished = await regrade.run()
+    except Exception as e:
+        logger.exception(f"Quiz {quiz_id} regrade failed")
+        await regrade.finish("failed", repr(e))
+        return
+    if not finished:
+        logger.info(f"Quiz {quiz_id} regrade paused at result {await redis.hget(regrade.key, 'last_id')}")
+        await regrade_quiz.enqueue(quiz_id, priority="low", redis=redis)
+        return
+    logger.info(f"Quiz {quiz_id} regrade finished: {await redis.hgetall(regrade.key)}")
+
+
+async def start_quiz_regrade(company_id, quiz_id, version, started_by, redis=None):
+    """Returns False when a regrade of the quiz is already running, i.e. someone else holds its lock."""
+    redis = redis or await get_redis()
+    key = regrade_key(quiz_id)
+    if not await redis.set(regrade_lock_key(quiz_id), started_by, nx=True, ex=settings.TASKS_VISIBILITY_TIMEOUT):
+        return False
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, mapping={"status": "running", "company_id": company_id, "version": version,
+                                "started_by": started_by, "started_at": time.time(), "last_id": 0,
+                                **{name: 0 for name in COUNTERS}})
+        pipe.expire(key, settings.QUIZ_REGRADE_PROGRESS_TTL)
+        await pipe.execute()
+    await regrade_quiz.enqueue(quiz_id, priority="low", redis=redis)
+    return True
+
+
+async def quiz_regrade_progress(quiz_id, redis):
+    async with redis.pipeline(transaction=False) as pipe:
+        progress, locked = await pipe.hgetall(regrade_key(quiz_id)).exists(regrade_lock_key(quiz_id)).execute()
+    if not progress:
+        return None
+    if progress["status"] == "running" and not locked:
+        # the task gave up, e.g. it timed out on every retry, without finishing the regrade
+        progress.update(status="failed", error=progress.get("error") or "Regrade stopped before it finished")
+    return {
+        "quiz_id": quiz_id,
+        "company_id": int(progress["company_id"]),
+        "status": progress["status"],
+        "version": progress["version"],
+        **{name: int(progress.get(name, 0)) for name in COUNTERS},
+        "started_at": float(progress["started_at"]),
+        "finished_at": float(progress["finished_at"]) if "finished_at" in progress else None,
+        "started_by": int(progress["started_by"]),
+        "error": progress.get("error"),
+    }
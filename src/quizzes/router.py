@@ -1,7 +1,6 @@
-import io
 from typing import Optional
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
 from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.params import Depends
 from fastapi_cache.decorator import cache
@@ -14,20 +13,30 @@ from src.core.mongo_config import get_mongo_database
 from src.core.redis_config import get_redis
 from src.database import get_db_session
 from src.quizzes.permissions import is_company_quiz
-from src.quizzes.schemas import QuizModel, AnswerForm
+from src.quizzes.schemas import QuizModel, AnswerForm, QuestionCreate, QuestionUpdate, QuestionMove, \
+    BankQuestionsCreate, BankAttemptCreate, AttemptAnswer
 from src.quizzes.services import get_all_quizzes_service, create_quizzes_service, get_quiz_service, \
     get_quiz_answers_service, get_company_quizzes_service, send_quiz_solution_service, update_quizzes_service, \
     delete_quizzes_service, average_mark_service, get_user_quizzes_json_services, \
     get_company_quizzes_results_json_services, get_company_user_quizzes_results_json_services, \
     get_quizzes_results_json_services, get_user_quizzes_csv_services, get_company_quizzes_results_csv_services, \
-    get_company_user_quizzes_results_csv_services, get_quizzes_results_csv_services
+    get_company_user_quizzes_results_csv_services, get_quizzes_results_csv_services, search_company_quizzes_service, \
+    get_quiz_current_version_service, get_quiz_version_service, add_question_service, update_question_service, \
+    move_question_service, remove_question_service, get_quiz_version_summary_service, \
+    get_quiz_version_questions_service, import_quizzes_service, export_quizzes_service, add_bank_questions_service, \
+    delete_bank_question_service, start_bank_attempt_service, submit_attempt_service, start_quiz_attempt_service, \
+    save_attempt_answer_service, get_attempt_service, start_quiz_regrade_service, get_quiz_regrade_service
 from src.utils.utils_auth import get_current_user
+from src.utils.utils_quizzes import QUIZ_CACHE_NAMESPACE, quiz_cache_key_builder
 
 router = APIRouter(
     prefix="/quizzes",
     tags=["Quizzes"],
 )
 
+# quiz versions never change, so their responses can be cached for good
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 
 @router.get("/average_mark/")
 async def average_mark(company_id: Optional[int] = None, user: dict = Depends(get_current_user),
@@ -37,10 +46,10 @@ async def average_mark(company_id: Optional[int] = None, user: dict = Depends(ge
 
 @router.get("/user_quizzes_results_json")
 async def get_user_quizzes_json(user: dict = Depends(get_current_user),
-                                db: AsyncSession = Depends(get_db_session),
+                                db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                 redis: Redis = Depends(get_redis)):
-    file_content = await get_user_quizzes_json_services(user=user, db=db, redis=redis)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/json",
+    file_content = get_user_quizzes_json_services(user=user, db_mongo=db_mongo, redis=redis)
+    return StreamingResponse(file_content, media_type="application/json",
                              headers={"Content-Disposition": "attachment; filename=user_quizzes.json"})
 
 
@@ -48,10 +57,11 @@ async def get_user_quizzes_json(user: dict = Depends(get_current_user),
 async def get_company_quizzes_json(company_id: int,
                                    company: bool = Depends(is_company_admin),
                                    user: dict = Depends(get_current_user),
-                                   db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                   db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                    redis: Redis = Depends(get_redis)):
-    file_content = await get_company_quizzes_results_json_services(company_id=company_id, db=db, redis=redis)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/json",
+    file_content = get_company_quizzes_results_json_services(company_id=company_id, db_mongo=db_mongo,
+                                                             redis=redis)
+    return StreamingResponse(file_content, media_type="application/json",
                              headers={"Content-Disposition": "attachment; filename=company_quizzes_results.json"})
 
 
@@ -61,13 +71,13 @@ async def get_company_user_quizzes_json(company_id: int,
                                         company_user: bool = Depends(is_company_member),
                                         company: bool = Depends(is_company_admin),
                                         user: dict = Depends(get_current_user),
-                                        db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                        db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                         redis: Redis = Depends(get_redis)):
-    file_content = await get_company_user_quizzes_results_json_services(company_id=company_id,
-                                                                        user_id=user_id,
-                                                                        redis=redis,
-                                                                        db=db)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/json",
+    file_content = get_company_user_quizzes_results_json_services(company_id=company_id,
+                                                                  user_id=user_id,
+                                                                  redis=redis,
+                                                                  db_mongo=db_mongo)
+    return StreamingResponse(file_content, media_type="application/json",
                              headers={"Content-Disposition": "attachment; filename=company_quizzes_results.json"})
 
 
@@ -77,13 +87,13 @@ async def get_company_user_quizzes_json(company_id: int,
                                         company_user: bool = Depends(is_company_member),
                                         company: bool = Depends(is_company_admin),
                                         user: dict = Depends(get_current_user),
-                                        db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                        db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                         redis: Redis = Depends(get_redis)):
-    file_content = await get_company_user_quizzes_results_json_services(company_id=company_id,
-                                                                        user_id=user_id,
-                                                                        redis=redis,
-                                                                        db=db)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/json",
+    file_content = get_company_user_quizzes_results_json_services(company_id=company_id,
+                                                                  user_id=user_id,
+                                                                  redis=redis,
+                                                                  db_mongo=db_mongo)
+    return StreamingResponse(file_content, media_type="application/json",
                              headers={"Content-Disposition": "attachment; filename=company_user_quizzes_results.json"})
 
 
@@ -93,30 +103,31 @@ async def get_quiz_results_json(company_id: int,
                                         quiz: bool = Depends(is_company_quiz),
                                         company: bool = Depends(is_company_admin),
                                         user: dict = Depends(get_current_user),
-                                        db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                        db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                         redis: Redis = Depends(get_redis)):
-    file_content = await get_quizzes_results_json_services(quiz_id=quiz_id,
-                                                           redis=redis,
-                                                           db=db)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/json",
+    file_content = get_quizzes_results_json_services(quiz_id=quiz_id,
+                                                     redis=redis,
+                                                     db_mongo=db_mongo)
+    return StreamingResponse(file_content, media_type="application/json",
                              headers={"Content-Disposition": "attachment; filename=company_quiz_results.json"})
 
 @router.get("/user_quizzes_results_csv")
 async def get_user_quizzes_csv(user: dict = Depends(get_current_user),
-                                db: AsyncSession = Depends(get_db_session),
+                                db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                 redis: Redis = Depends(get_redis)):
-    file_content = await get_user_quizzes_csv_services(user=user, db=db, redis=redis)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/csv",
+    file_content = get_user_quizzes_csv_services(user=user, db_mongo=db_mongo, redis=redis)
+    return StreamingResponse(file_content, media_type="application/csv",
                              headers={"Content-Disposition": "attachment; filename=user_quizzes.csv"})
 
 @router.get("/admin/{company_id}/results_csv")
 async def get_company_quizzes_csv(company_id: int,
                                    company: bool = Depends(is_company_admin),
                                    user: dict = Depends(get_current_user),
-                                   db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                   db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                    redis: Redis = Depends(get_redis)):
-    file_content = await get_company_quizzes_results_csv_services(company_id=company_id, db=db, redis=redis)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/csv",
+    file_content = get_company_quizzes_results_csv_services(company_id=company_id, db_mongo=db_mongo,
+                                                            redis=redis)
+    return StreamingResponse(file_content, media_type="application/csv",
                              headers={"Content-Disposition": "attachment; filename=company_quizzes_results.csv"})
 
 @router.get("/admin/{company_id}/{user_id}/user_quizzes_csv")
@@ -125,13 +136,13 @@ async def get_company_user_quizzes_csv(company_id: int,
                                         company_user: bool = Depends(is_company_member),
                                         company: bool = Depends(is_company_admin),
                                         user: dict = Depends(get_current_user),
-                                        db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                        db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                         redis: Redis = Depends(get_redis)):
-    file_content = await get_company_user_quizzes_results_csv_services(company_id=company_id,
-                                                                        user_id=user_id,
-                                                                        redis=redis,
-                                                                        db=db)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/csv",
+    file_content = get_company_user_quizzes_results_csv_services(company_id=company_id,
+                                                                 user_id=user_id,
+                                                                 redis=redis,
+                                                                 db_mongo=db_mongo)
+    return StreamingResponse(file_content, media_type="application/csv",
                              headers={"Content-Disposition": "attachment; filename=company_user_quizzes_results.csv"})
 
 @router.get("/admin/{company_id}/{quiz_id}/quiz_results_csv")
@@ -140,12 +151,12 @@ async def get_quiz_results_csv(company_id: int,
                                         quiz: bool = Depends(is_company_quiz),
                                         company: bool = Depends(is_company_admin),
                                         user: dict = Depends(get_current_user),
-                                        db: AsyncIOMotorDatabase = Depends(get_db_session),
+                                        db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
                                         redis: Redis = Depends(get_redis)):
-    file_content = await get_quizzes_results_csv_services(quiz_id=quiz_id,
-                                                           redis=redis,
-                                                           db=db)
-    return StreamingResponse(io.BytesIO(file_content.encode('utf-8')), media_type="application/csv",
+    file_content = get_quizzes_results_csv_services(quiz_id=quiz_id,
+                                                    redis=redis,
+                                                    db_mongo=db_mongo)
+    return StreamingResponse(file_content, media_type="application/csv",
                              headers={"Content-Disposition": "attachment; filename=company_quiz_results.csv"})
 
 @router.get("/")
@@ -174,6 +185,210 @@ async def get_company_quizzes(company_id: int,
     return await get_company_quizzes_service(company_id=company_id, db=db)
 
 
+@router.get("/{company_id}/search")
+async def search_company_quizzes(company_id: int,
+                                 q: str = Query(min_length=2, max_length=100),
+                                 after: Optional[str] = None,
+                                 limit: int = Query(default=20, ge=1, le=100),
+                                 user: dict = Depends(get_current_user),
+                                 company: bool = Depends(is_company_member),
+                                 db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to search the quizzes of a company.
+
+    Args:
+        company_id (int): The ID of the company.
+        q (str): The search text.
+        after (str): The next_cursor of the previous page.
+        limit (int): The page size.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        Quiz summaries (name, description, created_at, questions_count, score) and the next page cursor.
+    """
+    return await search_company_quizzes_service(company_id=company_id, q=q, after=after, limit=limit, db=db)
+
+
+@router.post("/{company_id}/import")
+async def import_quizzes(company_id: int,
+                         request: Request,
+                         user: dict = Depends(get_current_user),
+                         company: bool = Depends(is_company_admin),
+                         db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to import quizzes from an NDJSON body (application/x-ndjson), one quiz per line.
+
+    Args:
+        company_id (int): The ID of the company the quizzes are imported into.
+        request (Request): The streamed request body.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The imported and failed counts and the per-line errors.
+    """
+    return await import_quizzes_service(user=user, company_id=company_id, chunks=request.stream(), db=db)
+
+
+@router.post("/{company_id}/bank")
+async def add_bank_questions(company_id: int,
+                             bank_questions: BankQuestionsCreate,
+                             user: dict = Depends(get_current_user),
+                             company: bool = Depends(is_company_admin),
+                             db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to add questions to the company question bank.
+
+    Args:
+        company_id (int): The ID of the company.
+        bank_questions (BankQuestionsCreate): Up to 1000 questions with correct answers and tags.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The number and IDs of the added questions.
+    """
+    return await add_bank_questions_service(company_id=company_id, bank_questions=bank_questions, db=db)
+
+
+@router.delete("/{company_id}/bank/{question_id}")
+async def delete_bank_question(company_id: int,
+                               question_id: str,
+                               user: dict = Depends(get_current_user),
+                               company: bool = Depends(is_company_admin),
+                               db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    return await delete_bank_question_service(company_id=company_id, question_id=question_id, db=db)
+
+
+@router.post("/{company_id}/bank/attempts")
+async def start_bank_attempt(company_id: int,
+                             attempt_data: BankAttemptCreate,
+                             user: dict = Depends(get_current_user),
+                             company: bool = Depends(is_company_member),
+                             db: AsyncIOMotorDatabase = Depends(get_mongo_database),
+                             redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to start an attempt on a quiz randomly assembled from the question bank.
+
+    Args:
+        company_id (int): The ID of the company.
+        attempt_data (BankAttemptCreate): The required tags and the number of questions.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+        redis (Redis): Holds the attempt's answer key.
+
+    Returns:
+        The attempt ID, its expiry time and the questions to answer.
+    """
+    return await start_bank_attempt_service(user=user, company_id=company_id, attempt_data=attempt_data,
+                                            db=db, redis=redis)
+
+
+@router.get("/{company_id}/attempts/{attempt_id}")
+async def get_attempt(company_id: int,
+                      attempt_id: str,
+                      response: Response,
+                      user: dict = Depends(get_current_user),
+                      company: bool = Depends(is_company_member),
+                      redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to resume an attempt.
+
+    Args:
+        company_id (int): The ID of the company.
+        attempt_id (str): The ID returned when the attempt was started.
+        response (Response): The response the no-cache header is set on.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        redis (Redis): Holds the attempt and its autosaved answers.
+
+    Returns:
+        The saved answers keyed by question number and the seconds left.
+    """
+    response.headers["Cache-Control"] = "no-cache"
+    return await get_attempt_service(user=user, company_id=company_id, attempt_id=attempt_id, redis=redis)
+
+
+@router.put("/{company_id}/attempts/{attempt_id}/answers/{number}", status_code=status.HTTP_204_NO_CONTENT)
+async def save_attempt_answer(company_id: int,
+                              attempt_id: str,
+                              number: int,
+                              answer_data: AttemptAnswer,
+                              user: dict = Depends(get_current_user),
+                              company: bool = Depends(is_company_member),
+                              redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to autosave the answer to one question of an attempt.
+
+    Args:
+        company_id (int): The ID of the company.
+        attempt_id (str): The ID returned when the attempt was started.
+        number (int): The question number.
+        answer_data (AttemptAnswer): The chosen answer or answers.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        redis (Redis): Holds the attempt and its autosaved answers.
+    """
+    await save_attempt_answer_service(user=user, company_id=company_id, attempt_id=attempt_id, number=number,
+                                      answer_data=answer_data, redis=redis)
+
+
+@router.post("/{company_id}/attempts/{attempt_id}/solution")
+async def submit_attempt(company_id: int,
+                         attempt_id: str,
+                         answers_form: Optional[AnswerForm] = None,
+                         user: dict = Depends(get_current_user),
+                         company: bool = Depends(is_company_member),
+                         db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
+                         db_postgres: AsyncSession = Depends(get_db_session),
+                         redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to submit an attempt, graded from its autosaved answers.
+
+    Args:
+        company_id (int): The ID of the company.
+        attempt_id (str): The ID returned when the attempt was started.
+        answers_form (AnswerForm): Optional answers keyed by question number, overriding the saved ones.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        db_mongo (AsyncIOMotorDatabase): Holds the quiz version the attempt is graded against.
+        db_postgres (AsyncSession): Stores the result.
+        redis (Redis): Holds the attempt and its autosaved answers.
+
+    Returns:
+        The stored quiz result.
+    """
+    return await submit_attempt_service(user=user, company_id=company_id, attempt_id=attempt_id,
+                                        answers_form=answers_form, db_mongo=db_mongo, db_postgres=db_postgres,
+                                        redis=redis)
+
+
+@router.get("/{company_id}/export")
+async def export_quizzes(company_id: int,
+                         user: dict = Depends(get_current_user),
+                         company: bool = Depends(is_company_admin),
+                         db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to export the quizzes of a company, answer keys included.
+
+    Args:
+        company_id (int): The ID of the company.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        A streamed NDJSON file the import endpoint accepts.
+    """
+    return StreamingResponse(export_quizzes_service(company_id=company_id, db=db), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": f"attachment; filename=company_{company_id}_quizzes.ndjson"})
+
+
 @router.post("/{company_id}")
 async def create_quizz(
         company_id: int,
@@ -192,7 +407,7 @@ async def create_quizz(
         db (AsyncIOMotorDatabase): MongoDB database instance.
 
     Returns:
-        The created quiz data.
+        The created quiz data; its fanout_id tracks the member notifications.
     """
     return await create_quizzes_service(user=user, company_id=company_id, quiz_data=quiz_data, db=db)
 
@@ -219,11 +434,116 @@ async def update_quizz(
     Returns:
         The updated quiz data.
     """
-    return await update_quizzes_service(quiz_id=quiz_id, quiz_data=quiz_data, db=db)
+    return await update_quizzes_service(quiz_id=quiz_id, company_id=company_id, quiz_data=quiz_data, db=db)
+
+
+@router.post("/{company_id}/{quiz_id}/questions")
+async def add_question(
+        company_id: int,
+        quiz_id: str,
+        question_data: QuestionCreate,
+        user: dict = Depends(get_current_user),
+        company: bool = Depends(is_company_admin),
+        db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to add one question to a quiz.
+
+    Args:
+        company_id (int): The ID of the company that owns the quiz.
+        quiz_id (str): The ID of the quiz.
+        question_data (QuestionCreate): The question, its correct answers and an optional position.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The added question and answer key only.
+    """
+    return await add_question_service(company_id=company_id, quiz_id=quiz_id, question_data=question_data, db=db)
+
+
+@router.patch("/{company_id}/{quiz_id}/questions/{number}")
+async def update_question(
+        company_id: int,
+        quiz_id: str,
+        number: int,
+        question_data: QuestionUpdate,
+        user: dict = Depends(get_current_user),
+        company: bool = Depends(is_company_admin),
+        db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to edit one question of a quiz.
+
+    Args:
+        company_id (int): The ID of the company that owns the quiz.
+        quiz_id (str): The ID of the quiz.
+        number (int): The number of the question.
+        question_data (QuestionUpdate): The text, answers and/or correct answers to set.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The edited question and answer key only.
+    """
+    return await update_question_service(company_id=company_id, quiz_id=quiz_id, number=number,
+                                         question_data=question_data, db=db)
+
+
+@router.patch("/{company_id}/{quiz_id}/questions/{number}/position")
+async def move_question(
+        company_id: int,
+        quiz_id: str,
+        number: int,
+        move: QuestionMove,
+        user: dict = Depends(get_current_user),
+        company: bool = Depends(is_company_admin),
+        db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to reorder the questions of a quiz.
+
+    Args:
+        company_id (int): The ID of the company that owns the quiz.
+        quiz_id (str): The ID of the quiz.
+        number (int): The number of the question to move.
+        move (QuestionMove): The target position, 0 being the first.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The question numbers in their new order.
+    """
+    return await move_question_service(company_id=company_id, quiz_id=quiz_id, number=number, move=move, db=db)
+
+
+@router.delete("/{company_id}/{quiz_id}/questions/{number}")
+async def remove_question(
+        company_id: int,
+        quiz_id: str,
+        number: int,
+        user: dict = Depends(get_current_user),
+        company: bool = Depends(is_company_admin),
+        db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+    Endpoint to remove one question and its answer key from a quiz.
+
+    Args:
+        company_id (int): The ID of the company that owns the quiz.
+        quiz_id (str): The ID of the quiz.
+        number (int): The number of the question.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+
+    Returns:
+        The removed question number.
+    """
+    return await remove_question_service(company_id=company_id, quiz_id=quiz_id, number=number, db=db)
 
 
 @router.get("/{company_id}/{quiz_id}")
-@cache(expire=30)
+@cache(expire=30, namespace=QUIZ_CACHE_NAMESPACE, key_builder=quiz_cache_key_builder)
 async def get_quiz(quiz_id: str,
                    company_id: int,
                    user: dict = Depends(get_current_user),
@@ -252,11 +572,11 @@ async def delete_quizz(
         quiz: bool = Depends(is_company_quiz),
         db_mongo: AsyncIOMotorDatabase = Depends(get_mongo_database),
         db_postgres: AsyncSession = Depends(get_db_session)):
-    return await delete_quizzes_service(quiz_id=quiz_id, db_mongo=db_mongo)
+    return await delete_quizzes_service(quiz_id=quiz_id, company_id=company_id, db_mongo=db_mongo)
 
 
 @router.get("/{company_id}/{quiz_id}/answers")
-@cache(expire=30)
+@cache(expire=30, namespace=QUIZ_CACHE_NAMESPACE, key_builder=quiz_cache_key_builder)
 async def get_quiz_with_answers(quiz_id: str,
                                 company_id: int,
                                 user: dict = Depends(get_current_user),
@@ -278,6 +598,193 @@ async def get_quiz_with_answers(quiz_id: str,
     return await get_quiz_answers_service(quiz_id=quiz_id, company_id=company_id, db=db)
 
 
+@router.get("/{company_id}/{quiz_id}/version")
+async def get_quiz_current_version(quiz_id: str,
+                                   company_id: int,
+                                   response: Response,
+                                   user: dict = Depends(get_current_user),
+                                   company: bool = Depends(is_company_member),
+                                   db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+        Endpoint to retrieve the current version of a quiz.
+
+        Args:
+            quiz_id (str): The ID of the quiz.
+            company_id (int): The ID of the company the quiz belongs to.
+            user (dict): The current authenticated user.
+            company: Check if the user is a member of the company.
+            db (AsyncIOMotorDatabase): MongoDB database instance.
+
+        Returns:
+            The quiz ID and its current version; the only part of a quiz that changes on edit.
+        """
+    response.headers["Cache-Control"] = "no-cache"
+    return await get_quiz_current_version_service(quiz_id=quiz_id, company_id=company_id, db=db)
+
+
+@router.get("/{company_id}/{quiz_id}/versions/{version}")
+async def get_quiz_version(quiz_id: str,
+                           company_id: int,
+                           version: str,
+                           request: Request,
+                           response: Response,
+                           user: dict = Depends(get_current_user),
+                           company: bool = Depends(is_company_member),
+                           db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+        Endpoint to retrieve an immutable version of a quiz without answers.
+
+        Args:
+            quiz_id (str): The ID of the quiz.
+            company_id (int): The ID of the company the quiz belongs to.
+            version (str): The version from the quiz's version endpoint.
+            request (Request): Used to answer revalidations with 304.
+            response (Response): Carries the caching headers.
+            user (dict): The current authenticated user.
+            company: Check if the user is a member of the company.
+            db (AsyncIOMotorDatabase): MongoDB database instance.
+
+        Returns:
+            The quiz data of that version; clients may cache it forever.
+        """
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{version}"'}
+    quiz = await get_quiz_version_service(quiz_id=quiz_id, company_id=company_id, version=version, db=db)
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return quiz
+
+
+@router.get("/{company_id}/{quiz_id}/versions/{version}/summary")
+async def get_quiz_version_summary(quiz_id: str,
+                                   company_id: int,
+                                   version: str,
+                                   response: Response,
+                                   user: dict = Depends(get_current_user),
+                                   company: bool = Depends(is_company_member),
+                                   db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+        Endpoint to retrieve the metadata of a quiz version without its questions.
+
+        Args:
+            quiz_id (str): The ID of the quiz.
+            company_id (int): The ID of the company the quiz belongs to.
+            version (str): The version from the quiz's version endpoint.
+            response (Response): Carries the caching headers.
+            user (dict): The current authenticated user.
+            company: Check if the user is a member of the company.
+            db (AsyncIOMotorDatabase): MongoDB database instance.
+
+        Returns:
+            The name, description, created_at and questions_count of the version.
+        """
+    summary = await get_quiz_version_summary_service(quiz_id=quiz_id, company_id=company_id, version=version, db=db)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return summary
+
+
+@router.get("/{company_id}/{quiz_id}/versions/{version}/questions")
+async def get_quiz_version_questions(quiz_id: str,
+                                     company_id: int,
+                                     version: str,
+                                     response: Response,
+                                     offset: int = Query(default=0, ge=0),
+                                     limit: int = Query(default=50, ge=1, le=200),
+                                     user: dict = Depends(get_current_user),
+                                     company: bool = Depends(is_company_member),
+                                     db: AsyncIOMotorDatabase = Depends(get_mongo_database)):
+    """
+        Endpoint to page through the questions of a quiz version without answers.
+
+        Args:
+            quiz_id (str): The ID of the quiz.
+            company_id (int): The ID of the company the quiz belongs to.
+            version (str): The version from the quiz's version endpoint.
+            response (Response): Carries the caching headers.
+            offset (int): The position of the first question, 0 being the first.
+            limit (int): The number of questions per window.
+            user (dict): The current authenticated user.
+            company: Check if the user is a member of the company.
+            db (AsyncIOMotorDatabase): MongoDB database instance.
+
+        Returns:
+            The questions of the window, the total count and the next_offset to request.
+        """
+    window = await get_quiz_version_questions_service(quiz_id=quiz_id, company_id=company_id, version=version,
+                                                      offset=offset, limit=limit, db=db)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return window
+
+
+@router.post("/{company_id}/{quiz_id}/attempts")
+async def start_quiz_attempt(quiz_id: str,
+                             company_id: int,
+                             user: dict = Depends(get_current_user),
+                             company: bool = Depends(is_company_member),
+                             db: AsyncIOMotorDatabase = Depends(get_mongo_database),
+                             redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to start a timed attempt on the current version of a quiz.
+
+    Args:
+        quiz_id (str): The ID of the quiz.
+        company_id (int): The ID of the company.
+        user (dict): The current authenticated user.
+        company: Check if the user is a member of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+        redis (Redis): Holds the attempt and its autosaved answers.
+
+    Returns:
+        The attempt ID, its expiry time and the quiz version it is graded against.
+    """
+    return await start_quiz_attempt_service(user=user, company_id=company_id, quiz_id=quiz_id, db=db, redis=redis)
+
+
+@router.post("/{company_id}/{quiz_id}/regrade", status_code=status.HTTP_202_ACCEPTED)
+async def start_quiz_regrade(quiz_id: str,
+                             company_id: int,
+                             user: dict = Depends(get_current_user),
+                             company: bool = Depends(is_company_admin),
+                             db: AsyncIOMotorDatabase = Depends(get_mongo_database),
+                             redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to re-score every stored result of a quiz after its answer key was corrected.
+
+    Args:
+        quiz_id (str): The ID of the quiz.
+        company_id (int): The ID of the company.
+        user (dict): The current authenticated user.
+        company: Check if the user is an admin of the company.
+        db (AsyncIOMotorDatabase): MongoDB database instance.
+        redis (Redis): Holds the regrade progress and queues the job.
+
+    Returns:
+        The progress of the queued regrade.
+    """
+    return await start_quiz_regrade_service(user=user, company_id=company_id, quiz_id=quiz_id, db=db, redis=redis)
+
+
+@router.get("/{company_id}/{quiz_id}/regrade")
+async def get_quiz_regrade(quiz_id: str,
+                           company_id: int,
+                           company: bool = Depends(is_company_admin),
+                           redis: Redis = Depends(get_redis)):
+    """
+    Endpoint to follow a regrade: results scanned, results whose score changed and results whose
+    answers are no longer stored.
+
+    Args:
+        quiz_id (str): The ID of the quiz.
+        company_id (int): The ID of the company.
+        company: Check if the user is an admin of the company.
+        redis (Redis): Holds the regrade progress.
+
+    Returns:
+        The regrade progress.
+    """
+    return await get_quiz_regrade_service(company_id=company_id, quiz_id=quiz_id, redis=redis)
+
+
 @router.post("/{company_id}/{quiz_id}/solution")
 async def send_quiz_solution(quiz_id: str,
                              company_id: int,
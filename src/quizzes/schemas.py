@@ -1,12 +1,99 @@
+import re
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Annotated, List, Literal, Optional, Dict, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# choice-like keys point at the question's answers; range and text questions need none
+MIN_OPTION_ANSWERS = 2
+MAX_TEXT_PATTERN_LENGTH = 500
+
+
+class ChoiceKey(BaseModel):
+    type: Literal["choice"]
+    options: List[int] = Field(min_length=1)
+
+
+class MultiSelectKey(BaseModel):
+    type: Literal["multi_select"]
+    options: List[int] = Field(min_length=1)
+
+
+class SequenceKey(BaseModel):
+    type: Literal["sequence"]
+    order: List[int] = Field(min_length=1)
+
+
+class RangeKey(BaseModel):
+    type: Literal["range"]
+    min: float
+    max: float
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.min > self.max:
+            raise ValueError("min must not be greater than max")
+        return self
+
+
+class TextKey(BaseModel):
+    type: Literal["text"]
+    accepted: List[str] = []
+    patterns: List[Annotated[str, Field(max_length=MAX_TEXT_PATTERN_LENGTH)]] = []
+
+    @model_validator(mode="after")
+    def check_answers(self):
+        if not self.accepted and not self.patterns:
+            raise ValueError("At least one accepted answer or pattern is required")
+        for pattern in self.patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern {pattern!r}: {e}")
+        return self
+
+
+# a plain list of option indexes is the original exact-choice key
+AnswerKey = Union[Annotated[List[int], Field(min_length=1)], Annotated[Union[ChoiceKey, MultiSelectKey, SequenceKey, RangeKey, TextKey],
+                                       Field(discriminator="type")]]
+
+AnswerValue = int | float | str | List[int]
+
+
+def key_type(key):
+    if isinstance(key, BaseModel):
+        return key.type
+    return "choice" if isinstance(key, list) else key["type"]
+
+
+def key_options(key):
+    """Option indexes an answer key refers to, None for keys without options (range, text)."""
+    if isinstance(key, BaseModel):
+        key = key.model_dump()
+    if isinstance(key, list):
+        return key
+    if key["type"] in ("choice", "multi_select"):
+        return key["options"]
+    if key["type"] == "sequence":
+        return key["order"]
+    return None
+
+
+def check_answer_key(key, answers):
+    """Raises ValueError when a choice-like key has too few answers or refers to options that do not exist."""
+    options = None if key is None else key_options(key)
+    if options is None:
+        return
+    if len(answers) < MIN_OPTION_ANSWERS:
+        raise ValueError(f"Questions with a {key_type(key)} key need at least {MIN_OPTION_ANSWERS} answers")
+    missing = sorted({option for option in options if not 0 <= option < len(answers)})
+    if missing:
+        raise ValueError(f"Answer key refers to options {missing} of a question with {len(answers)} answers")
 
 
 class Question(BaseModel):
     text: str
-    answers: List[str] = Field(min_length=2)
+    answers: List[str] = []
     number: Optional[int] = None
 
 
@@ -16,8 +103,77 @@ class QuizModel(BaseModel):
     questions: List[Question] = Field(min_length=2)
     created_at: str = Field(
         default_factory=lambda: datetime.now().strftime("%Y-%m-%d"))
-    correct_answers: Dict[str, List[int]]
+    correct_answers: Dict[str, AnswerKey]
+    # seconds a timed attempt may take, QUIZ_ATTEMPT_TTL when not set
+    time_limit: Optional[int] = Field(default=None, ge=10, le=7 * 24 * 3600)
+
+    @model_validator(mode="after")
+    def check_answer_keys(self):
+        # unnumbered questions are numbered by position when the quiz is stored
+        for index, question in enumerate(self.questions):
+            number = question.number or index + 1
+            key = self.correct_answers.get(str(number))
+            if key is not None:
+                try:
+                    check_answer_key(key, question.answers)
+                except ValueError as e:
+                    raise ValueError(f"Question {number}: {e}")
+        return self
+
+
+class QuestionCreate(BaseModel):
+    text: str
+    answers: List[str] = []
+    correct_answers: AnswerKey
+    position: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_answer_key(self):
+        check_answer_key(self.correct_answers, self.answers)
+        return self
+
+
+class QuestionUpdate(BaseModel):
+    """Changing only the answers or only the key is checked against the stored question by the service."""
+    text: Optional[str] = None
+    answers: Optional[List[str]] = None
+    correct_answers: Optional[AnswerKey] = None
+
+    @model_validator(mode="after")
+    def check_answer_key(self):
+        if self.answers is not None and self.correct_answers is not None:
+            check_answer_key(self.correct_answers, self.answers)
+        return self
+
+
+class QuestionMove(BaseModel):
+    position: int = Field(ge=0)
+
+
+class BankQuestion(BaseModel):
+    text: str
+    answers: List[str] = []
+    correct_answers: AnswerKey
+    tags: List[str] = []
+
+    @model_validator(mode="after")
+    def check_answer_key(self):
+        check_answer_key(self.correct_answers, self.answers)
+        return self
+
+
+class BankQuestionsCreate(BaseModel):
+    questions: List[BankQuestion] = Field(min_length=1, max_length=1000)
+
+
+class BankAttemptCreate(BaseModel):
+    tags: List[str] = []
+    questions: int = Field(default=10, ge=2, le=200)
 
 
 class AnswerForm(BaseModel):
-    answers: Dict[int, int | List[int]] = Field(min_length=2)
+    answers: Dict[int, AnswerValue] = Field(min_length=2)
+
+
+class AttemptAnswer(BaseModel):
+    answer: AnswerValue
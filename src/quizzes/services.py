@@ -1,12 +1,25 @@
 import json
+from functools import partial
 
+from bson import ObjectId
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 from sqlalchemy import select
 
+from src.core.config import settings
+
 from src.core.redis_config import get_redis, redis
-from src.quizzes.manager import QuizManager, QuizNotFound
-from src.quizzes.models import QuizResults
-from src.utils.utils_quizzes import get_quiz_json, get_quiz_csv
+from src.notifications.fanout import fan_out_company_notification, quiz_fanout_id
+from src.notifications.services import enqueue_notification
+from src.quizzes.attempts import (create_attempt, get_attempt, claim_attempt, finish_attempt, release_attempt,
+                                  save_answer)
+from src.quizzes.graders import compile_answer_key, compiled_answer_key
+from src.quizzes.manager import QuizManager, QuizNotFound, InvalidCursor, QuizEditConflict, QuestionBankManager
+from src.quizzes.models import QuizResults, QuizResultDetail
+from src.quizzes.regrade import start_quiz_regrade, quiz_regrade_progress
+from src.quizzes.schemas import QuizModel, check_answer_key
+from src.utils.utils_quizzes import get_quiz_json, get_quiz_csv, invalidate_quiz_cache, iter_ndjson_lines, \
+    result_details_query, stream_export
 
 
 async def get_all_quizzes_service(page, per_page, db):
@@ -40,9 +53,29 @@ async def get_company_quizzes_service(company_id, db):
     return quizzes
 
 
+async def search_company_quizzes_service(company_id, q, after, limit, db):
+    """
+    Full-text search over a company's quizzes.
+
+    Args:
+        company_id (int): The ID of the company.
+        q (str): The search text, matched against quiz names, descriptions and question texts.
+        after (str): The next_cursor of the previous page.
+        limit (int): The page size.
+        db: The database object.
+
+    Returns:
+        Quiz summaries ranked by relevance and the next page cursor.
+    """
+    try:
+        return await QuizManager.search_quizzes(db, company_id, q, after, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
 async def create_quizzes_service(user, company_id, quiz_data, db):
     """
-    Creates a new quiz with the provided data.
+    Creates a new quiz with the provided data and queues the company members notification.
 
     Args:
         user: The information of the user creating the quiz (includes the user ID).
@@ -51,22 +84,106 @@ async def create_quizzes_service(user, company_id, quiz_data, db):
         db: The database object.
 
     Returns:
-        The created quiz data after insertion into the database.
+        The created quiz data after insertion into the database, with the fan-out id.
     """
+    quiz = await QuizManager.create_quiz(db, new_quiz_document(user, company_id, quiz_data))
+    quiz["fanout_id"] = quiz_fanout_id(quiz["_id"])
+    await fan_out_company_notification.enqueue(quiz["fanout_id"], company_id, "quiz_published",
+                                               {"company_id": company_id, "quiz_id": quiz["_id"],
+                                                "quiz_name": quiz["name"]},
+                                               exclude_user_id=user.get("id"))
+    return quiz
+
+
+def new_quiz_document(user, company_id, quiz_data):
     quiz_data = quiz_data.dict()
     quiz_data["company_id"] = company_id
     quiz_data["created_by_user_id"] = user.get("id")
     for index, question in enumerate(quiz_data["questions"]):
         question["number"] = index + 1
-    return await QuizManager.create_quiz(db, quiz_data)
+    return quiz_data
 
 
-async def update_quizzes_service(quiz_id, quiz_data, db):
+async def import_quizzes_service(user, company_id, chunks, db):
+    """
+    Imports quizzes from a streamed NDJSON body, one QuizModel per line.
+
+    Lines are validated one at a time and inserted in unordered batches of QUIZ_IMPORT_BATCH_SIZE,
+    so invalid or rejected lines are reported without aborting the import. No member
+    notifications are sent for imported quizzes.
+
+    Args:
+        user: The information of the importing user (includes the user ID).
+        company_id: The ID of the company the quizzes belong to.
+        chunks: The request body as an async iterator of bytes.
+        db: The database object.
+
+    Returns:
+        The imported and failed counts and the errors by line number, at most QUIZ_IMPORT_MAX_ERRORS of them.
+    """
+    report = {"imported": 0, "failed": 0, "errors": []}
+    batch, batch_lines = [], []
+
+    def fail(line_number, error):
+        report["failed"] += 1
+        if len(report["errors"]) < settings.QUIZ_IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_number, "error": error})
+
+    async def flush():
+        inserted, errors = await QuizManager.insert_quizzes(db, batch)
+        report["imported"] += inserted
+        for index, error in sorted(errors.items()):
+            fail(batch_lines[index], error)
+        batch.clear()
+        batch_lines.clear()
+
+    async for line_number, line in iter_ndjson_lines(chunks, settings.QUIZ_IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            fail(line_number, f"Line longer than {settings.QUIZ_IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            quiz_data = QuizModel.model_validate_json(line)
+        except ValidationError as e:
+            fail(line_number, "; ".join(f"{'.'.join(map(str, error['loc'])) or 'line'}: {error['msg']}"
+                                        for error in e.errors()))
+            continue
+        batch.append(new_quiz_document(user, company_id, quiz_data))
+        batch_lines.append(line_number)
+        if len(batch) >= settings.QUIZ_IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+async def export_quizzes_service(company_id, db):
+    """
+    Streams a company's quizzes, answer keys included, as NDJSON that the import endpoint accepts.
+
+    Args:
+        company_id: The ID of the company.
+        db: The database object.
+
+    Yields:
+        One JSON encoded quiz per line, read through a Mongo cursor in QUIZ_IMPORT_BATCH_SIZE batches.
+    """
+    cursor = db.find({"company_id": company_id},
+                     projection={"name": 1, "description": 1, "questions": 1, "created_at": 1, "correct_answers": 1},
+                     batch_size=settings.QUIZ_IMPORT_BATCH_SIZE).sort("_id")
+    async for quiz in cursor:
+        yield json.dumps(QuizManager.id_to_string(quiz), default=str) + "\n"
+
+
+async def update_quizzes_service(quiz_id, company_id, quiz_data, db):
     """
     Update a quiz with the provided data.
 
     Args:
         quiz_id: The ID of the quiz
+        company_id: The ID of the company the quiz belongs to.
         quiz_data: The data of the quiz as a Pydantic model.
         db: The database object.
 
@@ -77,14 +194,121 @@ async def update_quizzes_service(quiz_id, quiz_data, db):
     for index, question in enumerate(quiz_data["questions"]):
         if not question["number"]:
             question["number"] = index + 1
-    document = await QuizManager.update_quiz(quiz_id=quiz_id, update_data=quiz_data, db=db)
+    try:
+        document = await QuizManager.update_quiz(quiz_id=quiz_id, update_data=quiz_data, db=db)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    await invalidate_quiz_cache(company_id, quiz_id)
     return document
 
 
-async def delete_quizzes_service(quiz_id, db_mongo):
+async def edit_quiz_questions(company_id, quiz_id, operation, *args):
+    """Run a QuizManager question operation and map its errors; drops the cached reads of that quiz only."""
+    if not ObjectId.is_valid(quiz_id):
+        raise HTTPException(status_code=400, detail="Invalid Quiz id")
+    try:
+        fragment = await operation(company_id, quiz_id, *args)
+    except QuizNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QuizEditConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await invalidate_quiz_cache(company_id, quiz_id)
+    return fragment
+
+
+async def add_question_service(company_id, quiz_id, question_data, db):
+    """
+    Adds one question and its answer key to a quiz.
+
+    Args:
+        company_id: The ID of the company the quiz belongs to.
+        quiz_id: The ID of the quiz.
+        question_data: The question, its correct answers and an optional position.
+        db: The database object.
+
+    Returns:
+        The new question with its number, its correct answers and the quiz revision.
+    """
+    question_data = question_data.dict()
+    correct_answers, position = question_data.pop("correct_answers"), question_data.pop("position")
+    return await edit_quiz_questions(company_id, quiz_id, partial(QuizManager.add_question, db),
+                                     question_data, correct_answers, position)
+
+
+async def update_question_service(company_id, quiz_id, number, question_data, db):
+    """
+    Edits the text, answers or answer key of one question.
+
+    Args:
+        company_id: The ID of the company the quiz belongs to.
+        quiz_id: The ID of the quiz.
+        number: The number of the question.
+        question_data: The fields to change.
+        db: The database object.
+
+    Returns:
+        The edited question, its correct answers and the quiz revision.
+    """
+    changes = question_data.dict(exclude_unset=True, exclude_none=True)
+    correct_answers = changes.pop("correct_answers", None)
+    if not changes and correct_answers is None:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    if ("answers" in changes) != (correct_answers is not None) and ObjectId.is_valid(quiz_id):
+        # only one side changes, so the other one comes from the stored question
+        stored = await QuizManager.get_question(db, company_id, quiz_id, number)
+        if stored is not None:
+            question, stored_key = stored
+            try:
+                check_answer_key(stored_key if correct_answers is None else correct_answers,
+                                 changes.get("answers", question.get("answers", [])))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+    return await edit_quiz_questions(company_id, quiz_id, partial(QuizManager.update_question, db),
+                                     number, changes, correct_answers)
+
+
+async def move_question_service(company_id, quiz_id, number, move, db):
+    """
+    Moves one question to another position; question numbers do not change.
+
+    Args:
+        company_id: The ID of the company the quiz belongs to.
+        quiz_id: The ID of the quiz.
+        number: The number of the question.
+        move: The target position, 0 being the first.
+        db: The database object.
+
+    Returns:
+        The new order of question numbers and the quiz revision.
+    """
+    return await edit_quiz_questions(company_id, quiz_id, partial(QuizManager.move_question, db),
+                                     number, move.position)
+
+
+async def remove_question_service(company_id, quiz_id, number, db):
+    """
+    Removes one question and its answer key.
+
+    Args:
+        company_id: The ID of the company the quiz belongs to.
+        quiz_id: The ID of the quiz.
+        number: The number of the question.
+        db: The database object.
+
+    Returns:
+        The removed question number and the quiz revision.
+
+    Raises:
+        HTTPException: If the question is not found (404) or the quiz would keep fewer than two questions (409).
+    """
+    return await edit_quiz_questions(company_id, quiz_id, partial(QuizManager.remove_question, db), number)
+
+
+async def delete_quizzes_service(quiz_id, company_id, db_mongo):
     deleted_quiz = await QuizManager.delete_quiz(db_mongo, quiz_id)
     if not deleted_quiz:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    await invalidate_quiz_cache(company_id, quiz_id)
 
     return {"detail": "Quiz deleted successfully"}
 
@@ -113,52 +337,395 @@ async def get_quiz_service(quiz_id, company_id, db):
         raise HTTPException(status_code=404, detail="Quiz not found")
 
 
+async def get_quiz_current_version_service(quiz_id, company_id, db):
+    """
+    Retrieves the current version pointer of a quiz.
+
+    Args:
+        quiz_id: The ID of the quiz.
+        company_id: The ID of the company the quiz should be associated with.
+        db: The database object.
+
+    Returns:
+        The quiz ID and the content hash of its current version.
+
+    Raises:
+        HTTPException: If the quiz is not found (404) or the company doesn't match (403).
+    """
+    try:
+        pointer = await QuizManager.get_current_version(db, quiz_id)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if pointer["company_id"] != company_id:
+        raise HTTPException(status_code=403, detail="Quiz not connected to company")
+    return {"quiz_id": pointer["quiz_id"], "version": pointer["version"]}
+
+
+async def get_quiz_version_service(quiz_id, company_id, version, db):
+    """
+    Retrieves an immutable quiz version, excluding answers.
+
+    Args:
+        quiz_id: The ID of the quiz.
+        company_id: The ID of the company the quiz should be associated with.
+        version: The content hash of the version.
+        db: The database object.
+
+    Returns:
+        The quiz content as of that version, without answers.
+
+    Raises:
+        HTTPException: If the version is not one of this quiz (404) or the company doesn't match (403).
+    """
+    try:
+        quiz = await QuizManager.get_quiz_version(db, version)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz version not found")
+    check_version_owner(quiz, quiz_id, company_id)
+    return {"version": quiz["_id"], **{key: value for key, value in quiz.items()
+                                       if key not in ("_id", "correct_answers")}}
+
+
+def check_version_owner(document, quiz_id, company_id):
+    if document["quiz_id"] != quiz_id:
+        raise HTTPException(status_code=404, detail="Quiz version not found")
+    if document["company_id"] != company_id:
+        raise HTTPException(status_code=403, detail="Quiz not connected to company")
+
+
+async def get_quiz_version_summary_service(quiz_id, company_id, version, db):
+    """
+    Retrieves the metadata of a quiz version, without questions.
+
+    Args:
+        quiz_id: The ID of the quiz.
+        company_id: The ID of the company the quiz should be associated with.
+        version: The content hash of the version.
+        db: The database object.
+
+    Returns:
+        The name, description, creation date and question count of the version.
+    """
+    try:
+        summary = await QuizManager.get_version_summary(db, version)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz version not found")
+    check_version_owner(summary, quiz_id, company_id)
+    return {"version": version, **summary}
+
+
+async def get_quiz_version_questions_service(quiz_id, company_id, version, offset, limit, db):
+    """
+    Retrieves a window of the questions of a quiz version, excluding answers.
+
+    Args:
+        quiz_id: The ID of the quiz.
+        company_id: The ID of the company the quiz should be associated with.
+        version: The content hash of the version.
+        offset: The position of the first question to return.
+        limit: The number of questions to return.
+        db: The database object.
+
+    Returns:
+        The questions of the window, the total question count and the next offset, if any.
+    """
+    try:
+        window = await QuizManager.get_version_questions(db, version, offset, limit)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz version not found")
+    check_version_owner(window, quiz_id, company_id)
+    next_offset = offset + limit if offset + limit < window["total"] else None
+    return {"version": version, "offset": offset, "total": window["total"], "next_offset": next_offset,
+            "questions": window["questions"]}
+
+
 async def send_quiz_solution_service(user, company_id, quiz_id, answers_form, db_mongo, db_postgres, redis):
-    quiz = await QuizManager.get_quiz(db=db_mongo, quiz_id=quiz_id)
+    # grade against the current version: one pointer lookup, then an in-process cached read
+    try:
+        pointer = await QuizManager.get_current_version(db_mongo, quiz_id)
+        quiz = await QuizManager.get_quiz_version(db_mongo, pointer["version"])
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.get("company_id") != company_id:
+        raise HTTPException(status_code=400, detail="Quiz not connected to company")
+
+    users_answers = answers_form.dict().get("answers")
+    result, answers, scores = grade_answers(compiled_answer_key(pointer["version"], quiz["correct_answers"]),
+                                            users_answers)
+    return await save_quiz_result(user, company_id, quiz_id, pointer["version"], result,
+                                  len(quiz["questions"]), answers, scores, db_postgres)
+
+
+async def start_quiz_regrade_service(user, company_id, quiz_id, db, redis):
+    """
+    Starts re-scoring the stored results of a quiz against the answer key of its current version.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        quiz_id: The ID of the quiz.
+        db: The database object.
+        redis: The Redis client.
+
+    Returns:
+        The progress of the queued regrade.
+
+    Raises:
+        HTTPException: If the quiz is not found (404) or a regrade of it is already running (409).
+    """
+    try:
+        pointer = await QuizManager.get_current_version(db, quiz_id)
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if pointer["company_id"] != company_id:
+        raise HTTPException(status_code=400, detail="Quiz not connected to company")
+    if not await start_quiz_regrade(company_id, quiz_id, pointer["version"], user.get("id"), redis):
+        raise HTTPException(status_code=409, detail="A regrade of this quiz is already running")
+    return await quiz_regrade_progress(quiz_id, redis)
+
+
+async def get_quiz_regrade_service(company_id, quiz_id, redis):
+    """
+    Returns the progress of the last regrade of a quiz: results scanned, changed and missing their answers.
+
+    Raises:
+        HTTPException: If the quiz of the company was not regraded recently (404).
+    """
+    progress = await quiz_regrade_progress(quiz_id, redis)
+    if progress is None or progress["company_id"] != company_id:
+        raise HTTPException(status_code=404, detail="No regrade of this quiz")
+    return progress
+
+
+async def add_bank_questions_service(company_id, bank_questions, db):
+    """
+    Adds questions to the question bank of a company.
+
+    Args:
+        company_id: The ID of the company.
+        bank_questions: The questions with their correct answers and tags.
+        db: The database object.
+
+    Returns:
+        The IDs of the added bank questions.
+    """
+    ids = await QuestionBankManager.add_questions(db, company_id, [question.dict()
+                                                                   for question in bank_questions.questions])
+    return {"inserted": len(ids), "ids": ids}
+
+
+async def delete_bank_question_service(company_id, question_id, db):
+    try:
+        await QuestionBankManager.delete_question(db, company_id, question_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return {"detail": "Question deleted successfully"}
+
+
+async def start_bank_attempt_service(user, company_id, attempt_data, db, redis):
+    """
+    Assembles a random quiz from the company question bank for one attempt.
+
+    The questions are drawn with $sample and numbered from 1; their answer key is cached in
+    Redis for the attempt's lifetime, so submitting the attempt reads nothing from Mongo.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        attempt_data: The tags every question must carry and the number of questions.
+        db: The database object.
+        redis: The Redis client.
+
+    Returns:
+        The attempt ID, its expiry time and the questions without answers.
+    """
+    drawn = await QuestionBankManager.sample_questions(db, company_id, attempt_data.tags, attempt_data.questions)
+    if len(drawn) < attempt_data.questions:
+        raise HTTPException(status_code=404,
+                            detail=f"The bank has only {len(drawn)} questions with these tags")
+    questions = [{"number": number, "text": question["text"], "answers": question["answers"],
+                  "bank_question_id": question["_id"]} for number, question in enumerate(drawn, start=1)]
+    answer_key = {str(number): question["correct_answers"] for number, question in enumerate(drawn, start=1)}
+    attempt = await create_attempt(redis, user.get("id"), company_id, None, len(questions),
+                                   questions=questions, answer_key=answer_key)
+    return {**attempt, "questions": questions}
+
+
+async def start_quiz_attempt_service(user, company_id, quiz_id, db, redis):
+    """
+    Starts a timed attempt on the current version of a quiz.
+
+    The attempt expires after the quiz's time_limit (QUIZ_ATTEMPT_TTL seconds when it has none)
+    together with its autosaved answers: an expired attempt can no longer be saved to or submitted.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        quiz_id: The ID of the quiz.
+        db: The database object.
+        redis: The Redis client.
+
+    Returns:
+        The attempt ID, its expiry time and the quiz version it is graded against.
+    """
+    try:
+        pointer = await QuizManager.get_current_version(db, quiz_id)
+        quiz = await QuizManager.get_quiz_version(db, pointer["version"])
+    except QuizNotFound:
+        raise HTTPException(status_code=404, detail="Quiz not found")
     if quiz.get("company_id") != company_id:
         raise HTTPException(status_code=400, detail="Quiz not connected to company")
+    max_number = max(question["number"] for question in quiz["questions"])
+    attempt = await create_attempt(redis, user.get("id"), company_id, quiz_id, max_number,
+                                   quiz_version=pointer["version"], time_limit=pointer["time_limit"])
+    return {**attempt, "quiz_id": quiz_id, "quiz_version": pointer["version"],
+            "questions_count": len(quiz["questions"])}
 
-    quiz_questions = quiz["questions"]
-    quiz_answers = quiz["correct_answers"]
-    answers_form = answers_form.dict()
-    users_answers = answers_form.get("answers")
-    results = {"user": user.get("id"),
-               "company": company_id,
-               "quiz": quiz_id, }
-    result = 0
 
-    if len(quiz["correct_answers"]) != len(answers_form.get("answers")):
+async def save_attempt_answer_service(user, company_id, attempt_id, number, answer_data, redis):
+    """
+    Autosaves the answer to one question of an attempt; Postgres is not touched until submission.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        attempt_id: The ID of the attempt.
+        number: The question number.
+        answer_data: The chosen answer or answers.
+        redis: The Redis client.
+
+    Raises:
+        HTTPException: If the attempt expired or is not the user's (404), there is no such question (400)
+            or the attempt is being submitted (409).
+    """
+    await save_answer(redis, attempt_id, user.get("id"), company_id, number, answer_data.answer)
+
+
+async def get_attempt_service(user, company_id, attempt_id, redis):
+    """
+    Returns an attempt with its autosaved answers, so a client can resume it.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        attempt_id: The ID of the attempt.
+        redis: The Redis client.
+
+    Returns:
+        The quiz, the saved answers keyed by question number and the seconds left.
+    """
+    attempt = await get_attempt(redis, attempt_id, user.get("id"), company_id)
+    state = {"attempt_id": attempt_id,
+             "quiz_id": attempt["quiz_id"],
+             "quiz_version": attempt["quiz_version"],
+             "started_at": float(attempt["started_at"]),
+             "expires_in": attempt["expires_in"],
+             "answers": attempt["answers"], }
+    if "questions" in attempt:
+        state["questions"] = attempt["questions"]
+    return state
+
+
+async def submit_attempt_service(user, company_id, attempt_id, answers_form, db_mongo, db_postgres, redis):
+    """
+    Grades an attempt from its autosaved answers.
+
+    Answers sent with the submission override the saved ones and unanswered questions count as
+    wrong. Assembled quizzes are graded from the answer key cached in the attempt, quizzes from
+    their cached immutable version.
+
+    Args:
+        user: The current user.
+        company_id: The ID of the company.
+        attempt_id: The ID of the attempt.
+        answers_form: Optional answers keyed by question number.
+        db_mongo: The database object.
+        db_postgres: The database session.
+        redis: The Redis client.
+
+    Returns:
+        The stored quiz result.
+
+    Raises:
+        HTTPException: If the attempt expired or is not the user's (404) or was already submitted (409).
+    """
+    attempt = await get_attempt(redis, attempt_id, user.get("id"), company_id)
+    quiz_id, quiz_version = attempt["quiz_id"], attempt["quiz_version"]
+    if "answer_key" in attempt:
+        questions, matchers = attempt["questions"], compile_answer_key(attempt["answer_key"])
+    else:
+        try:
+            quiz = await QuizManager.get_quiz_version(db_mongo, quiz_version)
+        except QuizNotFound:
+            raise HTTPException(status_code=404, detail="Quiz version not found")
+        questions, matchers = quiz["questions"], compiled_answer_key(quiz_version, quiz["correct_answers"])
+
+    answers = attempt["answers"]
+    if answers_form is not None:
+        answers_form = answers_form.dict().get("answers")
+        if any(str(number) not in matchers for number in answers_form):
+            raise HTTPException(status_code=400, detail="Answers do not match the quiz questions")
+        answers.update(answers_form)
+    users_answers = {int(number): answers.get(int(number), []) for number in matchers}
+    result, answers, scores = grade_answers(matchers, users_answers)
+    await claim_attempt(redis, attempt_id)
+    try:
+        question_ids = None if quiz_version else {str(question["number"]): question["bank_question_id"]
+                                                  for question in questions}
+        stored = await save_quiz_result(user, company_id, quiz_id, quiz_version, result, len(questions), answers,
+                                        scores, db_postgres, question_ids=question_ids)
+    except BaseException:
+        # nothing was stored, so the attempt and its answers can be submitted again
+        await release_attempt(redis, attempt_id)
+        raise
+    await finish_attempt(redis, attempt_id)
+    return stored
+
+
+def grade_answers(matchers, users_answers):
+    """
+    Grade answers keyed by question number with the compiled ``matchers`` of the answer key.
+
+    Returns:
+        The score (one point per right answer, partial credit where the question type allows it)
+        and the answers and scores keyed by question number as stored in quiz_result_detail.
+
+    Raises:
+        HTTPException: If the answers do not cover exactly the questions of the quiz (400).
+    """
+    if len(matchers) != len(users_answers):
         raise HTTPException(status_code=400, detail="Incorrect number of answers")
+    if any(str(number) not in matchers for number in users_answers):
+        raise HTTPException(status_code=400, detail="Answers do not match the quiz questions")
 
+    answers, scores = {}, {}
     for number, answer in users_answers.items():
-        if set(quiz_answers[str(number)]) == set(answer):
-            results[f"Question {str(number)}"] = {
-                "question": str([question for question in quiz_questions if question["number"] == number]),
-                "answer": answer,
-                "result": "right"
-
-            }
-            results["result " + str(number)] = "right"
-            result += 1
-        else:
-            results[f"Question {str(number)}"] = {
-                "question": str([question for question in quiz_questions if question["number"] == number]),
-                "answer": answer,
-                "result": "wrong",
-            }
+        answers[str(number)] = answer
+        scores[str(number)] = matchers[str(number)](answer)
+    return sum(scores.values()), answers, scores
+
+
+async def save_quiz_result(user, company_id, quiz_id, quiz_version, result, questions_overall, answers, scores,
+                           db_postgres, question_ids=None):
+    """Store a graded attempt and its per-question detail in one transaction."""
     user_result = QuizResults(
         user_id=user.get("id"),
         quiz_id=quiz_id,
+        quiz_version=quiz_version,
         company_id=company_id,
         result=result,
-        questions_overall=len(quiz_questions)
+        questions_overall=questions_overall
     )
     db_postgres.add(user_result)
+    await db_postgres.flush()
+    db_postgres.add(QuizResultDetail(result_id=user_result.id, answers=answers, scores=scores,
+                                      question_ids=question_ids))
+    enqueue_notification(db_postgres, user.get("id"), "quiz_result",
+                         {"quiz_id": quiz_id, "result": result, "questions_overall": questions_overall})
     await db_postgres.commit()
     await db_postgres.refresh(user_result)
-    redis = await get_redis()
-    await redis.set(
-        f'Company {company_id} {user.get("id")} {quiz_id} {user_result.id}', json.dumps(results), ex=172800)
     return user_result
 
 
@@ -202,39 +769,39 @@ async def average_mark_service(user, db, company_id=None):
     return total_marks / total_questions
 
 
-async def get_user_quizzes_json_services(user, db, redis):
-    query = select(QuizResults).where(QuizResults.user_id == user.get("id"))
-    return await get_quiz_json(query=query, db=db, redis=redis)
+def get_user_quizzes_json_services(user, db_mongo, redis):
+    query = result_details_query(QuizResults.user_id == user.get("id"))
+    return stream_export(get_quiz_json, query=query, mongo=db_mongo, redis=redis)
 
 
-async def get_company_quizzes_results_json_services(company_id, db, redis):
-    query = select(QuizResults).where(QuizResults.company_id == company_id)
-    return await get_quiz_json(query=query, db=db, redis=redis)
+def get_company_quizzes_results_json_services(company_id, db_mongo, redis):
+    query = result_details_query(QuizResults.company_id == company_id)
+    return stream_export(get_quiz_json, query=query, mongo=db_mongo, redis=redis)
 
 
-async def get_company_user_quizzes_results_json_services(company_id, user_id, redis, db):
-    query = select(QuizResults).where(QuizResults.company_id == company_id,
-                                      QuizResults.user_id == user_id)
-    return await get_quiz_json(query=query, db=db, redis=redis)
+def get_company_user_quizzes_results_json_services(company_id, user_id, redis, db_mongo):
+    query = result_details_query(QuizResults.company_id == company_id,
+                                 QuizResults.user_id == user_id)
+    return stream_export(get_quiz_json, query=query, mongo=db_mongo, redis=redis)
 
 
-async def get_quizzes_results_json_services(quiz_id, db, redis):
-    query = select(QuizResults).where(QuizResults.quiz_id == quiz_id)
-    return await get_quiz_json(query=query, db=db, redis=redis)
+def get_quizzes_results_json_services(quiz_id, db_mongo, redis):
+    query = result_details_query(QuizResults.quiz_id == quiz_id)
+    return stream_export(get_quiz_json, query=query, mongo=db_mongo, redis=redis)
 
-async def get_user_quizzes_csv_services(user, db, redis):
-    query = select(QuizResults).where(QuizResults.user_id == user.get("id"))
-    return await get_quiz_csv(query=query, db=db, redis=redis)
+def get_user_quizzes_csv_services(user, db_mongo, redis):
+    query = result_details_query(QuizResults.user_id == user.get("id"))
+    return stream_export(get_quiz_csv, query=query, mongo=db_mongo, redis=redis)
 
-async def get_company_quizzes_results_csv_services(company_id, db, redis):
-    query = select(QuizResults).where(QuizResults.company_id == company_id)
-    return await get_quiz_csv(query=query, db=db, redis=redis)
+def get_company_quizzes_results_csv_services(company_id, db_mongo, redis):
+    query = result_details_query(QuizResults.company_id == company_id)
+    return stream_export(get_quiz_csv, query=query, mongo=db_mongo, redis=redis)
 
-async def get_company_user_quizzes_results_csv_services(company_id, user_id, redis, db):
-    query = select(QuizResults).where(QuizResults.company_id == company_id,
-                                      QuizResults.user_id == user_id)
-    return await get_quiz_json(query=query, db=db, redis=redis)
+def get_company_user_quizzes_results_csv_services(company_id, user_id, redis, db_mongo):
+    query = result_details_query(QuizResults.company_id == company_id,
+                                 QuizResults.user_id == user_id)
+    return stream_export(get_quiz_csv, query=query, mongo=db_mongo, redis=redis)
 
-async def get_quizzes_results_csv_services(quiz_id, db, redis):
-    query = select(QuizResults).where(QuizResults.quiz_id == quiz_id)
-    return await get_quiz_json(query=query, db=db, redis=redis)
\ No newline at end of file
+def get_quizzes_results_csv_services(quiz_id, db_mongo, redis):
+    query = result_details_query(QuizResults.quiz_id == quiz_id)
+    return stream_export(get_quiz_csv, query=query, mongo=db_mongo, redis=redis)
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Standalone task worker.
+
+    $ python -m src.tasks                               # every queue from TASKS_QUEUES
+    $ python -m src.tasks --queue notifications=4       # only the given queues and concurrency
+"""
+import argparse
+import asyncio
+import logging
+
+from src.core.config import settings
+from src.core.redis_config import init_redis_pool, close_redis_pool
+from src.tasks.worker import Worker
+
+
+async def main(queues):
+    await init_redis_pool()
+    try:
+        await Worker(queues).run()
+    finally:
+        await close_redis_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", action="append", default=[], help="name=concurrency, may be repeated")
+    args = parser.parse_args()
+    queues = {name: int(concurrency) for name, concurrency in (item.split("=") for item in args.queue)}
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main(queues or settings.TASKS_QUEUES))
@@ -0,0 +1,73 @@
+import json
+import time
+import uuid
+
+from src.core.config import settings
+from src.core.redis_config import get_redis
+
+PRIORITIES = ("high", "normal", "low")
+CONSUMER_GROUP = "workers"
+SCHEDULED_KEY = "tasks:scheduled"
+DEAD_LETTER_STREAM = "tasks:dead"
+
+TASKS: dict[str, "Task"] = {}
+
+# share of the visibility timeout a task may run by default; a call still running when its message
+# turns idle for TASKS_VISIBILITY_TIMEOUT would be reclaimed and run a second time
+DEFAULT_TIMEOUT_SHARE = 0.8
+
+
+def stream_name(queue, priority):
+    return f"tasks:{queue}:{priority}"
+
+
+class Task:
+    """A registered coroutine function; calling it runs it inline, ``enqueue`` hands it to a worker."""
+
+    def __init__(self, func, name, queue, max_retries, retry_delay, timeout):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+    async def __call__(self, *args, **kwargs):
+        return await self.func(*args, **kwargs)
+
+    def message(self, args, kwargs, attempts=0):
+        return {"id": uuid.uuid4().hex, "task": self.name, "args": json.dumps(args),
+                "kwargs": json.dumps(kwargs), "attempts": attempts}
+
+    async def enqueue(self, *args, priority="normal", delay=0, redis=None, **kwargs):
+        """
+        Persist a call in the queue's Redis stream; args and kwargs must be JSON serializable.
+
+        Delayed calls wait in the scheduled sorted set until a worker moves them to the stream.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority}")
+        redis = redis or await get_redis()
+        message = self.message(list(args), kwargs)
+        stream = stream_name(self.queue, priority)
+        if delay:
+            await redis.zadd(SCHEDULED_KEY, {json.dumps({"stream": stream, "fields": message}): time.time() + delay})
+        else:
+            await redis.xadd(stream, message)
+        return message["id"]
+
+
+def task(name, queue="default", max_retries=None, retry_delay=None, timeout=None):
+    """Register a coroutine function as a task under ``name``; ``timeout`` must stay below the visibility timeout."""
+    timeout = timeout or settings.TASKS_VISIBILITY_TIMEOUT * DEFAULT_TIMEOUT_SHARE
+    if timeout >= settings.TASKS_VISIBILITY_TIMEOUT:
+        raise ValueError(f"Task {name} timeout {timeout}s is not below TASKS_VISIBILITY_TIMEOUT")
+
+    def decorator(func):
+        registered = Task(func, name, queue,
+                          settings.TASKS_MAX_RETRIES if max_retries is None else max_retries,
+                          settings.TASKS_RETRY_DELAY if retry_delay is None else retry_delay,
+                          timeout)
+        TASKS[name] = registered
+        return registered
+    return decorator
@@ -0,0 +1,168 @@
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+import time
+
+from redis.exceptions import ResponseError
+
+from src.core.config import settings
+from src.core.redis_config import get_redis
+from src.tasks.queue import (TASKS, PRIORITIES, CONSUMER_GROUP, SCHEDULED_KEY, DEAD_LETTER_STREAM,
+                             stream_name)
+
+logger = logging.getLogger(__name__)
+
+# modules whose import registers tasks
+TASK_MODULES = ("src.notifications.fanout", "src.companies.purge", "src.auth.cleanup", "src.quizzes.regrade")
+
+# tasks every worker queues once when it starts, to pick up work a crashed process never queued
+STARTUP_TASKS = ("companies.resume_purges",)
+
+
+class Worker:
+    """
+    Runs tasks from Redis streams with a fixed concurrency per queue.
+
+    Every queue has one stream per priority; a worker always drains higher priorities first.
+    Messages stay pending in the consumer group until acknowledged, so a call whose worker died
+    is reclaimed with XAUTOCLAIM once it has been idle for TASKS_VISIBILITY_TIMEOUT and counts
+    as a failed attempt. Messages are only read for free consumers, so none idles in the
+    process while its visibility timeout runs. Failed calls are retried with exponential backoff via the scheduled set
+    and land in the dead letter stream after ``max_retries``.
+    """
+
+    def __init__(self, queues: dict[str, int], redis=None, consumer=None):
+        self.queues = queues
+        self.redis = redis
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.processed = 0
+        self.failed = 0
+
+    async def setup(self):
+        for module in TASK_MODULES:
+            importlib.import_module(module)
+        self.redis = self.redis or await get_redis()
+        for queue in self.queues:
+            for priority in PRIORITIES:
+                try:
+                    await self.redis.xgroup_create(stream_name(queue, priority), CONSUMER_GROUP, id="0",
+                                                   mkstream=True)
+                except ResponseError as e:
+                    if "BUSYGROUP" not in str(e):
+                        raise
+        for name in STARTUP_TASKS:
+            if TASKS[name].queue in self.queues:
+                await TASKS[name].enqueue(priority="low", redis=self.redis)
+
+    async def run(self):
+        await self.setup()
+        logger.info(f"Task worker {self.consumer} started for {self.queues}")
+        runners = [self._promote_scheduled()]
+        for queue, concurrency in self.queues.items():
+            buffer, free = asyncio.Queue(), asyncio.Semaphore(concurrency)
+            runners.append(self._read(queue, buffer, free))
+            runners.append(self._reclaim(queue))
+            runners.extend(self._consume(buffer, free) for _ in range(concurrency))
+        await asyncio.gather(*runners)
+
+    async def _fetch(self, streams, count):
+        for stream in streams:
+            response = await self.redis.xreadgroup(CONSUMER_GROUP, self.consumer, {stream: ">"}, count=count)
+            if response:
+                return [(stream, message_id, fields) for message_id, fields in response[0][1]]
+        response = await self.redis.xreadgroup(CONSUMER_GROUP, self.consumer, {stream: ">" for stream in streams},
+                                               count=count, block=settings.TASKS_BLOCK_MS)
+        response = sorted(response or [], key=lambda item: streams.index(item[0]))
+        return [(stream, message_id, fields) for stream, messages in response for message_id, fields in messages]
+
+    async def _read(self, queue, buffer, free):
+        streams = [stream_name(queue, priority) for priority in PRIORITIES]
+        while True:
+            # one slot per message read; a consumer gives its slot back when the call is done
+            await free.acquire()
+            slots = 1
+            while not free.locked():
+                await free.acquire()
+                slots += 1
+            try:
+                messages = await self._fetch(streams, slots)
+            except Exception as e:
+                logger.error(f"Reading task queue {queue} failed: {e}")
+                messages = []
+                await asyncio.sleep(1)
+            for _ in range(slots - len(messages)):
+                free.release()
+            for message in messages:
+                buffer.put_nowait(message)
+
+    async def _reclaim(self, queue):
+        interval = max(1.0, settings.TASKS_VISIBILITY_TIMEOUT / 2)
+        while True:
+            await asyncio.sleep(interval)
+            for priority in PRIORITIES:
+                stream = stream_name(queue, priority)
+                try:
+                    response = await self.redis.xautoclaim(stream, CONSUMER_GROUP, self.consumer,
+                                                           min_idle_time=settings.TASKS_VISIBILITY_TIMEOUT * 1000,
+                                                           start_id="0-0", count=100)
+                except Exception as e:
+                    logger.error(f"Reclaiming {stream} failed: {e}")
+                    continue
+                for message_id, fields in response[1]:
+                    await self._fail(stream, message_id, fields, "visibility timeout expired")
+
+    async def _promote_scheduled(self):
+        while True:
+            try:
+                due = await self.redis.zrangebyscore(SCHEDULED_KEY, 0, time.time(), start=0, num=100)
+                for member in due:
+                    # whoever removes the member owns it, so each call is promoted once
+                    if await self.redis.zrem(SCHEDULED_KEY, member):
+                        scheduled = json.loads(member)
+                        await self.redis.xadd(scheduled["stream"], scheduled["fields"])
+            except Exception as e:
+                logger.error(f"Promoting scheduled tasks failed: {e}")
+                due = []
+            if len(due) < 100:
+                await asyncio.sleep(settings.TASKS_SCHEDULE_POLL_INTERVAL)
+
+    async def _consume(self, buffer, free):
+        while True:
+            stream, message_id, fields = await buffer.get()
+            try:
+                await self._execute(stream, message_id, fields)
+            finally:
+                free.release()
+
+    async def _execute(self, stream, message_id, fields):
+        registered = TASKS.get(fields["task"])
+        try:
+            if registered is None:
+                raise LookupError(f"Unknown task {fields['task']}")
+            await asyncio.wait_for(registered.func(*json.loads(fields["args"]), **json.loads(fields["kwargs"])),
+                                   registered.timeout)
+        except Exception as e:
+            await self._fail(stream, message_id, fields, repr(e))
+        else:
+            self.processed += 1
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.xack(stream, CONSUMER_GROUP, message_id).xdel(stream, message_id).execute()
+
+    async def _fail(self, stream, message_id, fields, error):
+        self.failed += 1
+        registered = TASKS.get(fields["task"])
+        attempts = int(fields["attempts"]) + 1
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(stream, CONSUMER_GROUP, message_id).xdel(stream, message_id)
+            if registered is not None and attempts <= registered.max_retries:
+                retry = {"stream": stream, "fields": {**fields, "attempts": attempts}}
+                pipe.zadd(SCHEDULED_KEY, {json.dumps(retry): time.time() + registered.retry_delay * 2 ** (attempts - 1)})
+                logger.warning(f"Task {fields['task']} {fields['id']} failed (attempt {attempts}): {error}")
+            else:
+                pipe.xadd(DEAD_LETTER_STREAM, {**fields, "attempts": attempts, "stream": stream, "error": error[:1000]},
+                          maxlen=settings.TASKS_DEAD_LETTER_MAXLEN, approximate=True)
+                logger.error(f"Task {fields['task']} {fields['id']} moved to dead letters: {error}")
+            await pipe.execute()
@@ -12,14 +12,16 @@ from sqlalchemy import select
 
 from src.auth.models import User
 from src.core.config import settings
-from src.database import AsyncSession
+from src.core.redis_config import get_redis
+from src.database import AsyncSession, async_session
 
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/jwt/login")
 
 
 async def authenticate_user(user_to_login, db: AsyncSession):
-    result = await db.execute(select(User).where(User.username == user_to_login.username))
+    result = await db.execute(select(User).where(User.username == user_to_login.username,
+                                                 User.is_deleted == False))
     user = result.scalar_one_or_none()
     if not user:
         return False
@@ -40,6 +42,44 @@ def create_access_token(user_id: int, username: str):
     return jwt.encode(encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+def revoked_user_key(user_id):
+    return f"revoked_user:{user_id}"
+
+
+def active_user_key(user_id):
+    return f"active_user:{user_id}"
+
+
+async def revoke_user_tokens(user_id, redis=None):
+    """Reject every token of the user; the marker outlives the longest-lived token, then expires."""
+    redis = redis or await get_redis()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(revoked_user_key(user_id), 1, ex=settings.access_token_expire_minutes * 60)
+        pipe.delete(active_user_key(user_id))
+        await pipe.execute()
+
+
+async def is_user_revoked(user_id, redis):
+    """
+    Redis only caches the answer: without either marker, e.g. after a flush or an eviction, the
+    User.is_deleted flag decides and the matching marker is written again.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        revoked, active = await pipe.exists(revoked_user_key(user_id)).exists(active_user_key(user_id)).execute()
+    if revoked:
+        return True
+    if active:
+        return False
+    async with async_session() as db:
+        is_deleted = await db.scalar(select(User.is_deleted).where(User.id == user_id))
+    # no row means the user is gone as well
+    if is_deleted or is_deleted is None:
+        await revoke_user_tokens(user_id, redis)
+        return True
+    await redis.set(active_user_key(user_id), 1, ex=settings.USER_ACTIVE_CACHE_TTL)
+    return False
+
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -48,6 +88,9 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         if username is None or user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Could not validate the user")
+        if await is_user_revoked(user_id, await get_redis()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                                detail="Could not validate the user")
         return {"username": username,
                 "id": user_id, }
     except JWTError:
@@ -1,5 +1,6 @@
 from fastapi import HTTPException, status
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 
 from src.companies.models import CompanyRole, CompanyMember
 
@@ -36,4 +37,20 @@ async def is_company_member(company_id: int, user_id, db):
 
     if company_member is None:
         return False
-    return True
\ No newline at end of file
+    return True
+
+
+async def add_company_member(db, user_id, company_id, role_name):
+    """
+    Insert a membership unless the user already belongs to the company, without committing.
+
+    Relies on the unique (company_id, user_id) constraint, so concurrent acceptances cannot create
+    duplicates. Returns True if a row was inserted.
+    """
+    result = await db.execute(
+        insert(CompanyMember)
+        .values(user_id=user_id, company_id=company_id, role=await get_company_role(db, role_name))
+        .on_conflict_do_nothing(index_elements=[CompanyMember.company_id, CompanyMember.user_id])
+        .returning(CompanyMember.id)
+    )
+    return result.scalar_one_or_none() is not None
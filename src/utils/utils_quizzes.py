@@ -1,60 +1,223 @@
 import csv
 import io
 import json
+import logging
 
 from fastapi.params import Depends
+from fastapi_cache import FastAPICache
 from redis.asyncio.client import Redis
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.config import settings
 from src.core.redis_config import get_redis
-from src.database import get_db_session
+from src.database import async_session, get_db_session
+from src.quizzes.manager import QuestionBankManager, QuizManager, QuizNotFound
+from src.quizzes.models import QuizResults, QuizResultDetail
+
+logger = logging.getLogger(__name__)
+
+QUIZ_CACHE_NAMESPACE = "quiz"
+# endpoints cached per quiz with quiz_cache_key_builder
+QUIZ_CACHED_ENDPOINTS = ("get_quiz", "get_quiz_with_answers")
+
+
+def quiz_cache_key_builder(func, namespace="", *, request=None, response=None, args, kwargs):
+    """One cache entry per quiz and endpoint, so an edit can drop exactly the entries of its quiz."""
+    return f"{namespace}:{kwargs['company_id']}:{kwargs['quiz_id']}:{func.__name__}"
+
+
+async def invalidate_quiz_cache(company_id, quiz_id):
+    """
+    Drop the cached reads of one quiz; the cache TTL bounds staleness if this fails.
+
+    The keys are deleted through the backend itself: FastAPICache.clear turns the app prefix into a
+    namespace and would wipe every cached entry with a KEYS scan.
+    """
+    prefix = f"{FastAPICache.get_prefix()}:{QUIZ_CACHE_NAMESPACE}:{company_id}:{quiz_id}"
+    backend = FastAPICache.get_backend()
+    for endpoint in QUIZ_CACHED_ENDPOINTS:
+        try:
+            await backend.clear(key=f"{prefix}:{endpoint}")
+        except KeyError:
+            # the in-memory backend raises for keys that were never cached
+            pass
+        except Exception as e:
+            logger.warning(f"Could not invalidate the cache of quiz {quiz_id}: {e}")
+            return
+
+
+async def iter_ndjson_lines(chunks, max_line_bytes):
+    """
+    Split a streamed body into numbered NDJSON lines without buffering more than one line.
+
+    Lines longer than ``max_line_bytes`` are skipped and yielded as None so the caller can report them.
+    The buffer is scanned with offsets and compacted once per chunk, so the work stays linear in the body.
+    """
+    buffer, number, oversized = bytearray(), 0, False
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            number += 1
+            yield number, None if oversized or end - start > max_line_bytes else bytes(buffer[start:end])
+            oversized = False
+            start = end + 1
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            buffer.clear()
+            oversized = True
+    if buffer or oversized:
+        yield number + 1, None if oversized else bytes(buffer)
+
+
+def result_details_query(*where):
+    """
+    Quiz results matching ``where`` joined to their per-question detail, for one set-based read
+    that is streamed QUIZ_EXPORT_BATCH_SIZE rows at a time.
+    """
+    return (select(QuizResults, QuizResultDetail.answers, QuizResultDetail.scores,
+                   QuizResultDetail.question_ids)
+            .outerjoin(QuizResultDetail, QuizResultDetail.result_id == QuizResults.id)
+            .where(*where)
+            .order_by(QuizResults.id)
+            .execution_options(yield_per=settings.QUIZ_EXPORT_BATCH_SIZE))
+
+
+def legacy_detail_key(quiz):
+    return f'Company {quiz.company_id} {quiz.user_id} {quiz.quiz_id} {quiz.id}'
+
+
+def render_questions(questions):
+    """The export text of every question by number, rendered once rather than per answer."""
+    return {question["number"]: str([question]) for question in questions}
+
+
+async def version_questions(versions, mongo):
+    """Rendered questions of every quiz version; versions of purged quizzes have none."""
+    questions = {}
+    for version in versions:
+        try:
+            document = await QuizManager.get_quiz_version(mongo, version)
+        except QuizNotFound:
+            document = {"questions": []}
+        questions[version] = render_questions(document["questions"])
+    return questions
+
+
+async def bank_questions(question_ids, mongo):
+    """Bank questions of assembled quizzes by id; deleted ones are missing and export as no question."""
+    return {question["_id"]: question for question in await QuestionBankManager.get_questions(mongo, question_ids)}
+
+
+def assembled_questions(question_ids, bank, rendered):
+    """
+    The export text by number of an assembled quiz's questions, as its attempt showed them; every
+    bank question is rendered once per export and number into ``rendered``.
+    """
+    texts = {}
+    for number, question_id in question_ids.items():
+        if (question_id, number) not in rendered:
+            question = bank.get(question_id)
+            rendered[question_id, number] = "[]" if question is None else str([{
+                "number": int(number), "text": question["text"], "answers": question["answers"],
+                "bank_question_id": question_id}])
+        texts[int(number)] = rendered[question_id, number]
+    return texts
+
+
+async def get_result_details(query, db: AsyncSession, mongo, redis: Redis):
+    """
+    The per-question detail of every result of ``query`` in the export format, read one
+    QUIZ_EXPORT_BATCH_SIZE partition at a time. Question texts come from the cached quiz versions,
+    or from the question bank for assembled quizzes, and each is rendered once per export; results
+    stored before quiz_result_detail existed fall back to their Redis blob until it expires.
+    """
+    questions, bank, requested, rendered = {}, {}, set(), {}
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        questions.update(await version_questions({quiz.quiz_version for quiz, answers, *_ in rows
+                                                  if quiz.quiz_version and answers is not None} - questions.keys(),
+                                                 mongo))
+        missing = {question_id for *_, question_ids in rows if question_ids
+                   for question_id in question_ids.values()} - requested
+        if missing:
+            bank.update(await bank_questions(missing, mongo))
+            requested |= missing
+        legacy = [quiz for quiz, answers, *_ in rows if answers is None]
+        blobs = dict(zip((quiz.id for quiz in legacy),
+                         await redis.mget([legacy_detail_key(quiz) for quiz in legacy]) if legacy else []))
+        for quiz, answers, scores, question_ids in rows:
+            if answers is None:
+                if blobs.get(quiz.id):
+                    yield quiz, json.loads(blobs[quiz.id])
+                continue
+            texts = (assembled_questions(question_ids, bank, rendered) if question_ids
+                     else questions.get(quiz.quiz_version, {}))
+            detail = {"user": quiz.user_id, "company": quiz.company_id, "quiz": quiz.quiz_id,
+                      "quiz_version": quiz.quiz_version}
+            for number, answer in answers.items():
+                score = scores[number]
+                detail[f"Question {number}"] = {
+                    "question": texts.get(int(number), "[]"),
+                    "answer": answer,
+                    "result": "right" if score == 1 else "partial" if score else "wrong",
+                    "score": score,
+                }
+                if score == 1:
+                    detail[f"result {number}"] = "right"
+            yield quiz, detail
+
+
+async def stream_export(export, query, mongo, redis: Redis):
+    """
+    Run ``export`` for a StreamingResponse in a session of its own, as the request's session
+    is closed before the body is sent.
+    """
+    async with async_session() as db:
+        async for chunk in export(query=query, db=db, mongo=mongo, redis=redis):
+            yield chunk
 
 
 async def get_quiz_json(query,
                         db: AsyncSession,
+                        mongo,
                         redis: Redis):
-    result = await db.execute(query)
-    result = result.scalars().all()
-    file_content = io.StringIO()
-    for quiz in result:
-        quiz_json = await redis.get(f'Company {quiz.company_id} {quiz.user_id} {quiz.quiz_id} {quiz.id}')
-        if quiz_json:
-            quiz_result = json.loads(quiz_json)
-            file_content.write(json.dumps(quiz_result, indent=4))
-    file_content.seek(0)
-    return file_content.getvalue()
+    chunk = []
+    async for _, quiz_result in get_result_details(query, db, mongo, redis):
+        chunk.append(json.dumps(quiz_result, indent=4))
+        if len(chunk) >= settings.QUIZ_EXPORT_BATCH_SIZE:
+            yield "".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield "".join(chunk)
 
 
 async def get_quiz_csv(query,
                        db: AsyncSession,
+                       mongo,
                        redis: Redis):
-    result = await db.execute(query)
-    result = result.scalars().all()
-    rows = []
-
-    for quiz in result:
-        quiz_json = await redis.get(f'Company {quiz.company_id} {quiz.user_id} {quiz.quiz_id} {quiz.id}')
-        if quiz_json:
-            quiz_result = json.loads(quiz_json)
-            for i in range(1, quiz.questions_overall + 1):
-                question_key = f"Question {i}"
-
-                if question_key in quiz_result:
-                    row = {
-                        "user": quiz_result["user"],
-                        "company": quiz_result["company"],
-                        "quiz": quiz_result["quiz"],
-                        "question": quiz_result[question_key]["question"],
-                        "user_answer": quiz_result[question_key]["answer"],
-                        "result": quiz_result[question_key]["result"]
-                    }
-                    rows.append(row)
-    if rows:
-        file_content = io.StringIO()
-        fieldnames = ["user", "company", "quiz", "question", "user_answer", "result"]
-        writer = csv.DictWriter(file_content, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-        file_content.seek(0)
-        return file_content.getvalue()
+    file_content = io.StringIO()
+    fieldnames = ["user", "company", "quiz", "question", "user_answer", "result"]
+    writer = csv.DictWriter(file_content, fieldnames=fieldnames)
+    writer.writeheader()
+    results = 0
+
+    async for _, quiz_result in get_result_details(query, db, mongo, redis):
+        for question_key in [key for key in quiz_result if key.startswith("Question ")]:
+            row = {
+                "user": quiz_result["user"],
+                "company": quiz_result["company"],
+                "quiz": quiz_result["quiz"],
+                "question": quiz_result[question_key]["question"],
+                "user_answer": quiz_result[question_key]["answer"],
+                "result": quiz_result[question_key]["result"]
+            }
+            writer.writerow(row)
+        results += 1
+        if results % settings.QUIZ_EXPORT_BATCH_SIZE == 0:
+            yield file_content.getvalue()
+            file_content.seek(0)
+            file_content.truncate()
+    if file_content.tell():
+        yield file_content.getvalue()
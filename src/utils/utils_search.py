@@ -0,0 +1,58 @@
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, literal, or_
+
+SEARCH_MODES = ("prefix", "fuzzy")
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(columns, q, mode):
+    """Match any of ``columns``; both modes are served by their pg_trgm GIN indexes."""
+    if mode == "prefix":
+        return or_(*(column.ilike(f"{escape_like(q)}%", escape="\\") for column in columns))
+    return or_(*(column.op("%")(q) for column in columns))
+
+
+def search_rank(columns, q, mode):
+    if mode == "prefix":
+        return literal(1.0)
+    if len(columns) == 1:
+        return func.similarity(columns[0], q)
+    return func.greatest(*(func.similarity(column, q) for column in columns))
+
+
+def encode_cursor(rank, row_id):
+    return f"{rank!r}:{row_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        rank, row_id = cursor.split(":")
+        return float(rank), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_search(query, id_column, columns, q, mode, after, limit):
+    """
+    Restrict ``query`` to search matches ordered by rank, then id, starting after the ``after`` cursor.
+
+    The rank is selected as the last column; prefix matches all rank equally, so they page by id.
+    """
+    rank = search_rank(columns, q, mode).label("rank")
+    query = query.add_columns(rank).where(search_filter(columns, q, mode))
+    if after:
+        after_rank, after_id = decode_cursor(after)
+        query = query.where(or_(rank < after_rank, and_(rank == after_rank, id_column > after_id)))
+    return query.order_by(rank.desc(), id_column).limit(limit + 1)
+
+
+def search_page(rows, limit, serialize):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": [serialize(row) for row in rows],
+        "next_cursor": encode_cursor(rows[-1].rank, rows[-1].id) if has_more else None,
+    }
@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from benchmarks.harness import Volumes, create_stand_ins, reset_schema, seed, wire_app  # noqa: E402
+# importing the app registers every model, so reset_schema creates all tables
+from src.main import app  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption("--slow", action="store_true", help="Also run the tests marked slow, e.g. 100k result exports")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: takes minutes; only runs with --slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--slow"):
+        return
+    skip = pytest.mark.skip(reason="slow, run with --slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def stand_ins(tmp_path):
+    """A throwaway SQLite database with fake Redis and Mongo, schema created and empty."""
+    stand_ins = await create_stand_ins(f"sqlite+aiosqlite:///{tmp_path / 'tests.db'}")
+    await reset_schema(stand_ins)
+    yield stand_ins
+    await stand_ins.engine.dispose()
+
+
+@pytest.fixture
+async def client(stand_ins):
+    """An HTTP client for the app wired to the stand-ins, seeded with three companies and their quizzes."""
+    dataset = await seed(stand_ins, Volumes(users=30, companies=3, quizzes=3, questions=3, results=0, invitations=0))
+    with wire_app(app, stand_ins):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            client.stand_ins, client.dataset = stand_ins, dataset
+            yield client
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+
+from benchmarks.harness import Volumes, create_stand_ins, reset_schema, seed
+from src.companies.models import Application, CompanyMember, Invitation, InvitationStatusEnum
+from src.companies.schemas import InviteApplicationAnswerSchema
+from src.companies.services import application_answer_letter_service, invitational_answer_letter_service
+from src.core import redis_config
+
+# SQLite serializes writers, so the race only exists on a real Postgres; the whole database is reset
+DATABASE_URL = os.environ.get("TEST_POSTGRES_URL")
+
+RECEIVERS = 20
+DUPLICATES = 5
+ACCEPT = InviteApplicationAnswerSchema(answer="accepted")
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="set TEST_POSTGRES_URL to a throwaway Postgres database")
+
+
+@pytest.fixture
+async def postgres(monkeypatch):
+    stand_ins = await create_stand_ins(DATABASE_URL)
+    monkeypatch.setattr(redis_config, "redis", stand_ins.redis)
+    await reset_schema(stand_ins)
+    yield stand_ins
+    await stand_ins.engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_simultaneous_accepts_create_one_membership(postgres):
+    # every user only owns their own company, so all receivers start outside company 1
+    users = RECEIVERS + 1
+    await seed(postgres, Volumes(users=users, companies=users, quizzes=1, questions=2, results=0, invitations=0))
+    receivers = range(2, users + 1)
+    async with postgres.session_maker() as db:
+        invitations = (await db.execute(insert(Invitation).values([
+            {"sender_user_id": 1, "receiver_user_id": user_id, "company_id": 1,
+             "status": InvitationStatusEnum.INPROCESS.value, "is_active": True} for user_id in receivers
+        ]).returning(Invitation.id))).scalars().all()
+        applications = (await db.execute(insert(Application).values([
+            {"sender_user_id": user_id, "company_id": 1,
+             "status": InvitationStatusEnum.INPROCESS.value, "is_active": True} for user_id in receivers
+        ]).returning(Application.id))).scalars().all()
+        await db.commit()
+
+    async def answer(service, letter_id):
+        async with postgres.session_maker() as db:
+            try:
+                await service(letter_id, ACCEPT, db)
+            except HTTPException as e:
+                return e.status_code
+            return 200
+
+    calls = [answer(invitational_answer_letter_service, invitation_id)
+             for invitation_id in invitations for _ in range(DUPLICATES)]
+    calls += [answer(application_answer_letter_service, application_id) for application_id in applications]
+    statuses = await asyncio.gather(*calls)
+
+    assert set(statuses) <= {200, 404}
+    assert statuses[:len(invitations) * DUPLICATES].count(200) == RECEIVERS
+    async with postgres.session_maker() as db:
+        memberships = dict((await db.execute(
+            select(CompanyMember.user_id, func.count())
+            .where(CompanyMember.company_id == 1, CompanyMember.user_id != 1)
+            .group_by(CompanyMember.user_id))).all())
+        accepted = dict((await db.execute(
+            select(Invitation.receiver_user_id, func.count())
+            .where(Invitation.status == InvitationStatusEnum.ACCEPTED.value, Invitation.is_active == False)
+            .group_by(Invitation.receiver_user_id))).all())
+    assert memberships == {user_id: 1 for user_id in receivers}
+    assert accepted == {user_id: 1 for user_id in receivers}
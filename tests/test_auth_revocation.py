@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, text, update
+
+from benchmarks.harness import Volumes, seed, username
+from src.auth.models import User
+from src.core import redis_config
+from src.utils import utils_auth
+from src.utils.utils_auth import create_access_token, get_current_user, revoke_user_tokens
+
+
+@pytest.fixture
+async def users(stand_ins, monkeypatch):
+    monkeypatch.setattr(redis_config, "redis", stand_ins.redis)
+    monkeypatch.setattr(utils_auth, "async_session", stand_ins.session_maker)
+    await seed(stand_ins, Volumes(users=2, companies=1, quizzes=1, questions=2, results=0, invitations=0))
+    return stand_ins
+
+
+def token(user_id):
+    return create_access_token(user_id=user_id, username=username(user_id))
+
+
+@pytest.mark.anyio
+async def test_deleted_user_stays_revoked_after_redis_loses_the_marker(users):
+    assert (await get_current_user(token(2)))["id"] == 2
+    async with users.session_maker() as db:
+        await db.execute(update(User).where(User.id == 2).values(is_deleted=True))
+        await db.commit()
+    await revoke_user_tokens(2, users.redis)
+    with pytest.raises(HTTPException):
+        await get_current_user(token(2))
+
+    await users.redis.flushdb()
+    with pytest.raises(HTTPException):
+        await get_current_user(token(2))
+    # the database answer is cached again
+    assert await users.redis.exists(utils_auth.revoked_user_key(2))
+    assert (await get_current_user(token(1)))["id"] == 1
+
+
+@pytest.mark.anyio
+async def test_unknown_user_is_rejected(users):
+    with pytest.raises(HTTPException):
+        await get_current_user(token(99))
+
+
+@pytest.mark.anyio
+async def test_user_written_outside_the_orm_is_active(users):
+    async with users.session_maker() as db:
+        await db.execute(text("INSERT INTO \"user\" (id, username, email, hashed_password) "
+                              "VALUES (50, 'copied', 'copied@example.com', 'x')"))
+        await db.commit()
+        assert await db.scalar(select(User.is_deleted).where(User.id == 50)) is False
+    assert (await get_current_user(create_access_token(user_id=50, username="copied")))["id"] == 50
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import update
+
+from benchmarks.harness import username
+from src.auth.models import User
+from src.utils.utils_auth import create_access_token
+
+
+def owner():
+    return {"Authorization": f"Bearer {create_access_token(user_id=1, username=username(1))}"}
+
+
+@pytest.mark.anyio
+async def test_bulk_invite_does_not_find_deleted_accounts(client):
+    async with client.stand_ins.session_maker() as db:
+        await db.execute(update(User).where(User.id.in_([5, 6])).values(is_deleted=True))
+        await db.commit()
+
+    response = await client.post("/companies/company_invite/bulk", headers=owner(), json={
+        "company_id": 1, "receiver_user_ids": [5, 8], "receiver_emails": [f"{username(6)}@example.com"]})
+    assert response.status_code == 200, response.text
+    outcomes = {entry["receiver"]: entry["outcome"] for entry in response.json()}
+    assert outcomes == {5: "not_found", 8: "invited", f"{username(6)}@example.com": "not_found"}
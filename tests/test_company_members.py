@@ -0,0 +1,26 @@
+import pytest
+from sqlalchemy import select
+
+from benchmarks.harness import username
+from src.companies.models import CompanyMember
+from src.utils.utils_auth import create_access_token
+
+
+def token(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id=user_id, username=username(user_id))}"}
+
+
+@pytest.mark.anyio
+async def test_member_total_drops_as_soon_as_a_member_deletes_their_account(client):
+    async with client.stand_ins.session_maker() as db:
+        member_id = await db.scalar(select(CompanyMember.user_id)
+                                    .where(CompanyMember.company_id == 1, CompanyMember.user_id != 1)
+                                    .order_by(CompanyMember.id).limit(1))
+    before = (await client.get("/companies/details/1/members", headers=token(1))).json()
+
+    assert (await client.delete("/auth/users", headers=token(member_id))).status_code == 200
+
+    # the memberships are only removed later by the cleanup task
+    after = (await client.get("/companies/details/1/members", headers=token(1))).json()
+    assert member_id not in [item["user_id"] for item in after["items"]]
+    assert after["total"] == before["total"] - 1
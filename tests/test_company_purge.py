@@ -0,0 +1,54 @@
+import json
+import time
+
+import pytest
+from sqlalchemy import select, update
+
+from benchmarks.harness import Volumes, seed
+from src.companies.models import Company
+from src.companies.purge import prepare_company_purge, purge_company, purge_key, resume_company_purges
+from src.tasks.queue import stream_name
+
+
+async def flag_deleted(stand_ins, *company_ids):
+    async with stand_ins.session_maker() as db:
+        await db.execute(update(Company).where(Company.id.in_(company_ids)).values(is_deleted=True))
+        await db.commit()
+
+
+async def queued_purges(redis):
+    messages = await redis.xrange(stream_name("default", "low"))
+    return sorted(json.loads(fields["args"])[0] for _, fields in messages if fields["task"] == "companies.purge")
+
+
+@pytest.mark.anyio
+async def test_resume_queues_flagged_companies_without_recent_progress(stand_ins):
+    await seed(stand_ins, Volumes(users=4, companies=4, quizzes=1, questions=2, results=3, invitations=0))
+    redis = stand_ins.redis
+    # 1: flagged but the process died before the purge was recorded, 2: recorded but never queued,
+    # 3: purge in progress, 4: not deleted
+    await flag_deleted(stand_ins, 1, 2, 3)
+    await prepare_company_purge(2, 7, redis)
+    await redis.hset(purge_key(2), "updated_at", time.time() - 3600)
+    await prepare_company_purge(3, 7, redis)
+
+    await resume_company_purges(stand_ins.session_maker, redis)
+
+    assert await queued_purges(redis) == [1, 2]
+    assert (await redis.hgetall(purge_key(1)))["deleted_by"] == "0"
+    assert (await redis.hgetall(purge_key(2)))["deleted_by"] == "7"
+
+
+@pytest.mark.anyio
+async def test_resumed_purge_removes_the_company(stand_ins):
+    await seed(stand_ins, Volumes(users=2, companies=2, quizzes=1, questions=2, results=3, invitations=0))
+    await flag_deleted(stand_ins, 1)
+    await resume_company_purges(stand_ins.session_maker, stand_ins.redis)
+
+    await purge_company(1, stand_ins.session_maker, stand_ins.redis, stand_ins.mongo)
+
+    assert (await stand_ins.redis.hget(purge_key(1), "status")) == "done"
+    async with stand_ins.session_maker() as db:
+        assert (await db.execute(select(Company.id))).scalars().all() == [2]
+    await resume_company_purges(stand_ins.session_maker, stand_ins.redis)
+    assert await queued_purges(stand_ins.redis) == [1]
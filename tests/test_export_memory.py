@@ -0,0 +1,13 @@
+import pytest
+
+from benchmarks.export_memory import CSV_BUDGET, JSON_BUDGET, build_results, measure
+from src.utils.utils_quizzes import get_quiz_csv, get_quiz_json
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("results", [20_000, pytest.param(100_000, marks=pytest.mark.slow)])
+@pytest.mark.parametrize("export, budget", [(get_quiz_json, JSON_BUDGET), (get_quiz_csv, CSV_BUDGET)],
+                         ids=["json", "csv"])
+async def test_export_peak_memory_within_budget(export, budget, results):
+    # the budget is the same for every size, so an export that buffers its output fails on either
+    assert await measure(export, build_results(results)) <= budget
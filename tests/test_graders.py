@@ -0,0 +1,59 @@
+import pytest
+from pydantic import ValidationError
+
+from benchmarks.harness import username
+from src.core.config import settings
+from src.quizzes.graders import compile_key
+from src.quizzes.schemas import BankQuestion, QuestionCreate, QuestionUpdate, QuizModel
+from src.utils.utils_auth import create_access_token
+
+
+def quiz(questions, correct_answers):
+    return {"name": "q", "description": "d", "questions": questions, "correct_answers": correct_answers}
+
+
+def test_text_patterns_match_regardless_of_case():
+    match = compile_key({"type": "text", "patterns": [r"Mt\.? Everest"]})
+    assert match("Mt. Everest") == 1.0
+    assert match("  mt   everest ") == 1.0
+    assert match("K2") == 0.0
+
+
+def test_overlong_text_answers_score_zero():
+    match = compile_key({"type": "text", "accepted": ["a"], "patterns": [r"a+"]})
+    assert match("a" * settings.QUIZ_TEXT_ANSWER_MAX_LENGTH) == 1.0
+    assert match("a" * (settings.QUIZ_TEXT_ANSWER_MAX_LENGTH + 1)) == 0.0
+
+
+def test_choice_keys_need_existing_options():
+    questions = [{"text": "one", "answers": ["a", "b"]}, {"text": "two", "answers": []}]
+    with pytest.raises(ValidationError, match="Question 2"):
+        QuizModel.model_validate(quiz(questions, {"1": [0], "2": [7]}))
+    with pytest.raises(ValidationError, match=r"options \[2\]"):
+        QuizModel.model_validate(quiz(questions[:1] * 2, {"1": [0], "2": {"type": "multi_select", "options": [1, 2]}}))
+    with pytest.raises(ValidationError):
+        QuestionCreate(text="q", answers=["a"], correct_answers={"type": "sequence", "order": [0]})
+    with pytest.raises(ValidationError):
+        BankQuestion(text="q", answers=["a", "b"], correct_answers=[2])
+    with pytest.raises(ValidationError):
+        QuestionUpdate(answers=["a", "b"], correct_answers=[3])
+
+
+def test_range_and_text_questions_need_no_answers():
+    questions = [{"text": "one", "answers": []}, {"text": "two"}]
+    QuizModel.model_validate(quiz(questions, {"1": {"type": "range", "min": 1, "max": 2},
+                                              "2": {"type": "text", "accepted": ["x"]}}))
+    QuestionCreate(text="q", correct_answers={"type": "range", "min": 0, "max": 1})
+
+
+@pytest.mark.anyio
+async def test_partial_question_update_is_checked_against_the_stored_question(client):
+    token = create_access_token(user_id=1, username=username(1))
+    path = f"/quizzes/1/{client.dataset.company_quiz(1)}/questions/1"
+
+    response = await client.patch(path, json={"correct_answers": [9]}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    response = await client.patch(path, json={"answers": ["only"]}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 400
+    response = await client.patch(path, json={"correct_answers": [1]}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
@@ -0,0 +1,26 @@
+import pytest
+from fastapi_cache import FastAPICache
+
+from benchmarks.harness import wire_app
+from src.core import redis_config
+from src.core.redis_config import get_redis
+from src.main import app
+from src.utils import utils_auth, utils_quizzes
+
+
+def module_clients():
+    return (redis_config.redis, utils_auth.async_session, utils_quizzes.async_session, FastAPICache._backend)
+
+
+@pytest.mark.anyio
+async def test_wired_app_puts_back_everything_it_replaced(stand_ins):
+    before, overrides = module_clients(), dict(app.dependency_overrides)
+
+    with wire_app(app, stand_ins):
+        assert redis_config.redis is stand_ins.redis
+        assert utils_auth.async_session is utils_quizzes.async_session is stand_ins.session_maker
+        assert get_redis in app.dependency_overrides
+        assert FastAPICache._backend is not before[3]
+
+    assert module_clients() == before
+    assert app.dependency_overrides == overrides
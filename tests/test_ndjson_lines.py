@@ -0,0 +1,29 @@
+import pytest
+
+from src.utils.utils_quizzes import iter_ndjson_lines
+
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def lines(max_line_bytes, *chunks):
+    return [item async for item in iter_ndjson_lines(chunked(*chunks), max_line_bytes)]
+
+
+@pytest.mark.anyio
+async def test_lines_split_across_chunks():
+    assert await lines(10, b'{"a"', b':1}\n{"b":2}\n\n{"c"', b":3}") == [
+        (1, b'{"a":1}'), (2, b'{"b":2}'), (3, b""), (4, b'{"c":3}')]
+
+
+@pytest.mark.anyio
+async def test_oversized_line_in_one_chunk_is_skipped():
+    assert await lines(5, b"ok\n" + b"x" * 6 + b"\nok2\n") == [(1, b"ok"), (2, None), (3, b"ok2")]
+
+
+@pytest.mark.anyio
+async def test_oversized_line_across_chunks_is_skipped():
+    assert await lines(5, b"xxxx", b"xxxx", b"xx\nok") == [(1, None), (2, b"ok")]
+    assert await lines(5, b"ok\nxxxx", b"xxxx") == [(1, b"ok"), (2, None)]
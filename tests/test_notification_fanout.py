@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import func, select
+
+from benchmarks.harness import Volumes, seed
+from src.companies.models import CompanyMember
+from src.core.config import settings
+from src.notifications.fanout import fan_out_company_notification, fanout_key
+from src.notifications.models import NotificationOutbox
+
+PAYLOAD = {"company_id": 1, "quiz_id": "q", "quiz_name": "Quiz"}
+
+
+@pytest.mark.anyio
+async def test_fan_out_retried_after_an_unrecorded_chunk_notifies_each_member_once(stand_ins, monkeypatch):
+    monkeypatch.setattr(settings, "FANOUT_CHUNK_SIZE", 3)
+    await seed(stand_ins, Volumes(users=10, companies=1, quizzes=1, questions=2, results=0, invitations=0))
+    redis = stand_ins.redis
+    await fan_out_company_notification("f", 1, "quiz_published", PAYLOAD,
+                                       session_maker=stand_ins.session_maker, redis=redis)
+    # the chunks were committed but the worker died before recording any of them
+    await redis.hset(fanout_key("f"), mapping={"status": "running", "enqueued": 0, "last_member_id": 0})
+
+    enqueued = await fan_out_company_notification("f", 1, "quiz_published", PAYLOAD,
+                                                  session_maker=stand_ins.session_maker, redis=redis)
+
+    async with stand_ins.session_maker() as db:
+        members = await db.scalar(select(func.count()).select_from(CompanyMember).where(CompanyMember.company_id == 1))
+        recipients = (await db.execute(select(NotificationOutbox.recipient_user_id, func.count())
+                                       .where(NotificationOutbox.fanout_id == "f")
+                                       .group_by(NotificationOutbox.recipient_user_id))).all()
+    assert enqueued == members == len(recipients)
+    assert {count for _, count in recipients} == {1}
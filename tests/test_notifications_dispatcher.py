@@ -0,0 +1,188 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import insert, select, update
+
+from benchmarks.harness import Volumes, seed
+from src.core.config import settings
+from src.notifications.dispatcher import NotificationDispatcher, RateLimiter, SMTPConnectionPool
+from src.notifications.models import NotificationOutbox, NotificationStatusEnum
+
+
+class RecordingHandler:
+    """Accepts messages, rejecting the first ``reject`` of them with a transient error."""
+
+    def __init__(self, reject=0):
+        self.reject = reject
+        self.received = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.peers.add(session.peer)
+        if self.reject:
+            self.reject -= 1
+            return "451 Try again later"
+        self.received.append(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        servers.append(controller)
+        return controller.port
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+async def queue_notifications(stand_ins, count):
+    await seed(stand_ins, Volumes(users=3, companies=1, quizzes=1, questions=2, results=0, invitations=0))
+    async with stand_ins.engine.begin() as conn:
+        await conn.execute(insert(NotificationOutbox), [
+            {"recipient_user_id": index % 3 + 1, "kind": "quiz_result",
+             "payload": {"quiz_id": "test", "result": 1, "questions_overall": 2}} for index in range(count)])
+
+
+async def outbox(stand_ins):
+    async with stand_ins.session_maker() as db:
+        return (await db.execute(select(NotificationOutbox).order_by(NotificationOutbox.id))).scalars().all()
+
+
+def dispatcher(stand_ins, port, pool_size):
+    pool = SMTPConnectionPool("127.0.0.1", port, None, None, False, pool_size)
+    return NotificationDispatcher(session_maker=stand_ins.session_maker, pool=pool, rate_limiter=RateLimiter(0))
+
+
+@pytest.mark.anyio
+async def test_pooled_connection_is_reused_across_batches(stand_ins, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_BATCH_SIZE", 5)
+    handler = RecordingHandler()
+    sender = dispatcher(stand_ins, smtp_server(handler), pool_size=1)
+    await queue_notifications(stand_ins, 12)
+
+    while await sender.dispatch_batch():
+        pass
+    await sender.pool.close()
+
+    assert len(handler.received) == 12
+    assert len(handler.peers) == 1
+    assert {row.status for row in await outbox(stand_ins)} == {NotificationStatusEnum.SENT.value}
+
+
+@pytest.mark.anyio
+async def test_rejected_message_is_retried_after_backoff(stand_ins, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_BACKOFF_SECONDS", 30)
+    handler = RecordingHandler(reject=1)
+    sender = dispatcher(stand_ins, smtp_server(handler), pool_size=1)
+    await queue_notifications(stand_ins, 1)
+
+    before = datetime.utcnow()
+    assert await sender.dispatch_batch() == 1
+    [row] = await outbox(stand_ins)
+    assert row.status == NotificationStatusEnum.PENDING.value
+    assert row.attempts == 1 and "Try again later" in row.last_error
+    assert timedelta(seconds=29) < row.next_attempt_at - before <= timedelta(seconds=31)
+
+    # not due yet, so the next batch leaves it alone
+    assert await sender.dispatch_batch() == 0
+    async with stand_ins.session_maker() as db:
+        await db.execute(update(NotificationOutbox).values(next_attempt_at=datetime.utcnow()))
+        await db.commit()
+    assert await sender.dispatch_batch() == 1
+    await sender.pool.close()
+
+    [row] = await outbox(stand_ins)
+    assert row.status == NotificationStatusEnum.SENT.value
+    assert len(handler.received) == 1
+    # the rejected transaction was reset, not the session
+    assert len(handler.peers) == 1
+
+
+@pytest.mark.anyio
+async def test_message_fails_after_max_attempts(stand_ins, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(settings, "NOTIFICATIONS_MAX_ATTEMPTS", 3)
+    handler = RecordingHandler(reject=10)
+    sender = dispatcher(stand_ins, smtp_server(handler), pool_size=1)
+    await queue_notifications(stand_ins, 1)
+
+    while await sender.dispatch_batch():
+        pass
+    await sender.pool.close()
+
+    [row] = await outbox(stand_ins)
+    assert row.status == NotificationStatusEnum.FAILED.value
+    assert row.attempts == 3
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_BACKOFF_SECONDS", 30)
+    monkeypatch.setattr(settings, "NOTIFICATIONS_MAX_BACKOFF_SECONDS", 100)
+    backoff = NotificationDispatcher(pool=object(), rate_limiter=RateLimiter(0)).backoff
+    assert [backoff(attempts).total_seconds() for attempts in (1, 2, 3, 4)] == [30, 60, 100, 100]
+
+
+class ObservingPool:
+    """Records the outbox rows as another session sees them while each message is being sent."""
+
+    def __init__(self, stand_ins):
+        self.stand_ins = stand_ins
+        self.seen = []
+
+    async def send(self, message):
+        self.seen.extend((row.status, row.next_attempt_at) for row in await outbox(self.stand_ins))
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.anyio
+async def test_claimed_rows_are_committed_as_sending_before_the_send(stand_ins, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_LEASE_SECONDS", 60)
+    pool = ObservingPool(stand_ins)
+    sender = NotificationDispatcher(session_maker=stand_ins.session_maker, pool=pool, rate_limiter=RateLimiter(0))
+    await queue_notifications(stand_ins, 1)
+
+    before = datetime.utcnow()
+    assert await sender.dispatch_batch() == 1
+
+    [(status, lease)] = pool.seen
+    assert status == NotificationStatusEnum.SENDING.value
+    assert timedelta(seconds=59) < lease - before <= timedelta(seconds=61)
+    [row] = await outbox(stand_ins)
+    assert row.status == NotificationStatusEnum.SENT.value
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_claimed_again_and_the_stale_outcome_is_dropped(stand_ins, smtp_server):
+    handler = RecordingHandler()
+    sender = dispatcher(stand_ins, smtp_server(handler), pool_size=1)
+    await queue_notifications(stand_ins, 1)
+
+    # a dispatcher claims the row and dies before sending
+    stale_lease, [(notification, _)] = await sender.claim_batch()
+    assert await sender.dispatch_batch() == 0
+    async with stand_ins.session_maker() as db:
+        await db.execute(update(NotificationOutbox).values(next_attempt_at=datetime.utcnow()))
+        await db.commit()
+    assert await sender.dispatch_batch() == 1
+    await sender.pool.close()
+
+    await sender.record(stale_lease, [(notification.id, {"status": NotificationStatusEnum.FAILED.value})])
+    [row] = await outbox(stand_ins)
+    assert row.status == NotificationStatusEnum.SENT.value
+    assert len(handler.received) == 1
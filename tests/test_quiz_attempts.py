@@ -0,0 +1,90 @@
+import pytest
+from bson import ObjectId
+from sqlalchemy import func, select
+
+from benchmarks.harness import username
+from src.quizzes import services
+from src.quizzes.attempts import attempt_key
+from src.quizzes.models import QuizResults
+from src.utils.utils_auth import create_access_token
+
+OWNER, MEMBER = 1, 4
+
+
+def headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id=user_id, username=username(user_id))}"}
+
+
+async def stored_results(stand_ins):
+    async with stand_ins.session_maker() as db:
+        return await db.scalar(select(func.count()).select_from(QuizResults))
+
+
+async def start_bank_attempt(client):
+    response = await client.post("/quizzes/1/bank", headers=headers(OWNER), json={"questions": [
+        {"text": f"Q{index}", "answers": ["a", "b"], "correct_answers": [0], "tags": ["t"]} for index in range(3)]})
+    assert response.status_code == 200, response.text
+    response = await client.post("/quizzes/1/bank/attempts", headers=headers(MEMBER), json={"tags": ["t"], "questions": 3})
+    return response.json()["attempt_id"]
+
+
+async def start_quiz_attempt(client):
+    response = await client.post(f"/quizzes/1/{client.dataset.company_quiz(1)}/attempts", headers=headers(MEMBER))
+    return response.json()["attempt_id"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("start", [start_bank_attempt, start_quiz_attempt], ids=["bank", "quiz"])
+async def test_attempt_survives_a_failed_submission(client, monkeypatch, start):
+    attempt_id = await start(client)
+    assert (await client.put(f"/quizzes/1/attempts/{attempt_id}/answers/1", json={"answer": [0]},
+                             headers=headers(MEMBER))).status_code == 204
+
+    async def failing_save(*args, **kwargs):
+        raise ConnectionError("database went away")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(services, "save_quiz_result", failing_save)
+        with pytest.raises(ConnectionError):
+            await client.post(f"/quizzes/1/attempts/{attempt_id}/solution", headers=headers(MEMBER))
+
+    attempt = (await client.get(f"/quizzes/1/attempts/{attempt_id}", headers=headers(MEMBER))).json()
+    assert attempt["answers"] == {"1": [0]}
+    response = await client.post(f"/quizzes/1/attempts/{attempt_id}/solution", headers=headers(MEMBER))
+    assert response.status_code == 200, response.text
+    assert await stored_results(client.stand_ins) == 1
+    assert not await client.stand_ins.redis.exists(attempt_key(attempt_id))
+    response = await client.post(f"/quizzes/1/attempts/{attempt_id}/solution", headers=headers(MEMBER))
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_attempt_being_submitted_cannot_be_submitted_again(client):
+    attempt_id = await start_bank_attempt(client)
+    await client.stand_ins.redis.hset(attempt_key(attempt_id), "submitted", 1)
+
+    response = await client.post(f"/quizzes/1/attempts/{attempt_id}/solution", headers=headers(MEMBER))
+    assert response.status_code == 409
+    assert await stored_results(client.stand_ins) == 0
+
+
+@pytest.mark.anyio
+async def test_autosave_is_refused_while_the_attempt_is_submitted(client):
+    attempt_id = await start_quiz_attempt(client)
+    await client.stand_ins.redis.hset(attempt_key(attempt_id), "submitted", 1)
+
+    response = await client.put(f"/quizzes/1/attempts/{attempt_id}/answers/1", json={"answer": [0]},
+                                headers=headers(MEMBER))
+    assert response.status_code == 409
+
+
+@pytest.mark.anyio
+async def test_quiz_time_limit_bounds_the_attempt(client):
+    quiz_id = client.dataset.company_quiz(1)
+    await client.stand_ins.mongo.update_one({"_id": ObjectId(quiz_id)}, {"$set": {"time_limit": 120}})
+
+    response = await client.post(f"/quizzes/1/{quiz_id}/attempts", headers=headers(MEMBER))
+    attempt = response.json()
+    assert 0 < await client.stand_ins.redis.ttl(attempt_key(attempt["attempt_id"])) <= 120
+    response = await client.get(f"/quizzes/1/attempts/{attempt['attempt_id']}", headers=headers(MEMBER))
+    assert response.json()["expires_in"] <= 120
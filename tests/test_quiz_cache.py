@@ -0,0 +1,34 @@
+import pytest
+from fakeredis import FakeServer, aioredis as fake_aioredis
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+
+from src.utils.utils_quizzes import QUIZ_CACHE_NAMESPACE, QUIZ_CACHED_ENDPOINTS, invalidate_quiz_cache
+
+
+def cache_key(company_id, quiz_id, endpoint):
+    return f"{FastAPICache.get_prefix()}:{QUIZ_CACHE_NAMESPACE}:{company_id}:{quiz_id}:{endpoint}"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", [lambda: RedisBackend(fake_aioredis.FakeRedis(server=FakeServer())), InMemoryBackend],
+                         ids=["redis", "in-memory"])
+async def test_edit_only_drops_the_entries_of_its_quiz(backend):
+    FastAPICache.reset()
+    FastAPICache.init(backend(), prefix="fastapi-cache")
+    backend = FastAPICache.get_backend()
+    for quiz_id in ("a", "b"):
+        for endpoint in QUIZ_CACHED_ENDPOINTS:
+            await backend.set(cache_key(1, quiz_id, endpoint), b"{}", expire=30)
+    await backend.set("fastapi-cache:other", b"{}", expire=30)
+
+    await invalidate_quiz_cache(1, "a")
+    # a second edit finds nothing to drop
+    await invalidate_quiz_cache(1, "a")
+
+    for endpoint in QUIZ_CACHED_ENDPOINTS:
+        assert await backend.get(cache_key(1, "a", endpoint)) is None
+        assert await backend.get(cache_key(1, "b", endpoint)) == b"{}"
+    assert await backend.get("fastapi-cache:other") == b"{}"
+    FastAPICache.reset()
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from benchmarks.harness import username
+from src.quizzes.manager import QUIZ_VERSION_CACHE, QuizManager
+from src.quizzes.models import QuizResultDetail, QuizResults
+from src.quizzes.regrade import QuizRegrade, regrade_lock_key, regrade_quiz, start_quiz_regrade
+from src.utils.utils_auth import create_access_token
+
+QUIZ = {"name": "typed", "description": "d",
+        "questions": [{"text": "pick", "answers": ["a", "b", "c"]}, {"text": "multi", "answers": ["a", "b", "c", "d"]},
+                      {"text": "pi?"}]}
+KEY = {"1": [1], "2": {"type": "multi_select", "options": [0, 1]}, "3": {"type": "range", "min": 3.0, "max": 3.1}}
+FIXED_KEY = {"1": [2], "2": {"type": "multi_select", "options": [0, 2]}, "3": {"type": "range", "min": 3.0, "max": 3.2}}
+
+
+def owner():
+    return {"Authorization": f"Bearer {create_access_token(user_id=1, username=username(1))}"}
+
+
+async def graded_quiz(client):
+    response = await client.post("/quizzes/1", json={**QUIZ, "correct_answers": KEY}, headers=owner())
+    quiz_id = response.json()["_id"]
+    for answers in ({"1": 1, "2": [0, 1], "3": 3.05}, {"1": 2, "2": [0], "3": 3.2}, {"1": [2], "2": [0, 2, 1], "3": "3.15"}):
+        response = await client.post(f"/quizzes/1/{quiz_id}/solution", json={"answers": answers}, headers=owner())
+        assert response.status_code == 200, response.text
+    response = await client.put(f"/quizzes/1/{quiz_id}", json={**QUIZ, "correct_answers": FIXED_KEY}, headers=owner())
+    assert response.status_code == 200, response.text
+    return quiz_id
+
+
+async def run_regrade(client, quiz_id):
+    stand_ins = client.stand_ins
+    await regrade_quiz(quiz_id, session_maker=stand_ins.session_maker, redis=stand_ins.redis, mongo=stand_ins.mongo)
+    return (await client.get(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).json()
+
+
+@pytest.mark.anyio
+async def test_regrade_rescores_results_and_releases_the_quiz(client):
+    quiz_id = await graded_quiz(client)
+    response = await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())
+    assert response.status_code == 202
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 409
+
+    progress = await run_regrade(client, quiz_id)
+    assert (progress["status"], progress["scanned"], progress["changed"]) == ("done", 3, 3)
+    async with client.stand_ins.session_maker() as db:
+        assert [row.result for row in (await db.execute(select(QuizResults).order_by(QuizResults.id))).scalars()] == [
+            1.0, 2.5, 2.5]
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+
+
+@pytest.mark.anyio
+async def test_concurrent_starts_claim_the_regrade_once(client):
+    quiz_id = await graded_quiz(client)
+    version = (await QuizManager.get_current_version(client.stand_ins.mongo, quiz_id))["version"]
+    started = await asyncio.gather(*(start_quiz_regrade(1, quiz_id, version, 1, client.stand_ins.redis)
+                                     for _ in range(5)))
+    assert started.count(True) == 1
+
+
+@pytest.mark.anyio
+async def test_failed_regrade_is_reported_and_can_be_restarted(client, monkeypatch):
+    quiz_id = await graded_quiz(client)
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+
+    async def broken_batch(self, *args):
+        raise RuntimeError("database went away")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(QuizRegrade, "fetch_batch", broken_batch)
+        progress = await run_regrade(client, quiz_id)
+    assert progress["status"] == "failed" and "database went away" in progress["error"]
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+    assert (await run_regrade(client, quiz_id))["status"] == "done"
+
+
+@pytest.mark.anyio
+async def test_lost_regrade_is_reported_as_failed(client):
+    quiz_id = await graded_quiz(client)
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+    # the lock outlives a live run by a visibility timeout, so a vanished lock means the task is gone
+    await client.stand_ins.redis.delete(regrade_lock_key(quiz_id))
+
+    progress = (await client.get(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).json()
+    assert progress["status"] == "failed"
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+
+
+@pytest.mark.anyio
+async def test_results_of_missing_versions_are_skipped(client):
+    quiz_id = await graded_quiz(client)
+    async with client.stand_ins.session_maker() as db:
+        old_version = (await db.execute(select(QuizResults.quiz_version))).scalars().first()
+    await QuizManager.versions(client.stand_ins.mongo).delete_one({"_id": old_version})
+    QUIZ_VERSION_CACHE.pop(old_version, None)
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+
+    progress = await run_regrade(client, quiz_id)
+    assert (progress["status"], progress["scanned"]) == ("done", 0)
+
+
+@pytest.mark.anyio
+async def test_result_with_the_same_total_moves_to_the_new_version(client):
+    quiz = {"name": "swap", "description": "d",
+            "questions": [{"text": "one", "answers": ["a", "b"]}, {"text": "two", "answers": ["a", "b"]}]}
+    response = await client.post("/quizzes/1", json={**quiz, "correct_answers": {"1": [0], "2": [1]}}, headers=owner())
+    quiz_id = response.json()["_id"]
+    response = await client.post(f"/quizzes/1/{quiz_id}/solution", json={"answers": {"1": 0, "2": 0}}, headers=owner())
+    assert response.status_code == 200, response.text
+    await client.put(f"/quizzes/1/{quiz_id}", json={**quiz, "correct_answers": {"1": [1], "2": [0]}}, headers=owner())
+    version = (await QuizManager.get_current_version(client.stand_ins.mongo, quiz_id))["version"]
+    assert (await client.post(f"/quizzes/1/{quiz_id}/regrade", headers=owner())).status_code == 202
+
+    progress = await run_regrade(client, quiz_id)
+    assert (progress["scanned"], progress["changed"]) == (1, 0)
+    async with client.stand_ins.session_maker() as db:
+        result = (await db.execute(select(QuizResults).where(QuizResults.quiz_id == quiz_id))).scalar_one()
+        detail = await db.get(QuizResultDetail, result.id)
+    assert (result.result, result.quiz_version) == (1.0, version)
+    assert detail.scores == {"1": 0.0, "2": 1.0}
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+from benchmarks.harness import username
+from src.core.config import settings
+from src.quizzes.models import QuizResultDetail
+from src.utils.utils_auth import create_access_token
+
+QUIZ = {"name": "export", "description": "d",
+        "questions": [{"text": "first", "answers": ["a", "b"]}, {"text": "second", "answers": ["a", "b"]}],
+        "correct_answers": {"1": [0], "2": [1]}}
+SOLUTIONS = ({"1": 0, "2": 1}, {"1": 1, "2": 1}, {"1": 0, "2": 0})
+
+
+def owner():
+    return {"Authorization": f"Bearer {create_access_token(user_id=1, username=username(1))}"}
+
+
+async def solved_quiz(client):
+    quiz_id = (await client.post("/quizzes/1", json=QUIZ, headers=owner())).json()["_id"]
+    for answers in SOLUTIONS:
+        response = await client.post(f"/quizzes/1/{quiz_id}/solution", json={"answers": answers}, headers=owner())
+        assert response.status_code == 200, response.text
+    return quiz_id
+
+
+def documents(body):
+    decoder, position, parsed = json.JSONDecoder(), 0, []
+    while position < len(body):
+        document, position = decoder.raw_decode(body, position)
+        parsed.append(document)
+    return parsed
+
+
+@pytest.mark.anyio
+async def test_json_export_streams_every_result_across_partitions(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUIZ_EXPORT_BATCH_SIZE", 2)
+    await solved_quiz(client)
+
+    response = await client.get("/quizzes/admin/1/results_json", headers=owner())
+    assert response.status_code == 200, response.text
+    results = documents(response.text)
+    assert [[result[f"Question {number}"]["result"] for number in (1, 2)] for result in results] == [
+        ["right", "right"], ["wrong", "right"], ["right", "wrong"]]
+    assert results[0]["Question 1"]["question"] == str([{"text": "first", "answers": ["a", "b"], "number": 1}])
+
+
+@pytest.mark.anyio
+async def test_csv_export_writes_one_header_and_a_row_per_answer(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUIZ_EXPORT_BATCH_SIZE", 2)
+    await solved_quiz(client)
+
+    response = await client.get("/quizzes/admin/1/results_csv", headers=owner())
+    assert response.status_code == 200, response.text
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["result"] for row in rows] == ["right", "right", "wrong", "right", "right", "wrong"]
+
+
+@pytest.mark.anyio
+async def test_assembled_quiz_exports_its_bank_questions(client):
+    bank = {"questions": [{"text": f"bank {number}", "answers": ["a", "b"], "correct_answers": [0], "tags": ["t"]}
+                          for number in range(2)]}
+    assert (await client.post("/quizzes/1/bank", json=bank, headers=owner())).status_code == 200
+    attempt = (await client.post("/quizzes/1/bank/attempts", json={"tags": ["t"], "questions": 2},
+                                 headers=owner())).json()
+    response = await client.post(f"/quizzes/1/attempts/{attempt['attempt_id']}/solution",
+                                 json={"answers": {"1": 0, "2": 1}}, headers=owner())
+    assert response.status_code == 200, response.text
+
+    async with client.stand_ins.session_maker() as db:
+        detail = (await db.execute(select(QuizResultDetail))).scalar_one()
+    assert detail.question_ids == {str(question["number"]): question["bank_question_id"]
+                                   for question in attempt["questions"]}
+    [result] = documents((await client.get("/quizzes/admin/1/results_json", headers=owner())).text)
+    assert [result[f"Question {question['number']}"]["question"] for question in attempt["questions"]] == [
+        str([question]) for question in attempt["questions"]]
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.tasks.queue import TASKS, task
+from src.tasks.worker import Worker
+
+
+@pytest.fixture
+def long_task(monkeypatch):
+    monkeypatch.setattr(settings, "TASKS_VISIBILITY_TIMEOUT", 2)
+    monkeypatch.setattr(settings, "TASKS_BLOCK_MS", 100)
+    monkeypatch.setattr(settings, "TASKS_SCHEDULE_POLL_INTERVAL", 0.1)
+    runs = []
+
+    @task("tests.long", queue="tests", timeout=1.9)
+    async def sleep_long(number):
+        runs.append(number)
+        await asyncio.sleep(1.8)
+
+    yield sleep_long, runs
+    del TASKS["tests.long"]
+
+
+@pytest.mark.anyio
+async def test_busy_consumer_leaves_messages_in_the_stream(stand_ins, long_task):
+    sleep_long, runs = long_task
+    for number in (1, 2):
+        await sleep_long.enqueue(number, redis=stand_ins.redis)
+    worker = Worker({"tests": 1}, redis=stand_ins.redis, consumer="test")
+
+    runner = asyncio.create_task(worker.run())
+    # the second call only starts after the first, past the visibility timeout of a message read up front
+    await asyncio.sleep(5)
+    runner.cancel()
+
+    assert runs == [1, 2]
+    assert (worker.processed, worker.failed) == (2, 0)
@@ -0,0 +1,13 @@
+from src.core.traffic_capture import sanitize, sanitize_value, synthetic_user
+
+
+def test_sanitize_recurses_into_lists_of_objects():
+    body = {"invitations": [{"email": "a@example.com", "user_id": 7}, [{"password": "secret"}]],
+            "tags": ["x", "y"]}
+    assert sanitize(body) == {"invitations": [{"email": None, "user_id": synthetic_user(7)}, [{"password": None}]],
+                              "tags": ["x", "y"]}
+
+
+def test_sanitize_maps_lists_of_user_fields_and_top_level_arrays():
+    assert sanitize({"user_id": [1, 2]}) == {"user_id": [synthetic_user(1), synthetic_user(2)]}
+    assert sanitize_value([{"token": "t"}]) == [{"token": None}]